@@ -15,12 +15,15 @@ import io
 import sys
 import hmac
 import hashlib
+import time
+import uuid
 from functools import wraps
-from flask import Flask, request, jsonify, send_from_directory, send_file, abort
+import click
+from flask import Flask, request, jsonify, send_from_directory, send_file, abort, Response, stream_with_context, g
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func
+from sqlalchemy import case, func
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_migrate import Migrate
@@ -40,7 +43,25 @@ import requests
 # ===== CONFIGURATION =====
 from config import settings
 from models import db, User, Fabric
-from mockup_library import MockupGeneratorV2
+from mockup_library import MockupGeneratorV2, MODES, RenderFailure
+from image_decoding import DecodeBudgetError
+from render_cache import RenderCache
+from asset_cache import CompiledAssetCache
+from asset_store import CompiledAssetStore
+from render_executor import RenderExecutor, RenderTimeoutError
+from swatch_pyramid import SwatchPyramid
+from image_encoders import ImageEncoder
+from asset_index import get_directory_index
+from garment_catalog import GarmentCatalog
+from thumbnails import ThumbnailStore, THUMB_DIR_NAME
+from output_store import OutputStore
+from owner_names import OwnerNameCache, UNKNOWN_OWNER
+from fabric_search import create_fabric_search
+from pagination import InvalidCursorError, count_rows, keyset_page, order_clauses, scope_digest
+from query_cache import CatalogVersion, MemoryCacheBackend, QueryCache, SQLiteCacheBackend
+from fabric_scale import TileScale, fabric_repeat_width_cm, load_template_calibration
+from render_metrics import MetricsRegistry, RenderMetrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from mockup_jobs import MockupJobQueue, MockupJobRunner, MockupJobError, STATUS_DONE, STATUS_FAILED
 
 # Use settings from environment variables
 PROJECT_ROOT = str(settings.project_root_path)
@@ -56,6 +77,87 @@ DATABASE_PATH = str(settings.database_path)
 TITLE_SLIDE_1_PATH = str(settings.title_slide_1_path)
 TITLE_SLIDE_2_PATH = str(settings.title_slide_2_path)
 
+# Performance: Per-worker render cache (stamps are shared through MOCKUP_DIR_OUTPUT)
+render_cache = RenderCache(MOCKUP_DIR_OUTPUT)
+# Performance: Per-worker LRU of decoded templates/masks (invalidated on mtime change)
+asset_cache = CompiledAssetCache(settings.ASSET_CACHE_MAX_MB * 1024 * 1024)
+# Performance: Downscaled swatch levels so renders don't decode full-size originals
+swatch_pyramid = SwatchPyramid(str(settings.swatch_pyramid_dir_path)) if settings.SWATCH_PYRAMID_ENABLED else None
+# Performance: Precompiled templates/masks, memory-mapped so all workers share one copy
+asset_store = CompiledAssetStore(str(settings.asset_store_dir_path)) if settings.ASSET_STORE_ENABLED else None
+# Performance: Garment listing built once per template/mask directory change
+garment_catalog = GarmentCatalog(MOCKUP_DIR_TEMPLATES, MASK_DIR)
+# Performance: Mockup output format (JPEG/WebP for opaque templates, tuned PNG otherwise)
+mockup_encoder = ImageEncoder(
+    output_format=settings.OUTPUT_FORMAT,
+    quality=settings.OUTPUT_QUALITY,
+    png_compress_level=settings.PNG_COMPRESS_LEVEL,
+    lossless_webp=settings.OUTPUT_LOSSLESS_WEBP
+)
+# Performance: Fixed-width WebP/JPEG derivatives so listings don't pull full-resolution images
+thumbnail_store = ThumbnailStore(
+    widths=settings.thumbnail_widths,
+    output_format=settings.THUMBNAIL_FORMAT,
+    quality=settings.THUMBNAIL_QUALITY
+)
+
+def drop_mockup_thumbnails(path):
+    """Removes the thumbnails of a mockup that was just re-rendered; they are rebuilt on request."""
+    thumbnail_store.remove_all(MOCKUP_DIR_OUTPUT, os.path.basename(path))
+
+# Performance: Generated mockups/techpacks kept within a disk budget (least recently accessed evicted)
+def drop_mockup_derivatives(path):
+    """Removes the render-cache stamp and thumbnails of an evicted mockup."""
+    render_cache.invalidate(path)
+    drop_mockup_thumbnails(path)
+
+mockup_output_store = OutputStore(
+    MOCKUP_DIR_OUTPUT,
+    max_bytes=settings.MOCKUP_OUTPUT_MAX_MB * 1024 * 1024 or None,
+    max_files=settings.MOCKUP_OUTPUT_MAX_FILES or None,
+    protect_seconds=settings.OUTPUT_PROTECT_SECONDS,
+    on_evict=drop_mockup_derivatives
+)
+techpack_output_store = OutputStore(
+    TECHPACK_DIR,
+    max_bytes=settings.TECHPACK_OUTPUT_MAX_MB * 1024 * 1024 or None,
+    max_files=settings.TECHPACK_OUTPUT_MAX_FILES or None,
+    protect_seconds=settings.OUTPUT_PROTECT_SECONDS
+)
+# Observability: Render stage/cache metrics and request latency, merged across workers on /metrics
+metrics_registry = MetricsRegistry(str(settings.metrics_dir_path) if settings.METRICS_ENABLED else None)
+render_metrics = RenderMetrics(metrics_registry)
+request_latency = metrics_registry.histogram(
+    "http_request_duration_seconds",
+    "Request latency by route",
+    ("method", "route", "status")
+)
+# Performance: Process pool so face/back views render concurrently outside the request thread
+render_executor = RenderExecutor(
+    max_workers=settings.RENDER_WORKERS,
+    task_timeout=settings.RENDER_TASK_TIMEOUT,
+    asset_cache_bytes=settings.ASSET_CACHE_MAX_MB * 1024 * 1024,
+    max_image_pixels=PILImage.MAX_IMAGE_PIXELS
+) if settings.RENDER_WORKERS > 0 else None
+# Performance: Cached results of public catalog queries, invalidated when fabrics change
+query_cache_requests = metrics_registry.counter(
+    "catalog_query_cache_requests_total",
+    "Catalog query cache lookups by endpoint (hit, stale, miss, fallback)",
+    ("endpoint", "result")
+)
+catalog_version = CatalogVersion(str(settings.catalog_version_path))
+if settings.QUERY_CACHE_BACKEND == "sqlite":
+    query_cache_backend = SQLiteCacheBackend(str(settings.query_cache_db_path), max_entries=settings.QUERY_CACHE_MAX_ENTRIES)
+else:
+    query_cache_backend = MemoryCacheBackend(max_entries=settings.QUERY_CACHE_MAX_ENTRIES)
+query_cache = QueryCache(
+    query_cache_backend,
+    catalog_version,
+    ttl=settings.QUERY_CACHE_TTL,
+    stale_ttl=settings.QUERY_CACHE_STALE_TTL,
+    observer=lambda endpoint, result: query_cache_requests.inc(endpoint=endpoint, result=result)
+) if settings.QUERY_CACHE_BACKEND != "none" else None
+
 # Initialize Flask App
 app = Flask(__name__)
 
@@ -96,7 +198,7 @@ def _exempt_preflight_and_static():  # type: ignore[no-redef]
         return True
     if request.path.startswith("/static/") or request.path.startswith("/images/"):
         return True
-    if request.path in ("/favicon.ico", "/health"):
+    if request.path in ("/favicon.ico", "/health", "/metrics"):
         return True
     return False
 
@@ -236,6 +338,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    started = g.get('request_started')
+    if started is not None:
+        # Route templates (not raw paths) keep label cardinality bounded
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        request_latency.observe(
+            time.perf_counter() - started,
+            method=request.method, route=route, status=str(response.status_code)
+        )
+        metrics_registry.flush()
+    return response
+
 @app.before_request
 def log_request_info():
     if request.path.startswith('/api'):
@@ -256,16 +375,149 @@ def find_file(directory, base_filename, extensions=['.jpg', '.png', '.jpeg', '.w
     if '..' in base_filename or '/' in base_filename or '\\' in base_filename:
         return None
     
-    for ext in extensions:
-        for case_ext in [ext, ext.upper(), ext.lower()]:
-            path = os.path.join(directory, f"{base_filename}{case_ext}")
-            if os.path.exists(path): return f"{base_filename}{case_ext}"
-    return None
+    # Performance: answered from the shared directory index instead of probing each extension
+    return get_directory_index(directory).find(base_filename, extensions)
+
+# Weight filter buckets by GSM (also the buckets of the weight facet)
+WEIGHT_BUCKETS = {
+    'light': Fabric.gsm < 160,
+    'medium': Fabric.gsm.between(160, 240),
+    'heavy': Fabric.gsm > 240
+}
 
 def clean_group_name(text):
     if not isinstance(text, str): return str(text)
     return text.strip()
 
+def load_owner_names(user_ids):
+    """Company names for the given user ids, in one query."""
+    rows = User.query.with_entities(User.id, User.company_name).filter(User.id.in_(user_ids)).all()
+    return {user_id: company_name for user_id, company_name in rows}
+
+# Performance: Company names for single-fabric responses without a users lookup per request
+owner_names = OwnerNameCache(load_owner_names)
+
+def cached_catalog_query(name, params, compute):
+    """
+    Returns compute()'s JSON body through the catalog query cache.
+    
+    Args:
+        name: Endpoint name
+        params: Normalized request parameters (the cache key)
+        compute: Callable() -> JSON string; runs in its own app context so a
+                 stale entry can be refreshed from a background thread
+    """
+    def compute_in_app():
+        with app.app_context():
+            return compute()
+    
+    if query_cache is None:
+        return compute()
+    return query_cache.get_or_compute(name, params, compute_in_app)
+
+def invalidate_catalog_cache():
+    """Drops cached catalog query results on every worker (after fabric changes)."""
+    if query_cache is not None:
+        query_cache.invalidate()
+
+_fabric_search = None
+
+def get_fabric_search():
+    """
+    The fabric search implementation for the configured database, chosen on
+    first use (needs the engine): indexed full-text/trigram search on
+    PostgreSQL once migrated, ILIKE otherwise.
+    """
+    global _fabric_search
+    if _fabric_search is None:
+        _fabric_search = create_fabric_search(db.engine, Fabric)
+        logger.info(f"Fabric search: using {_fabric_search.name} search")
+    return _fabric_search
+
+def paginate_listing(query, keys, limit, scope, cursor=None, page=1, total=''):
+    """
+    Fetches one page of a listing.
+    
+    With a cursor (empty for the first page) the page is a keyset page:
+    constant cost at any depth, no count unless `total` is 'exact' or
+    'approx' (planner estimate on PostgreSQL). With cursor None, the
+    classic OFFSET `page` with its total is returned.
+    
+    Args:
+        query: Listing query (filtered, unordered)
+        keys: Sort key as (expression, descending) pairs ending in a unique column
+        limit: Rows per page
+        scope: scope_digest() of the endpoint and its filters
+        cursor: The request's `cursor` argument, or None without one
+        page: Page number for OFFSET pages
+        total: '', 'exact' or 'approx'
+        
+    Returns:
+        (items, fields) - the rows and the pagination fields of the response
+        
+    Raises:
+        InvalidCursorError: For a malformed or foreign cursor
+    """
+    if cursor is not None:
+        items, next_cursor = keyset_page(query, keys, limit, cursor or None, scope)
+        fields = {"limit": limit, "next_cursor": next_cursor, "has_more": next_cursor is not None}
+        if total in ('exact', 'approx'):
+            fields["total"], fields["total_is_estimate"] = count_rows(query, approximate=total == 'approx')
+        return items, fields
+    
+    page = max(1, page)
+    pagination = query.order_by(*order_clauses(keys)).paginate(page=page, per_page=limit, error_out=False)
+    return pagination.items, {"total": pagination.total, "page": page, "limit": limit, "pages": pagination.pages}
+
+def with_owner_names(query):
+    """
+    Adds the owner's company name to a Fabric query with an outer join,
+    so listings fetch fabrics and owners in one round trip.
+    Rows become (Fabric, owner_id, company_name) tuples.
+    """
+    return query.outerjoin(User, User.id == Fabric.manufacturer_id).add_columns(
+        User.id.label('owner_id'), User.company_name.label('owner_name')
+    )
+
+def swatch_filename(fabric):
+    """
+    The swatch file of a fabric, from its stored image_path. Paths are filled
+    in by 'flask backfill-image-paths' and when a fabric's ref changes; fabrics
+    imported since then have none and are resolved through the in-memory
+    directory index (no filesystem probes per extension).
+    """
+    return fabric.image_path or find_file(FABRIC_SWATCH_DIR, fabric.ref)
+
+def fabric_summary(fabric, owner_name):
+    """Listing representation of a fabric."""
+    image_filename = swatch_filename(fabric)
+    return {
+        "id": fabric.id,
+        "ref": fabric.ref,
+        "fabric_group": fabric.fabric_group,
+        "fabrication": fabric.fabrication,
+        "gsm": fabric.gsm,
+        "width": fabric.width,
+        "composition": fabric.composition,
+        "status": fabric.status,
+        "owner_name": owner_name,
+        "manufacturer_id": fabric.manufacturer_id,
+        "meta_data": fabric.meta_data or {},
+        "swatchUrl": f"/static/swatches/{image_filename}" if image_filename else None,
+        "swatchSrcset": thumbnail_store.srcset("/static/swatches/", image_filename)
+    }
+
+def fabric_summaries(rows):
+    """Listing representations of (Fabric, owner_id, company_name) rows from with_owner_names()."""
+    results = []
+    names = {}
+    for fabric, owner_id, company_name in rows:
+        if owner_id is not None:
+            names[owner_id] = company_name
+        results.append(fabric_summary(fabric, UNKNOWN_OWNER if owner_id is None or company_name is None else company_name))
+    owner_names.prime(names)
+    return results
+
 # ===== AUTHENTICATION DECORATORS =====
 def supabase_jwt_required():
     """Decorator to require Supabase JWT authentication."""
@@ -332,14 +584,25 @@ def api_health_check():
     """Health check endpoint under /api for reverse-proxied setups."""
     return jsonify({'status': 'ok'}), 200
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics for all server workers (scraped on the backend port)."""
+    if not settings.METRICS_ENABLED:
+        abort(404)
+    metrics_registry.flush(force=True)
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/api/fabric-groups')
 @limiter.limit("100 per minute")
 def get_fabric_groups():
-    try:
+    def compute():
         # Architecture: Standardized on Model.query pattern for consistency
         groups = Fabric.query.with_entities(Fabric.fabric_group).filter_by(status='LIVE').distinct().all()
         cleaned_groups = sorted(list(set([clean_group_name(g[0]) for g in groups if g[0]])))
-        return jsonify(cleaned_groups)
+        return json.dumps(cleaned_groups)
+    
+    try:
+        return Response(cached_catalog_query('fabric-groups', {}, compute), mimetype='application/json')
     except Exception as e:
         logger.error(f"Error fetching groups: {e}")
         return jsonify({"error": "An unexpected error occurred."}), 500
@@ -350,10 +613,6 @@ def find_fabrics():
     search_term = request.args.get('search', '').strip()
     filter_group = request.args.get('group', '').strip()
     filter_weight = request.args.get('weight', '').strip()
-    # Stability: Use Flask's type parameter to safely handle invalid input (prevents 500 errors)
-    page = request.args.get('page', 1, type=int)
-    if page < 1:
-        page = 1
     
     # Security: Enforce max limit to prevent DoS
     MAX_LIMIT = 100
@@ -361,163 +620,141 @@ def find_fabrics():
     limit = max(1, min(limit, MAX_LIMIT))
     
     logger.info(f"Search: '{search_term}' | Group: '{filter_group}' | Weight: '{filter_weight}'")
+    
+    # Performance: Normalized parameters are the cache key, so equivalent
+    # requests share one cached result (search and group match case-insensitively)
+    params = {
+        "search": " ".join(search_term.split()).lower(),
+        "group": filter_group.lower(),
+        "weight": filter_weight if filter_weight in WEIGHT_BUCKETS else '',
+        "limit": limit
+    }
+    if request.args.get('facets', '').lower() in ('1', 'true'):
+        params["facets"] = True
+    if 'cursor' in request.args:
+        params["cursor"] = request.args.get('cursor', '')
+        params["total"] = request.args.get('total', '')
+    else:
+        # Stability: Use Flask's type parameter to safely handle invalid input (prevents 500 errors)
+        params["page"] = max(1, request.args.get('page', 1, type=int))
 
     try:
-        query = Fabric.query.filter_by(status='LIVE')
-
-        # 1. Apply Filters
-        if filter_group:
-            query = query.filter(Fabric.fabric_group.ilike(f"%{filter_group}%"))
-        
-        if filter_weight:
-            if filter_weight == 'light':
-                query = query.filter(Fabric.gsm < 160)
-            elif filter_weight == 'medium':
-                query = query.filter(Fabric.gsm.between(160, 240))
-            elif filter_weight == 'heavy':
-                query = query.filter(Fabric.gsm > 240)
-
-        # 2. Apply Search Term
-        if search_term:
-            term = f"%{search_term}%"
-            query = query.filter(
-                (Fabric.ref.ilike(term)) |
-                (Fabric.fabrication.ilike(term)) |
-                (Fabric.fabric_group.ilike(term))
-            )
-
-        # 3. Pagination
-        pagination = query.paginate(page=page, per_page=limit, error_out=False)
-        
-        results = []
-        for f in pagination.items:
-            # Get owner name
-            owner = User.query.get(f.manufacturer_id)
-            owner_name = owner.company_name if owner else "Unknown"
-            
-            # Find image
-            # Optimization: Use stored image_path if available
-            image_filename = f.image_path if hasattr(f, 'image_path') and f.image_path else find_file(FABRIC_SWATCH_DIR, f.ref)
-            swatch_url = f"/static/swatches/{image_filename}" if image_filename else None
-            
-            results.append({
-                "id": f.id,
-                "ref": f.ref,
-                "fabric_group": f.fabric_group,
-                "fabrication": f.fabrication,
-                "gsm": f.gsm,
-                "width": f.width,
-                "composition": f.composition,
-                "status": f.status,
-                "owner_name": owner_name,
-                "manufacturer_id": f.manufacturer_id,
-                "meta_data": f.meta_data or {},
-                "swatchUrl": swatch_url
-            })
-            
-        return jsonify({
-            "results": results,
-            "total": pagination.total,
-            "page": page,
-            "limit": limit,
-            "pages": pagination.pages
-        })
-
+        body = cached_catalog_query('find-fabrics', params, lambda: search_fabrics(params))
+        return Response(body, mimetype='application/json')
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error finding fabrics: {e}")
         return jsonify({"error": "An unexpected error occurred."}), 500
 
+def search_fabrics(params):
+    """
+    Runs a LIVE catalog search and returns the response body as JSON.
+    
+    Args:
+        params: Normalized parameters from find_fabrics (independent of the
+                request, so stale cache entries can be refreshed in the background)
+    """
+    query = with_owner_names(Fabric.query.filter_by(status='LIVE'))
+
+    # 1. Apply Filters
+    if params["group"]:
+        query = query.filter(Fabric.fabric_group.ilike(f"%{params['group']}%"))
+    
+    if params["weight"]:
+        query = query.filter(WEIGHT_BUCKETS[params["weight"]])
+
+    # 2. Apply Search Term (indexed and relevance-ranked on PostgreSQL)
+    keys = [(Fabric.id, False)]
+    if params["search"]:
+        search = get_fabric_search()
+        query = search.filter(query, params["search"])
+        keys.insert(0, (search.rank(params["search"]), True))
+
+    # 3. Pagination (fabrics and owner names come back in one query)
+    scope = scope_digest('find-fabrics', params["search"], params["group"], params["weight"])
+    items, pagination = paginate_listing(
+        query, keys, params["limit"], scope,
+        cursor=params.get("cursor"), page=params.get("page", 1), total=params.get("total", '')
+    )
+    body = {"results": fabric_summaries(items), **pagination}
+    if params.get("facets"):
+        body["facets"] = search_facets(params)
+    return json.dumps(body)
+
+def search_facets(params):
+    """
+    Fabric counts per group and per weight bucket for a search, from one
+    grouped query.
+    
+    Each facet is counted with the other facet's filter applied but not its
+    own, so the sidebar still shows how many results choosing a different
+    group (or weight) would give.
+    
+    Args:
+        params: Normalized parameters from find_fabrics
+    
+    Returns:
+        {"group": [{"value", "count"}, ...], "weight": [{"value", "count"}, ...]}
+    """
+    bucket = case(
+        *((condition, name) for name, condition in WEIGHT_BUCKETS.items()),
+        else_=None
+    ).label('bucket')
+    query = Fabric.query.filter_by(status='LIVE')
+    if params["search"]:
+        query = get_fabric_search().filter(query, params["search"])
+    # Performance: one GROUP BY (group, bucket) answers both facets
+    rows = query.with_entities(Fabric.fabric_group, bucket, func.count(Fabric.id)) \
+        .group_by(Fabric.fabric_group, bucket).all()
+
+    group_counts = {}
+    weight_counts = dict.fromkeys(WEIGHT_BUCKETS, 0)
+    for group, weight, count in rows:
+        # Same matching as the group filter (case-insensitive substring)
+        in_group = not params["group"] or params["group"] in (group or '').lower()
+        if group and (not params["weight"] or weight == params["weight"]):
+            name = clean_group_name(group)
+            group_counts[name] = group_counts.get(name, 0) + count
+        if weight and in_group:
+            weight_counts[weight] += count
+
+    return {
+        "group": [{"value": name, "count": count} for name, count in sorted(group_counts.items())],
+        "weight": [{"value": name, "count": count} for name, count in weight_counts.items()]
+    }
+
 @app.route('/api/garments')
 @limiter.limit("100 per minute")
 def get_garments():
     try:
-        garments_by_category = {}
-        
-        if not os.path.exists(MOCKUP_DIR_TEMPLATES):
-            return jsonify({})
-            
-        files = os.listdir(MOCKUP_DIR_TEMPLATES)
-        garment_map = {} # Key: (category, base_name) -> data
-
-        for filename in files:
-            if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
-                # Remove extension
-                name_part = os.path.splitext(filename)[0]
-                
-                # Check for view suffix
-                view = None
-                base_name = name_part
-                if '_face' in name_part.lower():
-                    base_name = re.sub(r'_face', '', name_part, flags=re.IGNORECASE)
-                    view = 'face'
-                elif '_back' in name_part.lower():
-                    base_name = re.sub(r'_back', '', name_part, flags=re.IGNORECASE)
-                    view = 'back'
-                
-                # Split category (first word)
-                parts = base_name.split(' ', 1)
-                if len(parts) > 1:
-                    category = parts[0].capitalize() # Men, Ladies, Infant
-                    display_name = parts[1].strip()
-                else:
-                    category = "Uncategorized"
-                    display_name = base_name
-                
-                # Key for uniqueness
-                key = (category, display_name)
-                
-                if key not in garment_map:
-                    garment_map[key] = {
-                        "name": base_name, 
-                        "displayName": display_name,
-                        "category": category,
-                        "imageUrl": None,
-                        "hasFace": False
-                    }
-                
-                # Determine best image for thumbnail
-                if view == 'face' or not garment_map[key]["imageUrl"]:
-                     garment_map[key]["imageUrl"] = f"/static/mockup-templates/{filename}"
-                     if view == 'face':
-                         garment_map[key]["hasFace"] = True
-                elif view == 'back' and not garment_map[key]["hasFace"]:
-                     garment_map[key]["imageUrl"] = f"/static/mockup-templates/{filename}"
-
-        # Convert map to response structure
-        for key, data in garment_map.items():
-            cat = data["category"]
-            if cat not in garments_by_category:
-                garments_by_category[cat] = []
-                
-            garments_by_category[cat].append({
-                "name": data["name"],
-                "displayName": data["displayName"],
-                "imageUrl": data["imageUrl"],
-                "isSilhouette": True
-            })
-            
-        return jsonify(garments_by_category)
+        # Performance: precomputed body, rebuilt only when templates or masks change
+        body, etag = garment_catalog.get()
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        # Clients may keep the body but must revalidate (cheap 304 when unchanged)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
 
     except Exception as e:
         logger.error(f"Error fetching garments: {e}")
         return jsonify({"error": "An unexpected error occurred."}), 500
 
-@app.route('/api/generate-mockup', methods=['POST'])
-@supabase_jwt_required()
-@limiter.limit("10 per minute")
-def generate_on_demand():
-    # Security: Prevent large payloads (DoS)
-    if request.content_length and request.content_length > 10 * 1024 * 1024:  # 10MB limit
-        abort(413)
-        
-    data = request.json
+# Shown when a fabric is over RENDER_DECODE_BUDGET_MB
+FABRIC_TOO_LARGE_ERROR = "Fabric image is too large to render. Upload a smaller swatch."
+
+def parse_mockup_request(data):
+    """
+    Validates a mockup request body.
+    Returns (fabric_ref, mockup_name, None) or (None, None, error_message).
+    """
     if not data:
-        return jsonify({"success": False, "error": "Request body is required"}), 400
+        return None, None, "Request body is required"
     fabric_ref = data.get('fabric_ref')
     mockup_name = data.get('mockup_name')
     
     if not fabric_ref or not mockup_name:
-        return jsonify({"success": False, "error": "Missing fabric_ref or mockup_name"}), 400
+        return None, None, "Missing fabric_ref or mockup_name"
     
     # Security: Validate inputs (prevent path traversal while preserving special characters)
     # Use os.path.basename to ensure we only get the filename part
@@ -525,41 +762,196 @@ def generate_on_demand():
     mockup_name = os.path.basename(str(mockup_name))
     # Reject path traversal attempts
     if '..' in fabric_ref or '/' in fabric_ref or '\\' in fabric_ref:
-        return jsonify({"success": False, "error": "Invalid fabric_ref: path traversal detected"}), 400
+        return None, None, "Invalid fabric_ref: path traversal detected"
     if '..' in mockup_name or '/' in mockup_name or '\\' in mockup_name:
-        return jsonify({"success": False, "error": "Invalid mockup_name: path traversal detected"}), 400
+        return None, None, "Invalid mockup_name: path traversal detected"
+    return fabric_ref, mockup_name, None
+
+def parse_render_mode(data):
+    """
+    Reads the optional fabric application mode from a request body.
+    Returns (mode, None) or (None, error_message).
+    """
+    mode = (data or {}).get('mode', 'stretch')
+    if mode not in MODES:
+        return None, f"mode must be one of {', '.join(MODES)}"
+    return mode, None
+
+def build_tile_scale(fabric_refs):
+    """Repeat widths of the given fabrics plus template calibration, for tile mode."""
+    repeats = {}
+    for fabric in Fabric.query.filter(Fabric.ref.in_(list(fabric_refs))).all():
+        repeat_cm = fabric_repeat_width_cm(fabric.meta_data)
+        if repeat_cm and fabric.ref not in repeats:
+            repeats[fabric.ref] = repeat_cm
+    return TileScale(
+        repeats=repeats,
+        default_repeat_cm=settings.TILE_DEFAULT_REPEAT_CM,
+        calibration=load_template_calibration(str(settings.template_calibration_path)),
+        default_px_per_cm=settings.TEMPLATE_PX_PER_CM
+    )
+
+def build_mockup_generator(quality="full", mode="stretch", fabric_refs=(), executor=None):
+    """
+    Creates a MockupGeneratorV2 wired to the shared caches and executor.
+    For tile mode, pass the fabric refs that will be rendered so their
+    physical repeat widths are loaded. `executor` replaces the shared render
+    executor for full-quality renders (e.g. a larger pool for CLI batch work).
+    """
+    return MockupGeneratorV2(
+        fabric_dir=FABRIC_SWATCH_DIR,
+        mockup_dir=MOCKUP_DIR_TEMPLATES,
+        mask_dir=MASK_DIR,
+        output_dir=MOCKUP_DIR_OUTPUT,
+        render_cache=render_cache,
+        asset_cache=asset_cache,
+        engine=settings.RENDER_ENGINE,
+        # Previews are cheap: render in the request thread so they never queue behind full renders
+        executor=(executor or render_executor) if quality == "full" else None,
+        swatch_pyramid=swatch_pyramid,
+        quality=quality,
+        preview_max_size=settings.PREVIEW_MAX_SIZE,
+        encoder=mockup_encoder,
+        mode=mode,
+        tile_scale=build_tile_scale(fabric_refs) if mode == "tile" else None,
+        observer=render_metrics,
+        max_decode_bytes=settings.RENDER_DECODE_BUDGET_MB * 1024 * 1024 or None,
+        asset_store=asset_store,
+        # Caddy serves existing thumbnails without asking us: drop the previous render's
+        on_output_written=drop_mockup_thumbnails
+    )
+
+def view_for_filename(filename):
+    """Returns the garment view ('face', 'back' or 'single') a mockup file shows."""
+    if "_face" in filename: return "face"
+    if "_back" in filename: return "back"
+    return "single"
+
+def inline_mockup_response(parts, quality):
+    """
+    Builds a response carrying the rendered images themselves.
+    One view is returned as the image; several (face + back) as a
+    multipart/mixed body with one part per view.
     
-    try:
-        generator = MockupGeneratorV2(
-            fabric_dir=FABRIC_SWATCH_DIR,
-            mockup_dir=MOCKUP_DIR_TEMPLATES,
-            mask_dir=MASK_DIR,
-            output_dir=MOCKUP_DIR_OUTPUT
+    Args:
+        parts: List of (mockup_name, filename, mimetype, data) from
+               MockupGeneratorV2.generate_mockup_bytes()
+        quality: 'full' or 'preview', echoed in X-Mockup-Quality
+    """
+    headers = {"X-Mockup-Quality": quality, "Cache-Control": "no-store"}
+    if len(parts) == 1:
+        _, filename, mimetype, data = parts[0]
+        headers["X-Mockup-View"] = view_for_filename(filename)
+        headers["Content-Disposition"] = f'inline; filename="{filename}"'
+        return Response(data, mimetype=mimetype, headers=headers)
+    
+    boundary = uuid.uuid4().hex
+    body = []
+    for _, filename, mimetype, data in parts:
+        body.append(
+            f"--{boundary}\r\n"
+            f"Content-Type: {mimetype}\r\n"
+            f'Content-Disposition: inline; name="{view_for_filename(filename)}"; filename="{filename}"\r\n'
+            f"Content-Length: {len(data)}\r\n\r\n".encode("ascii")
         )
+        body.append(data)
+        body.append(b"\r\n")
+    body.append(f"--{boundary}--\r\n".encode("ascii"))
+    return Response(b"".join(body), content_type=f"multipart/mixed; boundary={boundary}", headers=headers)
+
+def mockup_result_payload(results):
+    """
+    Maps generated file paths to {"mockups": {view: url}, "views": [...],
+    "srcset": {view: {"<width>w": thumbnail url}}}.
+    """
+    # The URLs are about to be fetched: keep the files off the eviction list
+    mockup_output_store.touch(results)
+    mockups = {}
+    srcsets = {}
+    views = []
+    for res in results:
+        filename = os.path.basename(res)
+        view = view_for_filename(filename)
         
-        results = generator.generate_mockup(fabric_ref, mockup_name)
+        mockups[view] = f"/static/mockups/{filename}"
+        srcsets[view] = thumbnail_store.srcset("/static/mockups/", filename)
+        views.append(view)
+    return {"mockups": mockups, "views": views, "srcset": srcsets}
+
+@app.route('/api/generate-mockup', methods=['POST'])
+@supabase_jwt_required()
+@limiter.limit("10 per minute")
+def generate_on_demand():
+    # Security: Prevent large payloads (DoS)
+    if request.content_length and request.content_length > 10 * 1024 * 1024:  # 10MB limit
+        abort(413)
         
-        if results:
-            mockups = {}
-            views = []
-            for res in results:
-                filename = os.path.basename(res)
-                view = "single"
-                if "_face" in filename: view = "face"
-                elif "_back" in filename: view = "back"
-                
-                mockups[view] = f"/static/mockups/{filename}"
-                views.append(view)
-                
+    fabric_ref, mockup_name, error = parse_mockup_request(request.json)
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+    quality = request.json.get('quality', 'full')
+    if quality not in ('full', 'preview'):
+        return jsonify({"success": False, "error": "quality must be 'full' or 'preview'"}), 400
+    mode, error = parse_render_mode(request.json)
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+    # 'inline' returns the image bytes instead of URLs; nothing is written to disk
+    delivery = request.json.get('delivery', 'url')
+    if delivery not in ('url', 'inline'):
+        return jsonify({"success": False, "error": "delivery must be 'url' or 'inline'"}), 400
+    
+    try:
+        generator = build_mockup_generator(mode=mode, fabric_refs=[fabric_ref])
+        
+        if delivery == 'inline':
+            # One-off render: an up-to-date full render is read back, otherwise
+            # the requested quality renders straight into memory
+            if quality == 'preview' and not generator.find_cached_mockup(fabric_ref, mockup_name):
+                generator = build_mockup_generator(quality='preview', mode=mode, fabric_refs=[fabric_ref])
+            parts = generator.generate_mockup_bytes(fabric_ref, mockup_name)
+            if not parts:
+                return jsonify({"success": False, "error": "Failed to generate mockup. Check if files exist."}), 404
+            return inline_mockup_response(parts, generator.quality)
+        
+        if quality == 'preview':
+            # Nothing to preview if the full-quality render is already up to date
+            cached = generator.find_cached_mockup(fabric_ref, mockup_name)
+            if cached:
+                return jsonify({"success": True, "quality": "full", **mockup_result_payload(cached)})
+            
+            preview_generator = build_mockup_generator(quality='preview', mode=mode, fabric_refs=[fabric_ref])
+            results = preview_generator.generate_mockup(fabric_ref, mockup_name)
+            if not results:
+                return jsonify({"success": False, "error": "Failed to generate mockup. Check if files exist."}), 404
+            
+            # Progressive: queue the full-quality render for the client to swap in
+            job_id = mockup_job_queue.enqueue(
+                {"fabric_ref": fabric_ref, "mockup_name": mockup_name, "mode": mode},
+                user_id=request.current_user.id
+            )
+            mockup_job_runner.notify()
             return jsonify({
                 "success": True,
-                "mockups": mockups,
-                "views": views
+                "quality": "preview",
+                **mockup_result_payload(results),
+                "full_job_id": job_id,
+                "full_status_url": f"/api/mockup-jobs/{job_id}"
             })
+        
+        results = generator.generate_mockup(fabric_ref, mockup_name)
+        
+        if results:
+            return jsonify({"success": True, "quality": "full", **mockup_result_payload(results)})
         else:
             return jsonify({"success": False, "error": "Failed to generate mockup. Check if files exist."}), 404
     
     # Reliability: Catch specific exceptions for appropriate error responses
+    except RenderTimeoutError as e:
+        logger.error(f"Mockup render timed out: {e}")
+        return jsonify({"success": False, "error": "Mockup generation timed out. Please try again."}), 504
+    except DecodeBudgetError as e:
+        logger.warning(f"Fabric over the decode budget: {e}")
+        return jsonify({"success": False, "error": FABRIC_TOO_LARGE_ERROR}), 422
     except (PILImage.UnidentifiedImageError, OSError) as e:
         logger.warning(f"Invalid image file in mockup generation: {e}")
         return jsonify({"success": False, "error": "Invalid or corrupt image file"}), 400
@@ -570,6 +962,207 @@ def generate_on_demand():
         logger.error(f"Unexpected error generating mockup: {e}")
         return jsonify({"success": False, "error": "An unexpected server error occurred"}), 500
 
+# ===== BATCH MOCKUP GENERATION =====
+# Each combination may render two views. Rendering stops after
+# MOCKUP_BATCH_TIME_LIMIT (below gunicorn's worker timeout, which would kill the
+# stream); combinations not rendered by then are reported as unfinished
+MAX_BATCH_COMBINATIONS = 60
+
+def parse_ref_list(value, field):
+    """
+    Validates a list of fabric refs or garment names from a batch request.
+    Returns (cleaned_list, None) or (None, error_message). Duplicates are dropped.
+    """
+    if not isinstance(value, list) or not value:
+        return None, f"{field} must be a non-empty list"
+    cleaned = []
+    for item in value:
+        if not item or not isinstance(item, str):
+            return None, f"{field} must contain only non-empty strings"
+        # Security: Same path traversal rules as single requests
+        item = os.path.basename(item)
+        if '..' in item or '/' in item or '\\' in item:
+            return None, f"Invalid {field}: path traversal detected"
+        if item not in cleaned:
+            cleaned.append(item)
+    return cleaned, None
+
+@app.route('/api/generate-mockups/batch', methods=['POST'])
+@supabase_jwt_required()
+@limiter.limit("3 per minute")
+def generate_mockup_batch():
+    """
+    Generate mockups for every fabric x garment combination in one request.
+    Streams newline-delimited JSON, one line per combination as it completes,
+    followed by a summary line with "done": true. Combinations not rendered
+    within MOCKUP_BATCH_TIME_LIMIT get a line with "unfinished": true.
+    """
+    deadline = time.monotonic() + settings.MOCKUP_BATCH_TIME_LIMIT
+    if request.content_length and request.content_length > 10 * 1024 * 1024:  # 10MB limit
+        abort(413)
+    
+    data = request.json
+    if not data:
+        return jsonify({"success": False, "error": "Request body is required"}), 400
+    fabric_refs, error = parse_ref_list(data.get('fabric_refs'), 'fabric_refs')
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+    mockup_names, error = parse_ref_list(data.get('mockup_names'), 'mockup_names')
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+    mode, error = parse_render_mode(data)
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+    
+    total = len(fabric_refs) * len(mockup_names)
+    if total > MAX_BATCH_COMBINATIONS:
+        return jsonify({
+            "success": False,
+            "error": f"Too many combinations ({total}). Maximum is {MAX_BATCH_COMBINATIONS}."
+        }), 400
+    
+    generator = build_mockup_generator(mode=mode, fabric_refs=fabric_refs)
+    
+    def stream():
+        succeeded = 0
+        reported = set()
+        unfinished = []
+        try:
+            for fabric_ref, mockup_name, files in generator.generate_batch(fabric_refs, mockup_names, deadline=deadline):
+                reported.add((fabric_ref, mockup_name))
+                line = {"fabric_ref": fabric_ref, "mockup_name": mockup_name, "success": bool(files)}
+                if files:
+                    line.update(mockup_result_payload(files))
+                    succeeded += 1
+                elif isinstance(files, RenderFailure):
+                    line["error"] = FABRIC_TOO_LARGE_ERROR
+                else:
+                    line["error"] = "Failed to generate mockup. Check if files exist."
+                yield json.dumps(line) + "\n"
+        except RenderTimeoutError as e:
+            logger.error(f"Batch mockup render timed out: {e}")
+            unfinished = [
+                (fabric_ref, mockup_name)
+                for fabric_ref in fabric_refs for mockup_name in mockup_names
+                if (fabric_ref, mockup_name) not in reported
+            ]
+        except Exception as e:
+            logger.error(f"Unexpected error in batch mockup generation: {e}")
+            yield json.dumps({"success": False, "error": "An unexpected server error occurred"}) + "\n"
+        for fabric_ref, mockup_name in unfinished:
+            yield json.dumps({
+                "fabric_ref": fabric_ref, "mockup_name": mockup_name, "success": False, "unfinished": True,
+                "error": "Not rendered in time. Request this combination again."
+            }) + "\n"
+        yield json.dumps({"done": True, "total": total, "succeeded": succeeded, "unfinished": len(unfinished)}) + "\n"
+    
+    return Response(stream_with_context(stream()), mimetype='application/x-ndjson')
+
+# ===== ASYNC MOCKUP JOBS =====
+def run_mockup_job(payload):
+    """Job handler: renders one queued mockup request (runs in a job runner thread)."""
+    try:
+        # Tile mode reads fabric dimensions from the database
+        with app.app_context():
+            generator = build_mockup_generator(
+                mode=payload.get('mode', 'stretch'),
+                fabric_refs=[payload['fabric_ref']]
+            )
+        results = generator.generate_mockup(payload['fabric_ref'], payload['mockup_name'])
+    except RenderTimeoutError:
+        raise MockupJobError("Mockup generation timed out")
+    except DecodeBudgetError:
+        raise MockupJobError(FABRIC_TOO_LARGE_ERROR)
+    except (PILImage.UnidentifiedImageError, OSError):
+        raise MockupJobError("Invalid or corrupt image file")
+    except MemoryError:
+        raise MockupJobError("Server ran out of memory processing this request")
+    if not results:
+        raise MockupJobError("Failed to generate mockup. Check if files exist.")
+    return mockup_result_payload(results)
+
+mockup_job_queue = MockupJobQueue(str(settings.mockup_job_db_path))
+mockup_job_runner = MockupJobRunner(
+    mockup_job_queue,
+    run_mockup_job,
+    threads=settings.MOCKUP_JOB_THREADS
+)
+
+@app.before_request
+def start_mockup_job_runner():
+    # Runner threads start in each server worker (gunicorn.conf.py, or the first request
+    # under the development server) so CLI commands don't spawn them
+    if settings.MOCKUP_JOB_THREADS > 0:
+        mockup_job_runner.ensure_started()
+
+@app.before_request
+def start_output_eviction():
+    # Flushes recorded accesses and evicts over-budget outputs; lazily, like the job runner
+    if settings.OUTPUT_EVICT_INTERVAL > 0:
+        for store in (mockup_output_store, techpack_output_store):
+            if store.bounded:
+                store.ensure_started(settings.OUTPUT_EVICT_INTERVAL)
+
+def mockup_job_response(job):
+    """Public view of a job record."""
+    body = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"]
+    }
+    if job["status"] == STATUS_DONE and job["result"]:
+        body.update(job["result"])
+    if job["status"] == STATUS_FAILED:
+        body["error"] = job["error"]
+    return body
+
+@app.route('/api/mockup-jobs', methods=['POST'])
+@supabase_jwt_required()
+@limiter.limit("30 per minute")
+def create_mockup_job():
+    """Queue a mockup render and return its job id immediately."""
+    if request.content_length and request.content_length > 10 * 1024 * 1024:  # 10MB limit
+        abort(413)
+    
+    fabric_ref, mockup_name, error = parse_mockup_request(request.json)
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+    mode, error = parse_render_mode(request.json)
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+    
+    try:
+        job_id = mockup_job_queue.enqueue(
+            {"fabric_ref": fabric_ref, "mockup_name": mockup_name, "mode": mode},
+            user_id=request.current_user.id
+        )
+        mockup_job_runner.notify()
+        return jsonify({
+            "success": True,
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/api/mockup-jobs/{job_id}"
+        }), 202
+    except Exception as e:
+        logger.error(f"Error queueing mockup job: {e}")
+        return jsonify({"success": False, "error": "An unexpected server error occurred"}), 500
+
+@app.route('/api/mockup-jobs/<job_id>', methods=['GET'])
+@supabase_jwt_required()
+@limiter.limit("120 per minute")
+def get_mockup_job(job_id):
+    """Report job status (queued/running/done/failed) and result URLs."""
+    try:
+        job = mockup_job_queue.get(job_id)
+        # Security: Jobs are only visible to the user who submitted them
+        if not job or job["user_id"] != request.current_user.id:
+            return jsonify({"success": False, "error": "Job not found"}), 404
+        return jsonify({"success": True, **mockup_job_response(job)})
+    except Exception as e:
+        logger.error(f"Error fetching mockup job {job_id}: {e}")
+        return jsonify({"success": False, "error": "An unexpected server error occurred"}), 500
+
 @app.route('/api/generate-pptx', methods=['POST'])
 @limiter.limit("5 per minute")
 def generate_pptx():
@@ -577,7 +1170,9 @@ def generate_pptx():
 
 # ===== STATIC SERVING ROUTES =====
 @app.route('/static/mockups/<filename>')
-def serve_mockup(filename): return send_from_directory(MOCKUP_DIR_OUTPUT, filename)
+def serve_mockup(filename):
+    with mockup_output_store.serving(os.path.join(MOCKUP_DIR_OUTPUT, os.path.basename(filename))):
+        return send_from_directory(MOCKUP_DIR_OUTPUT, filename)
 
 @app.route('/static/mockup-templates/<filename>')
 def serve_mockup_template(filename): return send_from_directory(MOCKUP_DIR_TEMPLATES, filename)
@@ -588,6 +1183,28 @@ def serve_silhouette(filename): return send_from_directory(SILHOUETTE_DIR, filen
 @app.route('/static/swatches/<filename>')
 def serve_swatch(filename): return send_from_directory(FABRIC_SWATCH_DIR, filename)
 
+def serve_thumbnail(directory, name):
+    """Serves a thumbnail derivative, generating it on first request."""
+    parsed = thumbnail_store.parse_thumb_name(name)
+    if parsed is None:
+        abort(404)
+    original, width = parsed
+    try:
+        path = thumbnail_store.ensure(directory, original, width)
+    except (ValueError, FileNotFoundError):
+        abort(404)
+    except (PILImage.UnidentifiedImageError, OSError) as e:
+        logger.warning(f"Could not create thumbnail {name}: {e}")
+        abort(404)
+    return send_from_directory(os.path.dirname(path), os.path.basename(path))
+
+# Caddy serves existing thumbnails itself and only forwards missing ones here
+@app.route(f'/static/mockups/{THUMB_DIR_NAME}/<name>')
+def serve_mockup_thumbnail(name): return serve_thumbnail(MOCKUP_DIR_OUTPUT, name)
+
+@app.route(f'/static/swatches/{THUMB_DIR_NAME}/<name>')
+def serve_swatch_thumbnail(name): return serve_thumbnail(FABRIC_SWATCH_DIR, name)
+
 @app.route('/images/<path:filename>')
 def serve_images(filename):
     # Security: Enforce strict path isolation to prevent traversal attacks
@@ -621,15 +1238,13 @@ def get_admin_fabrics():
         # Parameters
         status_filter = request.args.get('status')
         search_term = request.args.get('search', '').strip()
-        page = request.args.get('page', 1, type=int)
-        page = max(1, page)
         
         # Security: Enforce max limit
         MAX_LIMIT = 100
         limit = request.args.get('limit', 20, type=int)
         limit = max(1, min(limit, MAX_LIMIT))
 
-        query = Fabric.query
+        query = with_owner_names(Fabric.query)
         
         # 1. Apply Status Filter
         if status_filter:
@@ -639,44 +1254,26 @@ def get_admin_fabrics():
             else:
                 query = query.filter_by(status=status_filter)
         
-        # 2. Apply Search
+        # 2. Apply Search (best matches first)
+        # Latest first (ties between matches when searching)
+        keys = [(Fabric.id, True)]
         if search_term:
-            term = f"%{search_term}%"
-            query = query.filter(
-                (Fabric.ref.ilike(term)) |
-                (Fabric.fabrication.ilike(term)) |
-                (Fabric.fabric_group.ilike(term))
-            )
+            search = get_fabric_search()
+            query = search.filter(query, search_term)
+            keys.insert(0, (search.rank(search_term), True))
             
         # 3. Apply Pagination
-        # Use order_by id desc for latest first
-        pagination = query.order_by(Fabric.id.desc()).paginate(page=page, per_page=limit, error_out=False)
-        
-        results = []
-        for f in pagination.items:
-            owner = User.query.get(f.manufacturer_id)
-            owner_name = owner.company_name if owner else "Unknown"
-            
-            # Find image
-            image_filename = f.image_path if hasattr(f, 'image_path') and f.image_path else find_file(FABRIC_SWATCH_DIR, f.ref)
-            swatch_url = f"/static/swatches/{image_filename}" if image_filename else None
-            
-            results.append({
-                "id": f.id, "ref": f.ref, "fabric_group": f.fabric_group,
-                "fabrication": f.fabrication, "gsm": f.gsm, "width": f.width,
-                "composition": f.composition, "status": f.status,
-                "owner_name": owner_name, "manufacturer_id": f.manufacturer_id,
-                "meta_data": f.meta_data or {},
-                "swatchUrl": swatch_url
-            })
-            
-        return jsonify({
-            "results": results,
-            "total": pagination.total,
-            "page": page,
-            "limit": limit,
-            "pages": pagination.pages
-        })
+        scope = scope_digest('admin-fabrics', status_filter, search_term)
+        items, pagination = paginate_listing(
+            query, keys, limit, scope,
+            cursor=request.args.get('cursor'),
+            # Stability: Use Flask's type parameter to safely handle invalid input (prevents 500 errors)
+            page=request.args.get('page', 1, type=int),
+            total=request.args.get('total', '')
+        )
+        return jsonify({"results": fabric_summaries(items), **pagination})
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error fetching admin fabrics: {e}")
         return jsonify({"error": "An unexpected error occurred."}), 500
@@ -687,17 +1284,7 @@ def manage_fabric(fabric_id):
     try:
         fabric = Fabric.query.get_or_404(fabric_id)
         if request.method == 'GET':
-            # Find image
-            image_filename = fabric.image_path if hasattr(fabric, 'image_path') and fabric.image_path else find_file(FABRIC_SWATCH_DIR, fabric.ref)
-            swatch_url = f"/static/swatches/{image_filename}" if image_filename else None
-
-            return jsonify({
-                "id": fabric.id, "ref": fabric.ref, "fabric_group": fabric.fabric_group,
-                "fabrication": fabric.fabrication, "gsm": fabric.gsm, "width": fabric.width,
-                "composition": fabric.composition, "status": fabric.status,
-                "manufacturer_id": fabric.manufacturer_id, "meta_data": fabric.meta_data or {},
-                "swatchUrl": swatch_url
-            })
+            return jsonify(fabric_summary(fabric, owner_names.get(fabric.manufacturer_id)))
         elif request.method == 'PUT':
             data = request.json
             if not data:
@@ -707,11 +1294,16 @@ def manage_fabric(fabric_id):
             if 'meta_data' in data: fabric.meta_data = data['meta_data']
             for field in ['ref', 'fabric_group', 'fabrication', 'gsm', 'width', 'composition']:
                 if field in data: setattr(fabric, field, data[field])
+            if 'ref' in data or not fabric.image_path:
+                # Store the swatch so listings skip the directory-index fallback for this fabric
+                fabric.image_path = find_file(FABRIC_SWATCH_DIR, fabric.ref)
             db.session.commit()
+            invalidate_catalog_cache()
             return jsonify({"success": True, "message": "Fabric updated"})
         elif request.method == 'DELETE':
             db.session.delete(fabric)
             db.session.commit()
+            invalidate_catalog_cache()
             return jsonify({"success": True, "message": "Fabric deleted"})
         else:
             return jsonify({"error": "Method not allowed"}), 405
@@ -778,7 +1370,7 @@ def get_current_user_endpoint():
 @app.route('/api/admin/users', methods=['GET'])
 @admin_required()
 def get_admin_users():
-    """Get all users for admin management, with optional status filter."""
+    """Get users for admin management, newest first, with optional status/role filters and cursor pages."""
     try:
         status_filter = request.args.get('approval_status')
         role_filter = request.args.get('role')
@@ -790,9 +1382,12 @@ def get_admin_users():
         if role_filter:
             query = query.filter_by(role=role_filter)
         
-        users = query.order_by(User.id.desc()).limit(100).all()
+        # Newest first, one keyset page (a cursor continues where the last page ended)
+        limit = max(1, min(request.args.get('limit', 100, type=int), 100))
+        scope = scope_digest('admin-users', status_filter, role_filter)
+        users, next_cursor = keyset_page(query, [(User.id, True)], limit, request.args.get('cursor') or None, scope)
         
-        return jsonify([{
+        results = [{
             "id": u.id,
             "email": u.email,
             "role": u.role,
@@ -800,8 +1395,17 @@ def get_admin_users():
             "approval_status": u.approval_status,
             "is_verified_buyer": u.is_verified_buyer,
             "has_supabase_uid": bool(u.supabase_uid)
-        } for u in users])
+        } for u in users]
+        if 'cursor' in request.args:
+            return jsonify({"results": results, "limit": limit, "next_cursor": next_cursor, "has_more": next_cursor is not None})
+        # Compatibility: the plain list of the newest users, with the next page's cursor in a header
+        response = jsonify(results)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
         
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error fetching users: {e}")
         return jsonify({"error": "An unexpected error occurred."}), 500
@@ -1006,6 +1610,234 @@ def create_admin():
     click.echo(f'\n=== Admin user "{admin_email}" is ready! ===')
     click.echo(f'    Login at: /admin-login')
 
+@app.cli.command('compile-assets')
+@click.option('--force', is_flag=True, help='Recompile views that are already up to date.')
+def compile_assets_command(force):
+    """Precompile every garment view's template and mask into the asset store.
+    
+    Workers memory-map the compiled files instead of decoding templates and
+    masks themselves. Entries for templates that no longer exist are removed.
+    Run again after adding or changing templates or masks; stale entries are
+    ignored until then.
+    """
+    if asset_store is None:
+        click.echo('Error: ASSET_STORE_ENABLED is false.')
+        sys.exit(1)
+    
+    # Compile straight from the source files, not from an existing entry
+    generator = MockupGeneratorV2(
+        fabric_dir=FABRIC_SWATCH_DIR,
+        mockup_dir=MOCKUP_DIR_TEMPLATES,
+        mask_dir=MASK_DIR,
+        output_dir=MOCKUP_DIR_OUTPUT
+    )
+    pairs = []
+    compiled = skipped = failed = 0
+    started = time.perf_counter()
+    for garments in garment_catalog.build().values():
+        for garment in garments:
+            for view_name, mockup_path, mask_path in generator.plan_views(garment['name']) or []:
+                pairs.append((mockup_path, mask_path))
+                if not force and asset_store.is_current(mockup_path, mask_path):
+                    skipped += 1
+                    continue
+                try:
+                    asset_store.write(mockup_path, mask_path, generator.compile_assets(mockup_path, mask_path))
+                    compiled += 1
+                    click.echo(f'  [OK] {view_name}')
+                except Exception as e:
+                    failed += 1
+                    click.echo(f'  [ERROR] {view_name}: {e}')
+    
+    removed = asset_store.prune(pairs)
+    click.echo(
+        f'Compiled {compiled}, up to date {skipped}, failed {failed}, removed {removed} '
+        f'in {time.perf_counter() - started:.1f}s'
+    )
+    if failed:
+        sys.exit(1)
+
+@app.cli.command('pregenerate-mockups')
+@click.option('--garments', default=None,
+              help='Comma-separated garment names (default: PREGENERATE_GARMENTS, or every garment).')
+@click.option('--mode', type=click.Choice(MODES), default='stretch', show_default=True,
+              help='Fabric application mode to render.')
+@click.option('--workers', type=int, default=0, help='Render processes (default: all cores).')
+@click.option('--force', is_flag=True, help='Re-render combinations that are already up to date.')
+def pregenerate_mockups(garments, mode, workers, force):
+    """Render every LIVE fabric against a set of garments ahead of time.
+    
+    Combinations whose outputs are newer than their fabric, template and mask
+    are skipped, so an interrupted run resumes where it stopped when started
+    again. Fabrics are rendered in parallel on all cores.
+    """
+    garments = garments if garments is not None else settings.PREGENERATE_GARMENTS
+    garment_names = [name.strip() for name in garments.split(',') if name.strip()]
+    if not garment_names:
+        garment_names = sorted(
+            garment['name'] for group in garment_catalog.build().values() for garment in group
+        )
+    fabric_refs = []
+    for (ref,) in Fabric.query.filter_by(status='LIVE').order_by(Fabric.id).with_entities(Fabric.ref):
+        if ref and ref not in fabric_refs:
+            fabric_refs.append(ref)
+    if not fabric_refs or not garment_names:
+        click.echo('Nothing to do: no LIVE fabrics or no garments.')
+        return
+    
+    workers = workers or os.cpu_count() or 1
+    executor = RenderExecutor(
+        max_workers=workers,
+        task_timeout=settings.RENDER_TASK_TIMEOUT,
+        asset_cache_bytes=settings.ASSET_CACHE_MAX_MB * 1024 * 1024,
+        max_image_pixels=PILImage.MAX_IMAGE_PIXELS
+    )
+    generator = build_mockup_generator(mode=mode, fabric_refs=fabric_refs, executor=executor)
+    
+    failures = []
+    pending = []
+    for ref in fabric_refs:
+        if not generator.find_file(generator.fabric_dir, ref):
+            failures.append((ref, '*', 'swatch file not found'))
+            continue
+        pending.extend(
+            (ref, name) for name in garment_names
+            if force or not generator.is_up_to_date(ref, name)
+        )
+    total = len(fabric_refs) * len(garment_names)
+    up_to_date = total - len(pending) - len(failures) * len(garment_names)
+    click.echo(
+        f'{len(fabric_refs)} LIVE fabric(s) x {len(garment_names)} garment(s): '
+        f'{up_to_date} up to date, {len(failures)} fabric(s) without a swatch, '
+        f'{len(pending)} to render with {workers} worker(s)'
+    )
+    
+    # Chunks keep every worker busy while progress is reported as the run goes
+    chunk_size = workers * 4 * len(garment_names)
+    done = succeeded = views = 0
+    started = time.perf_counter()
+    try:
+        for offset in range(0, len(pending), chunk_size):
+            chunk = pending[offset:offset + chunk_size]
+            if force:
+                # Stamped outputs count as render cache hits; forget them so they are redrawn
+                for fabric_ref, mockup_name in chunk:
+                    generator.invalidate_cached_mockup(fabric_ref, mockup_name)
+            finished = set()
+            try:
+                for fabric_ref, mockup_name, files in generator.generate_combinations(chunk):
+                    finished.add((fabric_ref, mockup_name))
+                    if files:
+                        succeeded += 1
+                        views += len(files)
+                    elif isinstance(files, RenderFailure):
+                        failures.append((fabric_ref, mockup_name, str(files.error)))
+                    else:
+                        failures.append((fabric_ref, mockup_name, 'render failed or files missing'))
+            except RenderTimeoutError as e:
+                failures.extend((ref, name, str(e)) for ref, name in chunk if (ref, name) not in finished)
+            done += len(chunk)
+            elapsed = time.perf_counter() - started
+            click.echo(
+                f'  [{done}/{len(pending)}] {succeeded} rendered, {len(failures)} failed, '
+                f'{views / elapsed:.1f} views/s'
+            )
+    except KeyboardInterrupt:
+        click.echo('Interrupted; run the command again to resume.')
+    finally:
+        executor.shutdown()
+    
+    elapsed = time.perf_counter() - started
+    click.echo(
+        f'Rendered {succeeded} combination(s) ({views} views) in {elapsed:.1f}s: '
+        f'{succeeded / elapsed if elapsed else 0:.2f} combinations/s, '
+        f'{views / elapsed if elapsed else 0:.2f} views/s. Failed: {len(failures)}'
+    )
+    for fabric_ref, mockup_name, reason in failures[:50]:
+        click.echo(f'  [ERROR] {fabric_ref} / {mockup_name}: {reason}')
+    if len(failures) > 50:
+        click.echo(f'  ... and {len(failures) - 50} more')
+    if failures:
+        sys.exit(1)
+
+@app.cli.command('generate-thumbnails')
+def generate_thumbnails():
+    """Create thumbnails for every swatch and generated mockup.
+    
+    Thumbnails are otherwise created on first request; this fills them in
+    ahead of time, e.g. after a bulk swatch upload or pregenerate-mockups.
+    Up-to-date thumbnails are left alone.
+    """
+    created = failed = 0
+    started = time.perf_counter()
+    for directory in (FABRIC_SWATCH_DIR, MOCKUP_DIR_OUTPUT):
+        for filename in get_directory_index(directory).filenames():
+            if not filename.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
+                continue
+            try:
+                thumbnail_store.ensure_all(directory, filename)
+                created += 1
+            except Exception as e:
+                failed += 1
+                click.echo(f'  [ERROR] {filename}: {e}')
+    click.echo(f'Thumbnails up to date for {created} image(s), failed {failed}, in {time.perf_counter() - started:.1f}s')
+    if failed:
+        sys.exit(1)
+
+@app.cli.command('backfill-image-paths')
+def backfill_image_paths():
+    """Store each fabric's swatch filename in fabrics.image_path.
+    
+    Fabric listings read swatches from image_path and fall back to the
+    directory index without one. This fills it in for fabrics without one
+    and repairs paths whose file no longer exists.
+    """
+    index = get_directory_index(FABRIC_SWATCH_DIR)
+    index.invalidate()
+    existing = set(index.filenames())
+    updated = missing = 0
+    try:
+        for fabric in Fabric.query.order_by(Fabric.id).all():
+            if fabric.image_path in existing:
+                continue
+            image_filename = find_file(FABRIC_SWATCH_DIR, fabric.ref)
+            if image_filename is None:
+                missing += 1
+            if image_filename != fabric.image_path:
+                fabric.image_path = image_filename
+                updated += 1
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f'[ERROR] Backfill failed: {e}')
+        sys.exit(1)
+    if updated:
+        invalidate_catalog_cache()
+    click.echo(f'[OK] Updated image_path for {updated} fabric(s); {missing} fabric(s) have no swatch file')
+
+@app.cli.command('evict-outputs')
+@click.option('--dry-run', is_flag=True, help='Report what would be evicted without deleting anything.')
+def evict_outputs(dry_run):
+    """Trim generated mockups and techpacks to their disk budgets.
+    
+    Deletes the least recently accessed files until each directory is within
+    MOCKUP_OUTPUT_MAX_MB/_MAX_FILES and TECHPACK_OUTPUT_MAX_MB/_MAX_FILES.
+    Server workers run the same pass every OUTPUT_EVICT_INTERVAL seconds.
+    """
+    for label, store in (('mockups', mockup_output_store), ('techpacks', techpack_output_store)):
+        if not store.bounded:
+            click.echo(f'[OK] {label}: no budget configured')
+            continue
+        stats = store.evict(dry_run=dry_run)
+        if stats.skipped:
+            click.echo(f'[ERROR] {label}: another process is evicting {store.directory}')
+            continue
+        verb = 'would evict' if dry_run else 'evicted'
+        click.echo(
+            f'[OK] {label}: {verb} {stats.evicted_files} file(s), {stats.evicted_bytes / 1e6:.1f} MB; '
+            f'{stats.files} file(s), {stats.bytes / 1e6:.1f} MB kept'
+        )
+
 if __name__ == '__main__':
     # Production: Use gunicorn instead: gunicorn -w 4 -b 0.0.0.0:5000 api_server:app
     # This block only runs in development mode
@@ -0,0 +1,132 @@
+"""
+Compiled Asset Cache - per-worker LRU of decoded templates and masks.
+
+Everything derived from a garment view's template and mask (the decoded RGBA
+template, the alpha mask at template resolution and the mask bounding box) is
+independent of the fabric. Compiling it once per worker leaves only the fabric
+decode, resize and composite on the per-request path.
+
+Entries are invalidated when the size or mtime of either source file changes,
+and the cache is bounded by the decoded size of its entries.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+
+class CompiledAsset:
+    """
+    Fabric-independent render inputs for one garment view.
+
+    Attributes:
+        template: Decoded template in 'RGBA' mode (treat as read-only)
+        alpha: Alpha mask in 'L' mode, resized to the template size
+        bbox: Tuple (x, y, width, height) of the WHITE mask area
+        alpha_box: Tuple (x1, y1, x2, y2) of non-zero alpha, or None if empty
+        source: Identity of the source files the asset was compiled from
+        shared: True if the pixels are memory-mapped from a CompiledAssetStore
+                (shared page cache, not process memory)
+    """
+
+    __slots__ = ("template", "alpha", "bbox", "alpha_box", "source", "shared")
+
+    def __init__(self, template, alpha, bbox, alpha_box=None, source=None, shared=False):
+        self.template = template
+        self.alpha = alpha
+        self.bbox = bbox
+        self.alpha_box = alpha_box
+        self.source = source
+        self.shared = shared
+
+    @property
+    def nbytes(self):
+        """Approximate process-private decoded size in bytes (0 when shared)."""
+        if self.shared:
+            return 0
+        width, height = self.template.size
+        return width * height * 4 + self.alpha.size[0] * self.alpha.size[1]
+
+
+def source_identity(*paths):
+    """
+    Returns (path, size, mtime_ns) for each path. Raises OSError if missing.
+    """
+    identity = []
+    for path in paths:
+        st = os.stat(path)
+        identity.append((path, st.st_size, st.st_mtime_ns))
+    return tuple(identity)
+
+
+class CompiledAssetCache:
+    """
+    Memory-bounded LRU of CompiledAsset objects keyed by (template, mask) path
+    and variant.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        """
+        Args:
+            max_bytes: Budget for the decoded size of all cached entries
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (mockup_path, mask_path, variant) -> CompiledAsset
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, mockup_path, mask_path, compile_fn, variant=None):
+        """
+        Returns the compiled asset for a template/mask pair.
+
+        Args:
+            mockup_path: Path to base mockup template
+            mask_path: Path to mask file
+            compile_fn: Callable (mockup_path, mask_path) -> CompiledAsset,
+                        used on a miss or when a source file changed
+            variant: Optional hashable distinguishing derived assets of the
+                     same pair (e.g. a reduced-resolution preview)
+
+        Returns:
+            CompiledAsset
+        """
+        key = (mockup_path, mask_path, variant)
+        identity = source_identity(mockup_path, mask_path)
+
+        with self._lock:
+            asset = self._entries.get(key)
+            if asset is not None and asset.source == identity:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return asset
+            self.misses += 1
+
+        asset = compile_fn(mockup_path, mask_path)
+        asset.source = identity
+
+        with self._lock:
+            self._discard(key)
+            if asset.nbytes <= self.max_bytes:
+                self._entries[key] = asset
+                self._bytes += asset.nbytes
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+        return asset
+
+    def clear(self):
+        """Drops every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def current_bytes(self):
+        return self._bytes
+
+    def _discard(self, key):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
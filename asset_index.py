@@ -0,0 +1,152 @@
+"""
+Asset Index - in-memory, case-insensitive index of asset directories.
+
+Resolving a reference like 'FAB-101' to a file used to probe up to a dozen
+extension/case combinations with os.path.exists and fall back to a full
+directory listing on a miss. On large or network-mounted directories those
+stat storms add up on every render and every search result.
+
+The index lists a directory once and maps each normalized file stem to its
+filenames. Lookups, including misses, are answered from memory. The
+directory's mtime is checked at most once per refresh interval and the
+listing is rebuilt when it changes (files added, removed or renamed), or
+after max_age regardless, for filesystems that don't update directory mtimes
+reliably.
+"""
+
+import os
+import threading
+import time
+import unicodedata
+
+DEFAULT_REFRESH_INTERVAL = 2.0
+DEFAULT_MAX_AGE = 300.0
+
+
+def normalize_stem(name):
+    """Returns the lookup key for a file stem (Unicode NFC, case-folded)."""
+    return unicodedata.normalize("NFC", name).casefold()
+
+
+class AssetDirectoryIndex:
+    """
+    Stem -> filenames index of one directory.
+    """
+
+    def __init__(self, directory, refresh_interval=DEFAULT_REFRESH_INTERVAL, max_age=DEFAULT_MAX_AGE):
+        """
+        Args:
+            directory: Directory to index (need not exist yet)
+            refresh_interval: Minimum seconds between directory mtime checks
+            max_age: Seconds after which the listing is rebuilt even if the
+                     directory mtime did not change
+        """
+        self.directory = directory
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self._stems = {}  # normalized stem -> [filename, ...]
+        self._mtime = None
+        self._checked_at = None
+        self._built_at = None
+        self._lock = threading.Lock()
+        self.generation = 0  # bumped whenever the listing changes
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.refresh_interval:
+            return
+
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.refresh_interval:
+                return
+            try:
+                mtime = os.stat(self.directory).st_mtime_ns
+            except OSError:
+                mtime = None
+            stale = self._built_at is None or now - self._built_at >= self.max_age
+            if mtime != self._mtime or stale:
+                stems = self._scan() if mtime is not None else {}
+                if stems != self._stems:
+                    self._stems = stems
+                    self.generation += 1
+                self._mtime = mtime
+                self._built_at = now
+            self._checked_at = now
+
+    def _scan(self):
+        stems = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith(".") or not entry.is_file():
+                        continue
+                    stem = os.path.splitext(entry.name)[0]
+                    stems.setdefault(normalize_stem(stem), []).append(entry.name)
+        except OSError:
+            return {}
+        for filenames in stems.values():
+            filenames.sort()
+        return stems
+
+    def find(self, name, extensions=None):
+        """
+        Returns the filename matching `name`, or None.
+
+        Preference order: exact stem with an extension from `extensions` (in
+        list order, extension case ignored), then a case-insensitive stem with
+        such an extension. Without `extensions`, any extension matches.
+
+        Args:
+            name: File stem to look up (e.g. a fabric ref)
+            extensions: Optional list of acceptable extensions, e.g. ['.png', '.jpg']
+        """
+        self._refresh()
+        candidates = self._stems.get(normalize_stem(name))
+        if not candidates:
+            return None
+
+        if extensions is None:
+            exact = [f for f in candidates if os.path.splitext(f)[0] == name]
+            return (exact or candidates)[0]
+
+        ranked = []
+        for filename in candidates:
+            stem, ext = os.path.splitext(filename)
+            ext = ext.lower()
+            for rank, wanted in enumerate(extensions):
+                if ext == wanted.lower():
+                    ranked.append((stem != name, rank, filename))
+                    break
+        return min(ranked)[2] if ranked else None
+
+    def filenames(self):
+        """Returns every indexed filename, sorted."""
+        self._refresh()
+        return sorted(f for filenames in self._stems.values() for f in filenames)
+
+    def current_generation(self):
+        """Returns the listing generation after a (throttled) refresh."""
+        self._refresh()
+        return self.generation
+
+    def invalidate(self):
+        """Forces a rescan on the next lookup (e.g. after writing a file)."""
+        with self._lock:
+            self._checked_at = None
+            self._built_at = None
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_directory_index(directory):
+    """
+    Returns the process-wide AssetDirectoryIndex for a directory.
+    """
+    key = os.path.abspath(directory)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = AssetDirectoryIndex(key)
+        return index
@@ -0,0 +1,191 @@
+"""
+Compiled Asset Store - precompiled templates and masks shared through mmap.
+
+CompiledAssetCache keeps decoded templates per process, so every gunicorn
+worker and render process decodes and holds its own copy of the same pixels.
+The store moves that work offline: `flask compile-assets` writes each garment
+view's RGBA template and final alpha plane as raw arrays, plus a manifest
+with the sizes, bboxes and the identity of the source files.
+
+Renderers map those files read-only. The pixels then live in the OS page
+cache once, shared by every process, and loading a template costs an open()
+and an mmap() instead of a decode. Entries whose source template or mask
+changed since compiling are ignored (the renderer falls back to decoding)
+until the next compile.
+
+Layout, one directory per template/mask pair:
+
+    <root>/<sha1 of both paths>/template.rgba   width x height x 4 bytes
+    <root>/<sha1 of both paths>/alpha.l         width x height bytes
+    <root>/<sha1 of both paths>/manifest.json
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import shutil
+import threading
+
+from PIL import Image
+
+from asset_cache import CompiledAsset, source_identity
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+TEMPLATE_NAME = "template.rgba"
+ALPHA_NAME = "alpha.l"
+STORE_VERSION = 1
+
+
+def _map_image(path, mode, size):
+    """Returns a read-only image backed by a memory map of a raw pixel file."""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    width, height = size
+    expected = width * height * len(mode)
+    if len(mapped) != expected:
+        mapped.close()
+        raise ValueError(f"{path} holds {len(mapped)} bytes, expected {expected}")
+    # frombuffer with these raw arguments shares the mapped memory instead of copying it
+    return Image.frombuffer(mode, size, mapped, "raw", mode, 0, 1)
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class CompiledAssetStore:
+    """
+    Directory of precompiled garment views, read through memory maps.
+    """
+
+    def __init__(self, root_dir):
+        """
+        Args:
+            root_dir: Directory holding the compiled entries
+        """
+        self.root_dir = root_dir
+        self._manifests = {}  # entry dir -> (manifest mtime_ns, manifest dict)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Picklable for render worker processes; each maps the files itself
+        return {"root_dir": self.root_dir}
+
+    def __setstate__(self, state):
+        self.__init__(state["root_dir"])
+
+    def entry_dir(self, mockup_path, mask_path):
+        """Returns the directory for a template/mask pair."""
+        key = f"{os.path.abspath(mockup_path)}\0{os.path.abspath(mask_path)}"
+        return os.path.join(self.root_dir, hashlib.sha1(key.encode("utf-8")).hexdigest()[:16])
+
+    def _manifest(self, entry_dir):
+        path = os.path.join(entry_dir, MANIFEST_NAME)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._manifests.get(entry_dir)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._manifests[entry_dir] = (mtime, manifest)
+        return manifest
+
+    @staticmethod
+    def _source(mockup_path, mask_path):
+        return [list(entry) for entry in source_identity(os.path.abspath(mockup_path), os.path.abspath(mask_path))]
+
+    def is_current(self, mockup_path, mask_path):
+        """True if the pair has an entry compiled from the current source files."""
+        manifest = self._manifest(self.entry_dir(mockup_path, mask_path))
+        try:
+            source = self._source(mockup_path, mask_path)
+        except OSError:
+            return False
+        return manifest is not None and manifest.get("version") == STORE_VERSION and manifest["source"] == source
+
+    def load(self, mockup_path, mask_path):
+        """
+        Returns a CompiledAsset backed by read-only memory maps, or None if the
+        pair is not compiled or its source files changed since.
+
+        Raises:
+            OSError: If the template or mask file does not exist
+        """
+        entry_dir = self.entry_dir(mockup_path, mask_path)
+        manifest = self._manifest(entry_dir)
+        source = self._source(mockup_path, mask_path)
+        if manifest is None or manifest.get("version") != STORE_VERSION or manifest["source"] != source:
+            return None
+        try:
+            size = tuple(manifest["size"])
+            template = _map_image(os.path.join(entry_dir, TEMPLATE_NAME), "RGBA", size)
+            alpha = _map_image(os.path.join(entry_dir, ALPHA_NAME), "L", size)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Compiled asset store: unusable entry {entry_dir}: {e}")
+            return None
+        alpha_box = tuple(manifest["alpha_box"]) if manifest["alpha_box"] else None
+        return CompiledAsset(template, alpha, tuple(manifest["bbox"]), alpha_box=alpha_box, shared=True)
+
+    def write(self, mockup_path, mask_path, asset):
+        """
+        Stores a compiled asset for a template/mask pair. Readers see either the
+        previous entry or the new one: the manifest is replaced last.
+
+        Args:
+            mockup_path: Path to base mockup template
+            mask_path: Path to mask file
+            asset: CompiledAsset from MockupGeneratorV2.compile_assets()
+        """
+        source = self._source(mockup_path, mask_path)
+        entry_dir = self.entry_dir(mockup_path, mask_path)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        # Processes that mapped the previous files keep them until they unmap
+        _write_atomic(os.path.join(entry_dir, TEMPLATE_NAME), asset.template.tobytes())
+        _write_atomic(os.path.join(entry_dir, ALPHA_NAME), asset.alpha.tobytes())
+        manifest = {
+            "version": STORE_VERSION,
+            "source": source,
+            "size": list(asset.template.size),
+            "bbox": list(asset.bbox),
+            "alpha_box": list(asset.alpha_box) if asset.alpha_box else None,
+        }
+        _write_atomic(os.path.join(entry_dir, MANIFEST_NAME), json.dumps(manifest).encode("utf-8"))
+
+    def prune(self, keep):
+        """
+        Removes entries for template/mask pairs not in `keep`.
+
+        Args:
+            keep: Iterable of (mockup_path, mask_path) pairs to keep
+
+        Returns:
+            Number of entries removed
+        """
+        wanted = {os.path.basename(self.entry_dir(*pair)) for pair in keep}
+        try:
+            names = os.listdir(self.root_dir)
+        except OSError:
+            return 0
+        removed = 0
+        for name in names:
+            path = os.path.join(self.root_dir, name)
+            if name not in wanted and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        return removed
@@ -0,0 +1,308 @@
+"""
+Render Benchmark - times MockupGeneratorV2 on synthetic inputs.
+
+Generates synthetic swatches, garment templates and masks at several sizes
+and mask coverage ratios. Inputs are written by the parent process; each
+case is then rendered in a fresh process, and the script records:
+- per-stage timings: resolve, load_assets (decode_template, bbox, mask when
+  compiled), decode_fabric, resize, composite, encode
+- generate_mockup and apply_fabric_to_mockup totals
+- peak RSS of the rendering process (input generation is not included)
+
+Results are written as JSON and can be compared against a stored baseline.
+
+Usage (from the project root):
+    python benchmarks/render_benchmark.py --output bench.json
+    python benchmarks/render_benchmark.py --sizes 1,4 --engines pillow,numpy --repeat 5
+    python benchmarks/render_benchmark.py --baseline bench.json --output new.json
+
+Comparing against a baseline exits with status 1 if any case's median
+generate_mockup time regresses by more than --tolerance (default 10%).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_SIZES = "1,4,16,60"
+DEFAULT_COVERAGES = "0.25,0.6"
+# Templates are portrait 4:5, like typical garment templates
+TEMPLATE_ASPECT = 4 / 5
+# Swatches are scanned at roughly a third of the template's pixel count
+SWATCH_AREA_RATIO = 1 / 3
+GARMENT = "bench garment"
+FABRIC_REF = "BENCH-SWATCH"
+
+
+def dimensions(megapixels, aspect):
+    """Returns (width, height) with the given pixel count and width/height aspect."""
+    height = int(round((megapixels * 1_000_000 / aspect) ** 0.5))
+    return max(1, int(round(height * aspect))), max(1, height)
+
+
+def make_inputs(workdir, megapixels, coverage, seed=0):
+    """
+    Writes a synthetic swatch, template and mask for one case.
+
+    The template is a light garment shape on a transparent background and
+    the mask is a white ellipse covering `coverage` of the template area.
+
+    Returns:
+        (fabric_dir, mockup_dir, mask_dir)
+    """
+    fabric_dir = os.path.join(workdir, "fabrics")
+    mockup_dir = os.path.join(workdir, "mockups")
+    mask_dir = os.path.join(workdir, "masks")
+    for directory in (fabric_dir, mockup_dir, mask_dir):
+        os.makedirs(directory, exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+
+    # Swatch: woven-looking stripes plus noise so encoders can't cheat
+    swatch_w, swatch_h = dimensions(megapixels * SWATCH_AREA_RATIO, 1.0)
+    y, x = np.mgrid[0:swatch_h, 0:swatch_w]
+    pattern = np.stack([
+        128 + 100 * np.sin(x / 17.0),
+        128 + 100 * np.sin(y / 23.0),
+        128 + 60 * np.sin((x + y) / 31.0),
+    ], axis=-1)
+    pattern += rng.normal(0, 12, pattern.shape)
+    Image.fromarray(np.clip(pattern, 0, 255).astype(np.uint8), "RGB").save(
+        os.path.join(fabric_dir, f"{FABRIC_REF}.jpg"), "JPEG", quality=92
+    )
+    del pattern, x, y
+
+    # Template: garment silhouette on transparent background
+    width, height = dimensions(megapixels, TEMPLATE_ASPECT)
+    template = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(template)
+    draw.rectangle([width * 0.1, height * 0.05, width * 0.9, height * 0.95], fill=(235, 235, 235, 255))
+    template.save(os.path.join(mockup_dir, f"{GARMENT}.png"), "PNG", compress_level=1)
+
+    # Mask: white ellipse whose area is `coverage` of the template
+    scale = (coverage * 4 / np.pi) ** 0.5
+    rx, ry = width * scale / 2, height * scale / 2
+    cx, cy = width / 2, height / 2
+    mask = Image.new("L", (width, height), 0)
+    ImageDraw.Draw(mask).ellipse([cx - rx, cy - ry, cx + rx, cy + ry], fill=255)
+    mask.save(os.path.join(mask_dir, f"{GARMENT}_mask.png"), "PNG", compress_level=1)
+
+    return fabric_dir, mockup_dir, mask_dir
+
+
+def peak_rss_mb():
+    """Returns the peak resident set size of this process in MB, or None."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(samples):
+    """Returns median/min/max of a list of seconds."""
+    return {
+        "median": round(statistics.median(samples), 6),
+        "min": round(min(samples), 6),
+        "max": round(max(samples), 6),
+    }
+
+
+def run_case(case, input_dirs, output_dir, repeat, warm):
+    """
+    Renders one case `repeat` times and returns its result record.
+    Runs in its own process so peak RSS belongs to this case's renders alone;
+    the inputs were generated beforehand by the parent (make_inputs).
+    """
+    from asset_cache import CompiledAssetCache
+    from mockup_library import MockupGeneratorV2
+
+    Image.MAX_IMAGE_PIXELS = None
+    fabric_dir, mockup_dir, mask_dir = input_dirs
+
+    stages = {}  # stage -> per-iteration seconds of generate_mockup
+    current = {}
+
+    def observe(kind, name, value):
+        if kind == "stage":
+            current[name] = current.get(name, 0.0) + value
+
+    # A warm asset cache measures the steady state of a long-running worker
+    asset_cache = CompiledAssetCache(4 * 1024 ** 3) if warm else None
+    generator = MockupGeneratorV2(
+        fabric_dir, mockup_dir, mask_dir, output_dir,
+        asset_cache=asset_cache, engine=case["engine"], observer=observe
+    )
+
+    totals = {"generate_mockup": [], "apply_fabric_to_mockup": []}
+    if warm:
+        generator.load_compiled_assets(
+            os.path.join(mockup_dir, f"{GARMENT}.png"),
+            os.path.join(mask_dir, f"{GARMENT}_mask.png")
+        )
+    for _ in range(repeat):
+        current.clear()
+        started = time.perf_counter()
+        files = generator.generate_mockup(FABRIC_REF, GARMENT)
+        totals["generate_mockup"].append(time.perf_counter() - started)
+        if not files:
+            raise RuntimeError(f"Render failed for case {case['name']}")
+        for stage, seconds in current.items():
+            stages.setdefault(stage, []).append(seconds)
+
+        started = time.perf_counter()
+        generator.apply_fabric_to_mockup(
+            os.path.join(fabric_dir, f"{FABRIC_REF}.jpg"),
+            os.path.join(mockup_dir, f"{GARMENT}.png"),
+            os.path.join(mask_dir, f"{GARMENT}_mask.png"),
+            os.path.join(output_dir, "apply.png")
+        )
+        totals["apply_fabric_to_mockup"].append(time.perf_counter() - started)
+
+    output_bytes = os.path.getsize(files[0])
+    return {
+        **case,
+        "repeat": repeat,
+        "warm_asset_cache": warm,
+        "totals": {name: summarize(samples) for name, samples in totals.items()},
+        "stages": {name: summarize(samples) for name, samples in stages.items()},
+        "output_bytes": output_bytes,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def build_cases(sizes, coverages, engines):
+    cases = []
+    for megapixels in sizes:
+        for coverage in coverages:
+            for engine in engines:
+                cases.append({
+                    "name": f"{megapixels:g}MP-cov{coverage:g}-{engine}",
+                    "megapixels": megapixels,
+                    "coverage": coverage,
+                    "engine": engine,
+                })
+    return cases
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares median generate_mockup times against a baseline.
+
+    Returns:
+        (lines, regressed) - report lines and whether any case regressed
+    """
+    previous = {record["name"]: record for record in baseline.get("results", [])}
+    lines = []
+    regressed = False
+    for record in results:
+        base = previous.get(record["name"])
+        if base is None:
+            lines.append(f"{record['name']:<28} (not in baseline)")
+            continue
+        old = base["totals"]["generate_mockup"]["median"]
+        new = record["totals"]["generate_mockup"]["median"]
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > tolerance:
+            flag = "  REGRESSION"
+            regressed = True
+        elif change < -tolerance:
+            flag = "  faster"
+        lines.append(f"{record['name']:<28} {old * 1000:9.1f} ms -> {new * 1000:9.1f} ms ({change:+.1%}){flag}")
+        for stage, summary in sorted(record["stages"].items()):
+            old_stage = base.get("stages", {}).get(stage)
+            if old_stage:
+                lines.append(f"    {stage:<24} {old_stage['median'] * 1000:9.1f} ms -> {summary['median'] * 1000:9.1f} ms")
+    return lines, regressed
+
+
+def parse_list(value, cast):
+    return [cast(item) for item in value.split(",") if item.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark MockupGeneratorV2 on synthetic inputs.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Template sizes in megapixels (comma-separated)")
+    parser.add_argument("--coverages", default=DEFAULT_COVERAGES, help="Mask area / template area ratios")
+    parser.add_argument("--engines", default="pillow", help="Compositing engines to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Renders per case")
+    parser.add_argument("--cold", action="store_true", help="Don't pre-compile templates/masks (no asset cache)")
+    parser.add_argument("--output", help="Write results JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a previous results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown vs baseline (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    cases = build_cases(
+        parse_list(args.sizes, float), parse_list(args.coverages, float), parse_list(args.engines, str)
+    )
+    # Spawned processes start clean, so each case's peak RSS is its own
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        for case in cases:
+            # Inputs are generated here, so their arrays don't count towards the case's RSS
+            workdir = tempfile.mkdtemp(prefix="render-bench-")
+            try:
+                input_dirs = make_inputs(workdir, case["megapixels"], case["coverage"])
+                record = pool.apply(
+                    run_case, (case, input_dirs, os.path.join(workdir, "out"), args.repeat, not args.cold)
+                )
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            results.append(record)
+            stages = "  ".join(f"{name}={s['median'] * 1000:.0f}ms" for name, s in sorted(record["stages"].items()))
+            print(f"{record['name']:<28} generate={record['totals']['generate_mockup']['median'] * 1000:8.1f} ms  "
+                  f"rss={record['peak_rss_mb']} MB  {stages}", flush=True)
+
+    import PIL
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+            "warm_asset_cache": not args.cold,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        lines, regressed = compare(results, baseline, args.tolerance)
+        print("\nComparison with baseline:")
+        print("\n".join(lines))
+        if regressed:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
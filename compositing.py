@@ -0,0 +1,122 @@
+"""
+Compositing Engines - blend a stretched fabric onto a garment template.
+
+Two interchangeable engines are provided:
+
+- 'pillow': the original path. Builds a full-canvas fabric layer, applies the
+  alpha mask with putalpha() and runs Image.alpha_composite() over the whole
+  template.
+- 'numpy':  blends only inside the region where the alpha mask is non-zero, in
+  a single vectorized pass that writes straight into the output buffer. Output
+  matches the Pillow engine within +/-1 per channel.
+
+Both engines take the same inputs and never modify the template in place.
+"""
+
+import numpy as np
+from PIL import Image
+
+ENGINES = ("pillow", "numpy")
+
+# Fabric colour under the mask outside the pasted fabric (matches the Pillow
+# engine, whose fabric layer starts out as transparent white)
+_LAYER_FILL = 255.0
+
+
+def composite_pillow(template, alpha, fabric, position, alpha_box=None):
+    """
+    Composites fabric onto the template with full-canvas Pillow operations.
+
+    Args:
+        template: Template image in 'RGBA' mode
+        alpha: Alpha mask in 'L' mode at template size (WHITE = fabric visible)
+        fabric: Fabric already stretched to the mask bbox ('RGB' or 'RGBA')
+        position: (x, y) where the fabric is placed on the template
+        alpha_box: Unused, accepted for signature compatibility
+
+    Returns:
+        New 'RGBA' image
+    """
+    # Create a temporary image the size of the mockup to hold the fabric
+    fabric_layer = Image.new('RGBA', template.size, (255, 255, 255, 0))
+    fabric_layer.paste(fabric, position)
+
+    # Apply the alpha mask to the fabric layer
+    fabric_layer.putalpha(alpha)
+
+    # Composite fabric layer over mockup base
+    return Image.alpha_composite(template, fabric_layer)
+
+
+def composite_numpy(template, alpha, fabric, position, alpha_box=None):
+    """
+    Composites fabric onto the template, touching only the masked region.
+
+    Args:
+        template: Template image in 'RGBA' mode
+        alpha: Alpha mask in 'L' mode at template size (WHITE = fabric visible)
+        fabric: Fabric already stretched to the mask bbox ('RGB' or 'RGBA')
+        position: (x, y) where the fabric is placed on the template
+        alpha_box: (x1, y1, x2, y2) of non-zero alpha, as from alpha.getbbox().
+                   Computed here if not supplied.
+
+    Returns:
+        New 'RGBA' image
+    """
+    if alpha_box is None:
+        alpha_box = alpha.getbbox()
+
+    out = np.array(template, dtype=np.uint8)
+    if alpha_box is None:
+        # Mask is fully transparent: nothing to blend
+        return Image.fromarray(out, 'RGBA')
+
+    x1, y1, x2, y2 = alpha_box
+    region = out[y1:y2, x1:x2]
+
+    src_a = np.asarray(alpha.crop(alpha_box), dtype=np.float32) * (1.0 / 255.0)
+
+    # Source colour: fabric where it was placed, white elsewhere under the mask
+    src_rgb = np.full(region.shape[:2] + (3,), _LAYER_FILL, dtype=np.float32)
+    fx, fy = position
+    fw, fh = fabric.size
+    ox1, oy1 = max(x1, fx), max(y1, fy)
+    ox2, oy2 = min(x2, fx + fw), min(y2, fy + fh)
+    if ox1 < ox2 and oy1 < oy2:
+        fabric_crop = fabric.crop((ox1 - fx, oy1 - fy, ox2 - fx, oy2 - fy))
+        if fabric_crop.mode != 'RGB':
+            fabric_crop = fabric_crop.convert('RGB')
+        src_rgb[oy1 - y1:oy2 - y1, ox1 - x1:ox2 - x1] = np.asarray(fabric_crop, dtype=np.float32)
+
+    # Porter-Duff "over": out_a = sa + da * (1 - sa)
+    dst_a = region[..., 3].astype(np.float32) * (1.0 / 255.0)
+    dst_weight = dst_a * (1.0 - src_a)
+    out_a = src_a + dst_weight
+
+    visible = src_a > 0
+    safe_a = np.where(visible, out_a, 1.0)
+    blended = (
+        src_rgb * src_a[..., None] + region[..., :3].astype(np.float32) * dst_weight[..., None]
+    ) / safe_a[..., None]
+    # Float temporaries are 4 bytes per channel: drop them as soon as possible
+    del src_rgb, dst_a, dst_weight, safe_a
+
+    region[..., :3] = np.where(visible[..., None], np.rint(blended), region[..., :3]).astype(np.uint8)
+    del blended
+    region[..., 3] = np.where(visible, np.rint(out_a * 255.0), region[..., 3]).astype(np.uint8)
+
+    return Image.fromarray(out, 'RGBA')
+
+
+def composite(engine, template, alpha, fabric, position, alpha_box=None):
+    """
+    Dispatches to the named compositing engine.
+
+    Raises:
+        ValueError: If the engine name is unknown
+    """
+    if engine == "numpy":
+        return composite_numpy(template, alpha, fabric, position, alpha_box)
+    if engine == "pillow":
+        return composite_pillow(template, alpha, fabric, position, alpha_box)
+    raise ValueError(f"Unknown compositing engine '{engine}'. Expected one of {ENGINES}")
@@ -54,6 +54,44 @@ class Settings(BaseSettings):
     DEFAULT_FABRIC_RESOLUTION_HEIGHT: int = Field(default=2000, description="Default fabric image height in pixels")
     OUTPUT_FORMAT: str = Field(default="PNG", description="Default output image format")
     OUTPUT_QUALITY: int = Field(default=95, ge=1, le=100, description="Output image quality (1-100)")
+    PNG_COMPRESS_LEVEL: int = Field(default=3, ge=0, le=9, description="zlib level for PNG mockups (0-9; lower encodes faster)")
+    OUTPUT_LOSSLESS_WEBP: bool = Field(default=False, description="Write lossless WebP instead of PNG for mockups that need transparency")
+    THUMBNAIL_WIDTHS: str = Field(default="256,512,1024", description="Comma-separated widths of swatch/mockup thumbnails")
+    THUMBNAIL_FORMAT: str = Field(default="WEBP", description="Thumbnail format: WEBP or JPEG")
+    THUMBNAIL_QUALITY: int = Field(default=80, ge=1, le=100, description="Thumbnail quality (1-100)")
+    
+    # ===== Render Performance =====
+    RENDER_ENGINE: str = Field(default="pillow", description="Compositing engine: 'pillow' (full canvas) or 'numpy' (mask region only)")
+    ASSET_CACHE_MAX_MB: int = Field(default=256, ge=0, description="Per-worker memory budget for compiled templates/masks (MB)")
+    RENDER_WORKERS: int = Field(default=2, ge=0, description="Render processes per server worker (0 = render in the request thread)")
+    RENDER_TASK_TIMEOUT: int = Field(default=90, ge=1, description="Seconds a single garment view may take to render")
+    MOCKUP_BATCH_TIME_LIMIT: int = Field(default=90, ge=1, description="Seconds a batch request may render before remaining combinations are reported unfinished (keep below gunicorn --timeout)")
+    RENDER_DECODE_BUDGET_MB: int = Field(default=512, ge=0, description="Memory a render may use to decode one fabric, checked before decoding (MB, 0 = no limit). Covers the fabric decode only, not templates, masks or working canvases")
+    SWATCH_PYRAMID_ENABLED: bool = Field(default=True, description="Decode fabrics from downscaled swatch levels when large enough")
+    SWATCH_PYRAMID_DIR: str = Field(default="swatch_pyramids", description="Directory for downscaled swatch levels")
+    ASSET_STORE_ENABLED: bool = Field(default=True, description="Memory-map templates/masks precompiled with 'flask compile-assets'")
+    ASSET_STORE_DIR: str = Field(default="compiled_assets", description="Directory for precompiled templates/masks")
+    PREVIEW_MAX_SIZE: int = Field(default=512, ge=64, description="Longer side of quality=preview mockups in pixels")
+    PREGENERATE_GARMENTS: str = Field(default="", description="Comma-separated garments 'flask pregenerate-mockups' renders (empty = all)")
+    MOCKUP_OUTPUT_MAX_MB: int = Field(default=4096, ge=0, description="Disk budget for generated mockups; least recently accessed are evicted (MB, 0 = no limit)")
+    MOCKUP_OUTPUT_MAX_FILES: int = Field(default=20000, ge=0, description="File budget for generated mockups (0 = no limit)")
+    TECHPACK_OUTPUT_MAX_MB: int = Field(default=1024, ge=0, description="Disk budget for generated techpacks (MB, 0 = no limit)")
+    TECHPACK_OUTPUT_MAX_FILES: int = Field(default=5000, ge=0, description="File budget for generated techpacks (0 = no limit)")
+    OUTPUT_PROTECT_SECONDS: int = Field(default=600, ge=0, description="Generated files accessed this recently are never evicted")
+    OUTPUT_EVICT_INTERVAL: int = Field(default=300, ge=0, description="Seconds between background eviction passes (0 = only 'flask evict-outputs')")
+    MOCKUP_JOB_DB: str = Field(default="instance/mockup_jobs.sqlite3", description="SQLite file backing the async mockup job queue")
+    MOCKUP_JOB_THREADS: int = Field(default=1, ge=0, description="Job runner threads per server worker (0 = don't run jobs in this process)")
+    QUERY_CACHE_BACKEND: str = Field(default="memory", description="Catalog query result cache: 'memory' (per worker), 'sqlite' (shared by workers) or 'none'")
+    QUERY_CACHE_TTL: int = Field(default=60, ge=0, description="Seconds a cached catalog query result is served as fresh")
+    QUERY_CACHE_STALE_TTL: int = Field(default=300, ge=0, description="Further seconds a result is served while it is refreshed in the background")
+    QUERY_CACHE_MAX_ENTRIES: int = Field(default=1024, ge=1, description="Cached catalog query results kept")
+    QUERY_CACHE_DB: str = Field(default="instance/query_cache.sqlite3", description="SQLite file for QUERY_CACHE_BACKEND=sqlite")
+    CATALOG_VERSION_FILE: str = Field(default="instance/catalog.version", description="File whose version stamp invalidates cached catalog queries on every worker")
+    METRICS_ENABLED: bool = Field(default=True, description="Expose Prometheus metrics on /metrics")
+    METRICS_DIR: str = Field(default="instance/metrics", description="Directory where server workers share metrics snapshots")
+    TILE_DEFAULT_REPEAT_CM: float = Field(default=10.0, gt=0, description="Physical width (cm) of a swatch without repeat_width_cm in its metadata")
+    TEMPLATE_PX_PER_CM: float = Field(default=20.0, gt=0, description="Template pixels per cm for templates missing from the calibration file")
+    TEMPLATE_CALIBRATION_FILE: str = Field(default="template_calibration.json", description="JSON file mapping template names to pixels per cm")
     
     # ===== Techpack Coordinates (for PDF generation) =====
     TECHPACK_TOTAL_TEMPLATE_WIDTH_PX: int = Field(default=2480, description="Total techpack template width in pixels")
@@ -90,6 +128,47 @@ class Settings(BaseSettings):
             raise ValueError(f"OUTPUT_FORMAT must be one of {allowed}")
         return v.upper()
     
+    @field_validator("THUMBNAIL_FORMAT")
+    @classmethod
+    def validate_thumbnail_format(cls, v: str) -> str:
+        """Validate thumbnail format is supported."""
+        allowed = ["WEBP", "JPEG"]
+        if v.upper() not in allowed:
+            raise ValueError(f"THUMBNAIL_FORMAT must be one of {allowed}")
+        return v.upper()
+    
+    @field_validator("QUERY_CACHE_BACKEND")
+    @classmethod
+    def validate_query_cache_backend(cls, v: str) -> str:
+        """Validate query cache backend is supported."""
+        allowed = ["memory", "sqlite", "none"]
+        if v.lower() not in allowed:
+            raise ValueError(f"QUERY_CACHE_BACKEND must be one of {allowed}")
+        return v.lower()
+    
+    @field_validator("THUMBNAIL_WIDTHS")
+    @classmethod
+    def validate_thumbnail_widths(cls, v: str) -> str:
+        """Validate thumbnail widths are positive integers."""
+        widths = [w.strip() for w in v.split(",") if w.strip()]
+        if not widths or not all(w.isdigit() and 16 <= int(w) <= 4096 for w in widths):
+            raise ValueError("THUMBNAIL_WIDTHS must be comma-separated widths between 16 and 4096")
+        return ",".join(widths)
+    
+    @field_validator("RENDER_ENGINE")
+    @classmethod
+    def validate_render_engine(cls, v: str) -> str:
+        """Validate compositing engine is supported."""
+        allowed = ["pillow", "numpy"]
+        if v.lower() not in allowed:
+            raise ValueError(f"RENDER_ENGINE must be one of {allowed}")
+        return v.lower()
+    
+    @property
+    def thumbnail_widths(self) -> list:
+        """Thumbnail widths as integers."""
+        return [int(w) for w in self.THUMBNAIL_WIDTHS.split(",")]
+    
     @property
     def project_root_path(self) -> Path:
         """Get PROJECT_ROOT as Path object."""
@@ -167,6 +246,62 @@ class Settings(BaseSettings):
             return path
         return self.project_root_path / path
     
+    @property
+    def swatch_pyramid_dir_path(self) -> Path:
+        """Get absolute path to swatch pyramid directory."""
+        path = Path(self.SWATCH_PYRAMID_DIR)
+        if path.is_absolute():
+            return path
+        return self.project_root_path / path
+    
+    @property
+    def asset_store_dir_path(self) -> Path:
+        """Get absolute path to the precompiled template/mask directory."""
+        path = Path(self.ASSET_STORE_DIR)
+        if path.is_absolute():
+            return path
+        return self.project_root_path / path
+    
+    @property
+    def mockup_job_db_path(self) -> Path:
+        """Get absolute path to the mockup job queue database."""
+        path = Path(self.MOCKUP_JOB_DB)
+        if path.is_absolute():
+            return path
+        return self.project_root_path / path
+    
+    @property
+    def query_cache_db_path(self) -> Path:
+        """Get absolute path to the shared query cache database."""
+        path = Path(self.QUERY_CACHE_DB)
+        if path.is_absolute():
+            return path
+        return self.project_root_path / path
+    
+    @property
+    def catalog_version_path(self) -> Path:
+        """Get absolute path to the catalog version stamp file."""
+        path = Path(self.CATALOG_VERSION_FILE)
+        if path.is_absolute():
+            return path
+        return self.project_root_path / path
+    
+    @property
+    def metrics_dir_path(self) -> Path:
+        """Get absolute path to the shared metrics snapshot directory."""
+        path = Path(self.METRICS_DIR)
+        if path.is_absolute():
+            return path
+        return self.project_root_path / path
+    
+    @property
+    def template_calibration_path(self) -> Path:
+        """Get absolute path to the template pixels-per-cm calibration file."""
+        path = Path(self.TEMPLATE_CALIBRATION_FILE)
+        if path.is_absolute():
+            return path
+        return self.project_root_path / path
+    
     @property
     def database_path(self) -> Path:
         """Get absolute path to fabric database file."""
@@ -217,6 +352,8 @@ class Settings(BaseSettings):
             self.mask_dir_path,
             self.excel_dir_path,
             self.techpack_template_dir_path,
+            self.swatch_pyramid_dir_path,
+            self.asset_store_dir_path,
         ]
         
         for directory in directories:
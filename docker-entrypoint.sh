@@ -12,7 +12,7 @@ if [ -z "$SUPABASE_URL" ] || [ -z "$SUPABASE_SERVICE_ROLE_KEY" ]; then
     exit 1
 fi
 
-echo "[1/3] Verifying Supabase connection..."
+echo "[1/5] Verifying Supabase connection..."
 # Test Supabase connection by checking if we can access the API
 if ! python -c "from supabase import create_client; import os; client = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_ROLE_KEY')); print('Supabase connection OK')" 2>/dev/null; then
     echo "  WARNING: Could not verify Supabase connection"
@@ -23,15 +23,16 @@ fi
 
 # Note: Database schema should be set up via Supabase SQL Editor
 # Run supabase_setup_complete.sql and supabase_security_fixes.sql in Supabase Dashboard
-echo "[2/3] Database setup..."
+echo "[2/5] Database setup..."
 echo "  NOTE: Database schema should be set up via Supabase SQL Editor"
 echo "  Run these files in Supabase Dashboard → SQL Editor:"
 echo "    - supabase_setup_complete.sql"
 echo "    - supabase_security_fixes.sql"
+echo "  Then apply app migrations (fabric search indexes): flask --app api_server db upgrade"
 echo "  Skipping local database initialization (using Supabase)"
 
 # Create admin user if it doesn't exist (for admin login)
-echo "[3/3] Creating admin user (if needed)..."
+echo "[3/5] Creating admin user (if needed)..."
 python -c "
 from api_server import app, db
 from models import User
@@ -62,6 +63,15 @@ with app.app_context():
             print(f'  Admin user already exists: {admin_email}')
 " || echo "  Admin user creation skipped (may already exist or error occurred)"
 
+# Precompile templates/masks so workers memory-map them instead of decoding
+echo "[4/5] Compiling garment templates..."
+flask --app api_server compile-assets || echo "  Template compilation failed; affected views will be decoded at render time"
+
+# Listings read swatch filenames from image_path; fabrics without one fall back
+# to a lookup in the in-memory swatch directory index
+echo "[5/5] Recording swatch paths..."
+flask --app api_server backfill-image-paths || echo "  Swatch path backfill failed; fabrics without image_path are resolved from the swatch directory index"
+
 echo "========================================"
 echo "Starting Gunicorn server..."
 echo "========================================"
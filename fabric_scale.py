@@ -0,0 +1,150 @@
+"""
+Fabric Scale - physical sizing for tile-to-scale mockups.
+
+Stretch-to-fit blows a swatch up to the whole garment, so the print scale on
+the mockup says nothing about the real fabric. Tile mode instead repeats the
+swatch at its physical size:
+
+    tile width (px) = repeat width (cm) x template pixels per cm
+
+- The repeat width comes from the fabric's meta_data ('repeat_width_cm', or
+  'repeat_width' / 'swatch_width' with units such as '10 cm' or '4"'),
+  falling back to a configured default.
+- Pixels per cm come from a per-template calibration JSON file, e.g.
+  {"men polo_face": 21.5, "Ladies Hoodie": 18}, falling back to a default.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+
+from asset_index import normalize_stem
+
+logger = logging.getLogger(__name__)
+
+MIN_TILE_PX = 8
+
+_UNIT_CM = {"cm": 1.0, "mm": 0.1, "m": 100.0, "in": 2.54, "inch": 2.54, "inches": 2.54, '"': 2.54}
+_LENGTH_RE = re.compile(r'^\s*([0-9]+(?:\.[0-9]+)?)\s*(cm|mm|m|inches|inch|in|")?\s*$', re.IGNORECASE)
+
+_calibration_cache = {}  # path -> (mtime_ns, {normalized stem: px_per_cm})
+_calibration_lock = threading.Lock()
+
+
+def parse_length_cm(value, default_unit="cm"):
+    """
+    Parses a length such as 12, '12.5', '64 cm', '25"' or '10in' to centimetres.
+
+    Returns:
+        Length in cm, or None if the value is missing or not understood
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) * _UNIT_CM[default_unit] if value > 0 else None
+    match = _LENGTH_RE.match(str(value))
+    if not match:
+        return None
+    length = float(match.group(1)) * _UNIT_CM[(match.group(2) or default_unit).lower()]
+    return length if length > 0 else None
+
+
+def fabric_repeat_width_cm(meta_data):
+    """
+    Returns the physical width in cm that one swatch image covers, or None.
+
+    Args:
+        meta_data: Fabric.meta_data dict (may be None)
+    """
+    if not isinstance(meta_data, dict):
+        return None
+    for key in ("repeat_width_cm", "repeat_width", "swatch_width_cm", "swatch_width"):
+        length = parse_length_cm(meta_data.get(key))
+        if length:
+            return length
+    return None
+
+
+def load_template_calibration(path):
+    """
+    Loads a template calibration file ({template name: pixels per cm}).
+    Cached until the file changes; a missing or invalid file yields {}.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return {}
+
+    with _calibration_lock:
+        cached = _calibration_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        calibration = {
+            normalize_stem(str(name)): float(px_per_cm)
+            for name, px_per_cm in raw.items()
+            if float(px_per_cm) > 0
+        }
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+        logger.warning(f"Ignoring invalid template calibration file {path}: {e}")
+        calibration = {}
+
+    with _calibration_lock:
+        _calibration_cache[path] = (mtime, calibration)
+    return calibration
+
+
+class TileScale:
+    """
+    Repeat widths per fabric and pixels-per-cm per template (picklable).
+    """
+
+    def __init__(self, repeats=None, default_repeat_cm=10.0, calibration=None, default_px_per_cm=20.0):
+        """
+        Args:
+            repeats: Dict of fabric ref -> repeat width in cm
+            default_repeat_cm: Repeat width for fabrics without one
+            calibration: Dict of template name -> pixels per cm at full resolution
+            default_px_per_cm: Pixels per cm for uncalibrated templates
+        """
+        self.repeats = {normalize_stem(ref): cm for ref, cm in (repeats or {}).items()}
+        self.default_repeat_cm = default_repeat_cm
+        self.calibration = {normalize_stem(name): v for name, v in (calibration or {}).items()}
+        self.default_px_per_cm = default_px_per_cm
+
+    @staticmethod
+    def _stem(path):
+        return normalize_stem(os.path.splitext(os.path.basename(path))[0])
+
+    def repeat_cm(self, fabric_path):
+        """Returns the repeat width in cm for a fabric file."""
+        return self.repeats.get(self._stem(fabric_path), self.default_repeat_cm)
+
+    def px_per_cm(self, mockup_path):
+        """Returns the full-resolution pixels per cm for a template file."""
+        return self.calibration.get(self._stem(mockup_path), self.default_px_per_cm)
+
+    def params(self, fabric_path, mockup_path):
+        """Returns the values that affect a tiled render (for cache keys)."""
+        return {"repeat_cm": self.repeat_cm(fabric_path), "px_per_cm": self.px_per_cm(mockup_path)}
+
+    def tile_size(self, fabric_size, fabric_path, mockup_path, scale=1.0):
+        """
+        Returns the (width, height) in pixels of one repeat on the template.
+
+        Args:
+            fabric_size: (width, height) of the swatch image, for its aspect ratio
+            fabric_path: Path to the swatch
+            mockup_path: Path to the template
+            scale: Rendered template size relative to full resolution
+        """
+        width = self.repeat_cm(fabric_path) * self.px_per_cm(mockup_path) * scale
+        fabric_w, fabric_h = fabric_size
+        tile_w = max(MIN_TILE_PX, round(width))
+        tile_h = max(MIN_TILE_PX, round(width * fabric_h / fabric_w))
+        return tile_w, tile_h
@@ -0,0 +1,141 @@
+"""
+Fabric Search - relevance-ranked text search over the fabric catalog.
+
+Searching used to OR three `ILIKE '%term%'` predicates over ref, fabrication
+and fabric_group. No B-tree index serves a leading wildcard, so every search
+scanned the whole table.
+
+On PostgreSQL the search runs against indexes created by the
+`fabric_search_indexes` migration:
+
+- `fabric.search_vector`, a generated tsvector over the three columns
+  (ref weighted highest), with a GIN index. Each search word matches as a
+  prefix, so 'jers' finds 'jersey'.
+- pg_trgm GIN indexes on each column. They serve substring matches (partial
+  refs like '101') and word-similarity matches that tolerate typos
+  ('coton' finds 'cotton').
+
+Results are ordered by full-text rank plus the best trigram similarity. Both
+are `real` (float4); the rank is cast to double precision so the value a
+keyset cursor stores round-trips exactly and ties compare equal.
+
+Other databases (SQLite in development and tests), or PostgreSQL before the
+migration is applied, use LikeFabricSearch: the same API with ILIKE
+substring matching and a simple ref-first ranking, without typo tolerance.
+"""
+
+import logging
+import re
+
+from sqlalchemy import case, cast, func, inspect, literal, literal_column, or_
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+
+logger = logging.getLogger(__name__)
+
+# Search text beyond this is ignored (keeps tsquery/trigram work bounded)
+MAX_TERM_LENGTH = 100
+MAX_WORDS = 8
+TEXT_SEARCH_CONFIG = "english"
+SEARCH_VECTOR_COLUMN = "search_vector"
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def search_words(term):
+    """Splits a search term into at most MAX_WORDS alphanumeric words."""
+    return _WORD_RE.findall(term[:MAX_TERM_LENGTH])[:MAX_WORDS]
+
+
+class LikeFabricSearch:
+    """
+    Portable search: ILIKE substring matching, ranked ref first.
+    """
+
+    name = "like"
+
+    def __init__(self, model):
+        """
+        Args:
+            model: The Fabric model class
+        """
+        self.model = model
+
+    def columns(self):
+        return (self.model.ref, self.model.fabrication, self.model.fabric_group)
+
+    def filter(self, query, term):
+        """Restricts a Fabric query to rows matching `term` (no ordering)."""
+        pattern = f"%{term.strip()[:MAX_TERM_LENGTH]}%"
+        return query.filter(or_(*(column.ilike(pattern) for column in self.columns())))
+
+    def rank(self, term):
+        """Relevance of a row for `term` (higher is better), for ORDER BY / keyset pages."""
+        term = term.strip()[:MAX_TERM_LENGTH]
+        ref = self.model.ref
+        return case(
+            (func.lower(ref) == term.lower(), 4),
+            (ref.ilike(f"{term}%"), 3),
+            (ref.ilike(f"%{term}%"), 2),
+            else_=1
+        )
+
+
+class PostgresFabricSearch(LikeFabricSearch):
+    """
+    Full-text and trigram search backed by GIN indexes (PostgreSQL).
+    """
+
+    name = "postgres"
+
+    def _tsquery(self, term):
+        words = search_words(term)
+        if not words:
+            return None
+        return func.to_tsquery(TEXT_SEARCH_CONFIG, " & ".join(f"{word}:*" for word in words))
+
+    def _vector(self):
+        return literal_column(f"{self.model.__tablename__}.{SEARCH_VECTOR_COLUMN}")
+
+    def filter(self, query, term):
+        term = term.strip()[:MAX_TERM_LENGTH]
+        pattern = f"%{term}%"
+        columns = self.columns()
+        matches = [column.ilike(pattern) for column in columns]
+        # term <% column: some word of the column is similar to the term (typos)
+        matches += [literal(term).op("<%")(column) for column in columns]
+        tsquery = self._tsquery(term)
+        if tsquery is not None:
+            matches.append(self._vector().op("@@")(tsquery))
+        return query.filter(or_(*matches))
+
+    def rank(self, term):
+        term = term.strip()[:MAX_TERM_LENGTH]
+        similarity = func.greatest(*(func.word_similarity(term, func.coalesce(column, "")) for column in self.columns()))
+        tsquery = self._tsquery(term)
+        score = similarity if tsquery is None else func.ts_rank_cd(self._vector(), tsquery) + similarity
+        # float4 doesn't survive the cursor's JSON/float8 round trip: a boundary
+        # row's rank would never equal its cursor value, duplicating or skipping ties
+        return cast(score, DOUBLE_PRECISION)
+
+
+def create_fabric_search(engine, model):
+    """
+    Returns the best search implementation the database supports.
+
+    Args:
+        engine: SQLAlchemy engine of the catalog database
+        model: The Fabric model class
+    """
+    if engine.dialect.name == "postgresql":
+        try:
+            columns = {column["name"] for column in inspect(engine).get_columns(model.__tablename__)}
+        except Exception as e:
+            logger.warning(f"Fabric search: could not inspect {model.__tablename__}: {e}")
+            columns = set()
+        if SEARCH_VECTOR_COLUMN in columns:
+            return PostgresFabricSearch(model)
+        logger.warning(
+            "Fabric search: search indexes are missing, falling back to ILIKE scans. "
+            "Run 'flask db upgrade' to create them."
+        )
+    return LikeFabricSearch(model)
@@ -0,0 +1,140 @@
+"""
+Garment Catalog - precomputed /api/garments response.
+
+The garment list only changes when templates or masks are added, removed or
+renamed. The catalog is built from the shared asset directory indexes and
+rebuilt when either listing changes; in between, every request is served the
+same pre-serialized JSON body and a strong ETag, so clients that already have
+it get 304 Not Modified.
+
+Only garments with at least one complete template + mask pair are listed,
+following the naming MockupGeneratorV2.plan_views resolves:
+
+    <garment>_face / <garment>_mask_face
+    <garment>_back / <garment>_mask_back
+    <garment>      / <garment>_mask
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+from asset_index import get_directory_index
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+MASK_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.webp']
+
+
+class GarmentCatalog:
+    """
+    Cached garment listing grouped by category.
+    """
+
+    def __init__(self, mockup_dir, mask_dir, template_url_prefix="/static/mockup-templates/"):
+        """
+        Args:
+            mockup_dir: Directory containing base mockup templates
+            mask_dir: Directory containing mask files
+            template_url_prefix: URL prefix under which templates are served
+        """
+        self.mockup_index = get_directory_index(mockup_dir)
+        self.mask_index = get_directory_index(mask_dir)
+        self.template_url_prefix = template_url_prefix
+        self._generations = None
+        self._body = None
+        self._etag = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Returns (body, etag) for the current catalog, rebuilding it if the
+        template or mask directory changed.
+
+        Returns:
+            body: UTF-8 encoded JSON bytes
+            etag: Strong ETag value (unquoted)
+        """
+        generations = (self.mockup_index.current_generation(), self.mask_index.current_generation())
+        if generations == self._generations:
+            return self._body, self._etag
+
+        with self._lock:
+            if generations != self._generations:
+                body = json.dumps(self.build(), sort_keys=True, separators=(",", ":")).encode("utf-8")
+                self._body = body
+                self._etag = hashlib.sha256(body).hexdigest()[:32]
+                self._generations = generations
+            return self._body, self._etag
+
+    def _has_mask(self, mask_ref):
+        return self.mask_index.find(mask_ref, MASK_EXTENSIONS) is not None
+
+    def build(self):
+        """
+        Builds the catalog from the directory listings.
+
+        Returns:
+            Dict of category -> list of garment dicts
+        """
+        garment_map = {}  # Key: (category, display_name) -> data
+
+        for filename in self.mockup_index.filenames():
+            if not filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            # Remove extension
+            name_part = os.path.splitext(filename)[0]
+
+            # Check for view suffix
+            view = None
+            base_name = name_part
+            if '_face' in name_part.lower():
+                base_name = re.sub(r'_face', '', name_part, flags=re.IGNORECASE)
+                view = 'face'
+            elif '_back' in name_part.lower():
+                base_name = re.sub(r'_back', '', name_part, flags=re.IGNORECASE)
+                view = 'back'
+
+            # Templates without a matching mask cannot be rendered
+            mask_ref = f"{base_name}_mask_{view}" if view else f"{base_name}_mask"
+            if not self._has_mask(mask_ref):
+                continue
+
+            # Split category (first word)
+            parts = base_name.split(' ', 1)
+            if len(parts) > 1:
+                category = parts[0].capitalize()  # Men, Ladies, Infant
+                display_name = parts[1].strip()
+            else:
+                category = "Uncategorized"
+                display_name = base_name
+
+            key = (category, display_name)
+            if key not in garment_map:
+                garment_map[key] = {
+                    "name": base_name,
+                    "displayName": display_name,
+                    "category": category,
+                    "imageUrl": None,
+                    "hasFace": False
+                }
+
+            # Determine best image for thumbnail
+            image_url = f"{self.template_url_prefix}{filename}"
+            if view == 'face' or not garment_map[key]["imageUrl"]:
+                garment_map[key]["imageUrl"] = image_url
+                if view == 'face':
+                    garment_map[key]["hasFace"] = True
+            elif view == 'back' and not garment_map[key]["hasFace"]:
+                garment_map[key]["imageUrl"] = image_url
+
+        garments_by_category = {}
+        for data in garment_map.values():
+            garments_by_category.setdefault(data["category"], []).append({
+                "name": data["name"],
+                "displayName": data["displayName"],
+                "imageUrl": data["imageUrl"],
+                "isSilhouette": True
+            })
+        return garments_by_category
@@ -0,0 +1,14 @@
+"""
+Gunicorn hooks (loaded with `-c gunicorn.conf.py`).
+
+Server settings (workers, bind, timeout) stay on the command line in the
+Dockerfile and start_server.sh.
+"""
+
+
+def post_worker_init(worker):
+    # Reliability: Start the mockup job runner as soon as each worker has loaded
+    # the app, so jobs queued before a deploy or restart drain without waiting
+    # for the worker's first request
+    from api_server import start_mockup_job_runner
+    start_mockup_job_runner()
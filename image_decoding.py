@@ -0,0 +1,150 @@
+"""
+Image Decoding - memory-bounded decoding of render inputs.
+
+A render only needs a fabric at roughly the size it will be resampled to, yet
+a plain Image.open().convert('RGBA') decodes the full original and then makes
+a second, four-byte-per-pixel copy of it. For a 100 MP swatch that is well
+over half a gigabyte per render, in every server worker at once.
+
+decode_image() instead:
+- checks the estimated decode memory against a budget from the file header,
+  before any pixel data is decoded
+- decodes JPEGs with draft mode, which lets libjpeg scale by 1/2, 1/4 or 1/8
+  during decoding
+- shrinks other formats (PNG, WebP, ...) with reduce() right after decoding,
+  before the mode conversion, so the converted copy is already small
+
+Both keep at least `reducing_gap` times the target size, as Pillow's own
+resize(reducing_gap=...) does, so the final LANCZOS resample sees enough
+source pixels and the result is visually unchanged.
+"""
+
+import logging
+import math
+import os
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REDUCING_GAP = 2.0
+
+# Bytes per pixel of decoded images by mode; unlisted modes count as 4
+_MODE_BYTES = {"1": 1, "L": 1, "P": 1, "LA": 2, "PA": 2, "I;16": 2, "RGB": 3, "YCbCr": 3, "LAB": 3, "HSV": 3}
+
+
+class DecodeBudgetError(Exception):
+    """Raised when decoding an image would exceed the configured memory budget."""
+
+
+def mode_bytes(mode):
+    """Returns the bytes per pixel Pillow uses for an image mode."""
+    return _MODE_BYTES.get(mode, 4)
+
+
+def reduce_factor(size, target_size, reducing_gap=DEFAULT_REDUCING_GAP):
+    """
+    Returns the largest integer factor an image can be shrunk by while staying
+    at least `reducing_gap` times `target_size` in both dimensions (1 = none).
+    """
+    if not target_size:
+        return 1
+    width, height = size
+    target_w, target_h = target_size
+    factor = min(width / max(1, target_w * reducing_gap), height / max(1, target_h * reducing_gap))
+    return max(1, int(factor))
+
+
+def estimate_decode_bytes(image, mode, target_size=None, reducing_gap=DEFAULT_REDUCING_GAP):
+    """
+    Estimates the peak memory decode_image() needs for an opened image: the
+    decoded (possibly drafted) pixels plus the reduced, converted copy.
+
+    Args:
+        image: Opened, not yet loaded image (after any draft() call)
+        mode: Mode the caller converts to
+        target_size: Optional (width, height) the image will be resized to
+    """
+    width, height = image.size
+    factor = reduce_factor(image.size, target_size, reducing_gap)
+    reduced = math.ceil(width / factor) * math.ceil(height / factor)
+    return width * height * mode_bytes(image.mode) + reduced * mode_bytes(mode)
+
+
+def _open_for_decode(path, mode, target_size, max_bytes, reducing_gap):
+    """Opens `path`, applies JPEG draft mode and checks the budget from the header."""
+    source = Image.open(path)
+    try:
+        original_size = source.size
+        if target_size and source.format == "JPEG":
+            draft_mode = mode if mode in ("RGB", "L") else None
+            target_w, target_h = target_size
+            source.draft(draft_mode, (int(target_w * reducing_gap), int(target_h * reducing_gap)))
+
+        needed = estimate_decode_bytes(source, mode, target_size, reducing_gap)
+        if max_bytes and needed > max_bytes:
+            raise DecodeBudgetError(
+                f"{os.path.basename(path)} ({original_size[0]}x{original_size[1]}) needs about "
+                f"{needed // (1024 * 1024)} MB to decode, budget is {max_bytes // (1024 * 1024)} MB"
+            )
+    except BaseException:
+        source.close()
+        raise
+    return source, original_size
+
+
+def check_decode_budget(path, mode, target_size=None, max_bytes=None, reducing_gap=DEFAULT_REDUCING_GAP):
+    """
+    Checks that decode_image() could decode `path` within `max_bytes`, reading
+    only the file header. Lets callers that decode a derived copy of the image
+    (e.g. a swatch pyramid level) apply the original's budget.
+
+    Raises:
+        DecodeBudgetError: If the estimated decode memory exceeds `max_bytes`
+    """
+    if not max_bytes:
+        return
+    source, _ = _open_for_decode(path, mode, target_size, max_bytes, reducing_gap)
+    source.close()
+
+
+def decode_image(path, mode, target_size=None, max_bytes=None, reducing_gap=DEFAULT_REDUCING_GAP):
+    """
+    Decodes an image no larger than needed for `target_size`.
+
+    Args:
+        path: Image file path
+        mode: Mode of the returned image (e.g. 'RGB', 'RGBA')
+        target_size: Optional (width, height) the image will be resized to.
+                     Without it the image is decoded at full size.
+        max_bytes: Optional decode memory budget in bytes
+        reducing_gap: Minimum ratio kept between the decoded and target sizes
+
+    Returns:
+        Loaded image in `mode`
+
+    Raises:
+        DecodeBudgetError: If the estimated decode memory exceeds `max_bytes`.
+            Raised before any pixel data is decoded.
+    """
+    source, original_size = _open_for_decode(path, mode, target_size, max_bytes, reducing_gap)
+    image = source
+    try:
+        factor = reduce_factor(source.size, target_size, reducing_gap)
+        if factor > 1:
+            image = image.reduce(factor)
+        if image.mode != mode:
+            image = image.convert(mode)
+        else:
+            image.load()
+    except BaseException:
+        source.close()
+        raise
+    # Drops the full-size decoded pixels as soon as a smaller copy exists
+    if image is not source:
+        source.close()
+
+    if image.size != original_size:
+        logger.debug(f"Decoded {os.path.basename(path)} at {image.size[0]}x{image.size[1]} "
+                     f"(original {original_size[0]}x{original_size[1]})")
+    return image
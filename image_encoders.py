@@ -0,0 +1,157 @@
+"""
+Image Encoders - write rendered mockups in the configured output format.
+
+Honours OUTPUT_FORMAT / OUTPUT_QUALITY from config:
+
+- Opaque renders are written as JPEG or lossy WebP when requested.
+- Renders that need transparency are written as PNG with a tuned compression
+  level, or as lossless WebP when enabled. JPEG cannot carry alpha, and lossy
+  WebP would change garment edges, so neither is used for them.
+
+Every encode reports its format, output size and encode time.
+"""
+
+import io
+import os
+import threading
+import time
+
+from PIL import Image
+
+EXTENSIONS = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp"}
+MIMETYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+_alpha_cache = {}  # path -> ((size, mtime_ns), has_alpha)
+_alpha_lock = threading.Lock()
+
+
+class EncodeStats:
+    """
+    Result of one encode.
+
+    Attributes:
+        format: Format written ('PNG', 'JPEG' or 'WEBP')
+        nbytes: Size of the encoded output in bytes
+        seconds: Wall time spent encoding
+    """
+
+    __slots__ = ("format", "nbytes", "seconds")
+
+    def __init__(self, format, nbytes, seconds):
+        self.format = format
+        self.nbytes = nbytes
+        self.seconds = seconds
+
+    def __repr__(self):
+        return f"{self.format} {self.nbytes / 1024:.0f} KB in {self.seconds * 1000:.0f} ms"
+
+
+def has_alpha_channel(image_path):
+    """
+    Returns True if the image file declares an alpha channel or transparency.
+    Only the header is read; no pixels are decoded. Results are cached until
+    the file's size or mtime changes.
+    """
+    st = os.stat(image_path)
+    identity = (st.st_size, st.st_mtime_ns)
+    with _alpha_lock:
+        cached = _alpha_cache.get(image_path)
+    if cached is not None and cached[0] == identity:
+        return cached[1]
+
+    with Image.open(image_path) as img:
+        has_alpha = img.mode in ("RGBA", "LA", "PA", "RGBa", "La") or "transparency" in img.info
+    with _alpha_lock:
+        _alpha_cache[image_path] = (identity, has_alpha)
+    return has_alpha
+
+
+class ImageEncoder:
+    """
+    Chooses an output format per render and encodes images to it.
+    """
+
+    def __init__(self, output_format="PNG", quality=95, png_compress_level=3, lossless_webp=False):
+        """
+        Args:
+            output_format: Preferred format: 'PNG', 'JPEG'/'JPG' or 'WEBP'
+            quality: Quality for lossy JPEG/WebP output (1-100)
+            png_compress_level: zlib level for PNG output (0-9; lower is faster)
+            lossless_webp: Write lossless WebP instead of PNG when transparency is required
+        """
+        output_format = output_format.upper()
+        self.output_format = "JPEG" if output_format == "JPG" else output_format
+        if self.output_format not in EXTENSIONS:
+            raise ValueError(f"Unsupported output format '{output_format}'")
+        self.quality = quality
+        self.png_compress_level = png_compress_level
+        self.lossless_webp = lossless_webp
+
+    def params(self):
+        """Returns the settings that affect encoded output (for cache keys)."""
+        return {
+            "format": self.output_format,
+            "quality": self.quality,
+            "png_compress_level": self.png_compress_level,
+            "lossless_webp": self.lossless_webp,
+        }
+
+    def format_for(self, needs_alpha):
+        """
+        Returns the format to write for a render.
+
+        Args:
+            needs_alpha: True if the render has (or may have) transparent pixels
+        """
+        if not needs_alpha:
+            return self.output_format
+        if self.lossless_webp:
+            return "WEBP"
+        return "PNG"
+
+    def extension_for(self, needs_alpha):
+        """Returns the file extension (with dot) for a render."""
+        return EXTENSIONS[self.format_for(needs_alpha)]
+
+    def encode(self, image, fp, needs_alpha, fast=False):
+        """
+        Encodes an image in the format chosen by format_for().
+
+        Args:
+            image: PIL Image ('RGBA' or 'RGB')
+            fp: File path or binary file object to write to
+            needs_alpha: Whether transparency must be preserved
+            fast: Favour encode speed over size (used for previews)
+
+        Returns:
+            EncodeStats
+        """
+        fmt = self.format_for(needs_alpha)
+        started = time.perf_counter()
+
+        if fmt == "JPEG":
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            image.save(fp, "JPEG", quality=self.quality, optimize=not fast)
+        elif fmt == "WEBP":
+            # Lossless only where transparency has to be preserved exactly
+            if needs_alpha:
+                image.save(fp, "WEBP", lossless=True, quality=0 if fast else 80,
+                           method=0 if fast else 4, exact=True)
+            else:
+                if image.mode != "RGB":
+                    image = image.convert("RGB")
+                image.save(fp, "WEBP", quality=self.quality, method=0 if fast else 4)
+        else:
+            if not needs_alpha and image.mode == "RGBA":
+                image = image.convert("RGB")
+            image.save(fp, "PNG", compress_level=1 if fast else self.png_compress_level)
+
+        seconds = time.perf_counter() - started
+        if isinstance(fp, (str, os.PathLike)):
+            nbytes = os.path.getsize(fp)
+        elif isinstance(fp, io.BytesIO):
+            nbytes = fp.getbuffer().nbytes
+        else:
+            nbytes = 0
+        return EncodeStats(fmt, nbytes, seconds)
@@ -0,0 +1,54 @@
+"""fabric search indexes
+
+Adds the indexes fabric_search.PostgresFabricSearch queries: a generated
+tsvector over ref/fabrication/fabric_group with a GIN index, and pg_trgm
+GIN indexes on the same columns. No-op on other databases, which search
+with ILIKE. models.Fabric doesn't declare these objects; migrations/env.py
+keeps autogenerate from dropping them (UNMODELED_OBJECTS).
+
+Revision ID: 3e29e0dd6c13
+Revises: 
+Create Date: 2026-10-17 00:57:34.649046
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3e29e0dd6c13'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+TRIGRAM_COLUMNS = ('ref', 'fabrication', 'fabric_group')
+
+
+def is_postgresql():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade():
+    if not is_postgresql():
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Must match fabric_search.TEXT_SEARCH_CONFIG
+    op.execute("""
+        ALTER TABLE fabric ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(ref, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(fabrication, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(fabric_group, '')), 'C')
+        ) STORED
+    """)
+    op.execute("CREATE INDEX ix_fabric_search_vector ON fabric USING gin (search_vector)")
+    for column in TRIGRAM_COLUMNS:
+        op.execute(f"CREATE INDEX ix_fabric_{column}_trgm ON fabric USING gin ({column} gin_trgm_ops)")
+
+
+def downgrade():
+    if not is_postgresql():
+        return
+    for column in TRIGRAM_COLUMNS:
+        op.execute(f"DROP INDEX IF EXISTS ix_fabric_{column}_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_fabric_search_vector")
+    op.execute("ALTER TABLE fabric DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,261 @@
+"""
+Mockup Jobs - persistent local queue for asynchronous mockup renders.
+
+Jobs are stored in a SQLite database so they survive worker restarts and are
+visible to every gunicorn worker on the host. Each worker runs a small
+background thread that claims queued jobs and executes them; a job whose
+worker died mid-render is picked up again once its lease expires.
+
+Job lifecycle: queued -> running -> done | failed
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mockup_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    user_id INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_mockup_jobs_status ON mockup_jobs (status, created_at);
+"""
+
+
+class MockupJobError(Exception):
+    """A job failure whose message is safe to show to the client."""
+
+
+class MockupJobQueue:
+    """
+    SQLite-backed job queue shared by all workers on a host.
+    """
+
+    def __init__(self, db_path, lease_seconds=300, max_attempts=3, retention_seconds=86400):
+        """
+        Args:
+            db_path: Path to the SQLite database file (created if missing)
+            lease_seconds: How long a claimed job may run before it is re-queued
+            max_attempts: Claims allowed before a job is marked failed
+            retention_seconds: Finished jobs older than this are pruned
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, payload, user_id=None):
+        """
+        Adds a job to the queue.
+
+        Args:
+            payload: JSON-serializable dict describing the render
+            user_id: Optional id of the submitting user
+
+        Returns:
+            The new job id
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO mockup_jobs (id, status, payload, user_id, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, STATUS_QUEUED, json.dumps(payload), user_id, now, now),
+            )
+        return job_id
+
+    def get(self, job_id):
+        """
+        Returns the job as a dict, or None if it does not exist.
+        """
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM mockup_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def claim(self):
+        """
+        Atomically claims the oldest runnable job for this worker.
+
+        Runnable jobs are queued ones and running ones whose lease expired.
+
+        Returns:
+            The claimed job as a dict, or None if the queue is empty
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Jobs that keep killing their worker are not retried forever
+            conn.execute(
+                "UPDATE mockup_jobs SET status = ?, error = ?, updated_at = ? "
+                "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (STATUS_FAILED, "Render was interrupted too many times", now,
+                 STATUS_RUNNING, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT * FROM mockup_jobs "
+                "WHERE status = ? OR (status = ? AND lease_until < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (STATUS_QUEUED, STATUS_RUNNING, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE mockup_jobs SET status = ?, attempts = attempts + 1, "
+                "lease_until = ?, updated_at = ? WHERE id = ?",
+                (STATUS_RUNNING, now + self.lease_seconds, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        job = self._to_dict(row)
+        job["status"] = STATUS_RUNNING
+        return job
+
+    def complete(self, job_id, result):
+        """Marks a job done and stores its JSON-serializable result."""
+        self._finish(job_id, STATUS_DONE, result=json.dumps(result))
+
+    def fail(self, job_id, error):
+        """Marks a job failed with a user-facing error message."""
+        self._finish(job_id, STATUS_FAILED, error=str(error))
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._connection() as conn:
+            conn.execute(
+                "UPDATE mockup_jobs SET status = ?, result = ?, error = ?, "
+                "lease_until = NULL, updated_at = ? WHERE id = ?",
+                (status, result, error, time.time(), job_id),
+            )
+
+    def prune(self):
+        """Deletes finished jobs older than the retention period."""
+        cutoff = time.time() - self.retention_seconds
+        with self._connection() as conn:
+            conn.execute(
+                "DELETE FROM mockup_jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (STATUS_DONE, STATUS_FAILED, cutoff),
+            )
+
+    @staticmethod
+    def _to_dict(row):
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"]) if job["payload"] else {}
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+class MockupJobRunner:
+    """
+    Background threads that claim jobs from a MockupJobQueue and run them.
+    """
+
+    def __init__(self, queue, handler, threads=1, poll_interval=1.0):
+        """
+        Args:
+            queue: MockupJobQueue to consume
+            handler: Callable(payload) -> result dict. Raising marks the job failed;
+                     only MockupJobError messages are exposed to clients.
+            threads: Number of runner threads in this process
+            poll_interval: Seconds to sleep when the queue is empty
+        """
+        self.queue = queue
+        self.handler = handler
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self._started_pid = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def ensure_started(self):
+        """Starts the runner threads once per process (cheap to call often)."""
+        if self._started_pid == os.getpid():
+            return
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            for i in range(self.threads):
+                thread = threading.Thread(
+                    target=self._loop, name=f"mockup-job-runner-{i}", daemon=True
+                )
+                thread.start()
+            self._started_pid = os.getpid()
+            logger.info(f"Mockup job runner: started {self.threads} thread(s)")
+
+    def notify(self):
+        """Wakes idle runner threads after a job was enqueued."""
+        self._wake.set()
+
+    def _loop(self):
+        last_prune = 0.0
+        while True:
+            try:
+                if time.monotonic() - last_prune > 3600:
+                    self.queue.prune()
+                    last_prune = time.monotonic()
+
+                job = self.queue.claim()
+                if job is None:
+                    self._wake.wait(self.poll_interval)
+                    self._wake.clear()
+                    continue
+                self._run(job)
+            except Exception as e:
+                logger.error(f"Mockup job runner error: {e}")
+                time.sleep(self.poll_interval)
+
+    def _run(self, job):
+        try:
+            result = self.handler(job["payload"])
+        except MockupJobError as e:
+            logger.warning(f"Mockup job {job['id']} failed: {e}")
+            self.queue.fail(job["id"], e)
+            return
+        except Exception as e:
+            logger.error(f"Mockup job {job['id']} failed: {e}")
+            self.queue.fail(job["id"], "An unexpected server error occurred")
+            return
+        self.queue.complete(job["id"], result)
@@ -5,11 +5,60 @@ WHITE areas in mask = fabric visible
 BLACK areas in mask = transparent
 
 V2.1 Update: Now auto-detects _face and _back variants.
+Tile mode: repeats the swatch at its physical size instead of stretching it.
 """
 
+import io
+import logging
 import os
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
 from PIL import Image, ImageOps
-import sys
+
+from asset_cache import CompiledAsset
+from asset_index import get_directory_index
+from compositing import ENGINES, composite
+from fabric_scale import TileScale
+from image_decoding import DecodeBudgetError, check_decode_budget, decode_image
+from image_encoders import MIMETYPES, ImageEncoder, has_alpha_channel
+
+logger = logging.getLogger(__name__)
+
+# Lookup table for the mask threshold (WHITE > 200 = fabric area)
+MASK_THRESHOLD_LUT = [255 if p > 200 else 0 for p in range(256)]
+
+QUALITIES = ("full", "preview")
+
+# 'stretch' fits the whole swatch to the mask; 'tile' repeats it at physical scale
+MODES = ("stretch", "tile")
+
+
+class RenderFailure:
+    """
+    Outcome of a view that failed for a reason callers should report instead
+    of a generic failure (currently DecodeBudgetError). Falsy, like the plain
+    False of other failed views, and picklable so it crosses the render pool.
+    """
+    
+    __slots__ = ("error",)
+    
+    def __init__(self, error):
+        self.error = error
+    
+    def __bool__(self):
+        return False
+    
+    def __repr__(self):
+        return f"RenderFailure({self.error!r})"
+
+
+def raise_render_failure(outcomes):
+    """Raises the error of the first RenderFailure among view outcomes, if any."""
+    for outcome in outcomes:
+        if isinstance(outcome, RenderFailure):
+            raise outcome.error
 
 
 class MockupGeneratorV2:
@@ -20,7 +69,11 @@ class MockupGeneratorV2:
       and generates all associated parts.
     """
     
-    def __init__(self, fabric_dir, mockup_dir, mask_dir, output_dir):
+    def __init__(self, fabric_dir, mockup_dir, mask_dir, output_dir, render_cache=None,
+                 asset_cache=None, engine="pillow", executor=None, swatch_pyramid=None,
+                 quality="full", preview_max_size=512, encoder=None, mode="stretch",
+                 tile_scale=None, observer=None, max_decode_bytes=None, asset_store=None,
+                 on_output_written=None):
         """
         Initialize the generator with directory paths.
         
@@ -29,23 +82,91 @@ class MockupGeneratorV2:
             mockup_dir: Directory containing base mockup templates (white garment shapes)
             mask_dir: Directory containing mask files (WHITE = fabric area, BLACK = transparent)
             output_dir: Directory where generated mockups will be saved
+            render_cache: Optional RenderCache; unchanged renders are served from disk
+            asset_cache: Optional CompiledAssetCache; templates and masks are compiled once
+            engine: Compositing engine, 'pillow' (full canvas) or 'numpy' (mask region only)
+            executor: Optional RenderExecutor; views are then rendered concurrently
+                      in worker processes instead of in the calling thread
+            swatch_pyramid: Optional SwatchPyramid; fabrics are decoded from the
+                            smallest downscaled level that still covers the mask
+            quality: 'full' (template resolution, LANCZOS) or 'preview' (template
+                     reduced to preview_max_size, bilinear, fast encode)
+            preview_max_size: Longer side of preview renders in pixels
+            encoder: Optional ImageEncoder choosing the output format (default: PNG)
+            mode: 'stretch' (swatch stretched to the mask bbox) or 'tile' (swatch
+                  repeated at its physical size)
+            tile_scale: Optional TileScale with repeat widths and template
+                        calibration for tile mode (default: configured defaults)
+            observer: Optional callable (kind, name, value) receiving render events:
+                      ('stage', stage, seconds) after each render stage,
+                      ('pixels', 'input'|'output', pixel count) per decode/render and
+                      ('cache', 'render'|'asset', hit) per cache lookup
+            max_decode_bytes: Optional memory budget for decoding one fabric. Checked
+                              from the file header, so oversized swatches fail
+                              before they are decoded. Templates, masks and the
+                              working canvases are not counted.
+            asset_store: Optional CompiledAssetStore; precompiled templates/masks
+                         are memory-mapped from it instead of decoded
+            on_output_written: Optional callable(output_path) run in this process
+                               after a view was rendered to its output file (not
+                               for render cache hits), e.g. to drop thumbnails
+                               of the previous render
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown compositing engine '{engine}'. Expected one of {ENGINES}")
+        if quality not in QUALITIES:
+            raise ValueError(f"Unknown render quality '{quality}'. Expected one of {QUALITIES}")
+        if mode not in MODES:
+            raise ValueError(f"Unknown render mode '{mode}'. Expected one of {MODES}")
+
         self.fabric_dir = fabric_dir
         self.mockup_dir = mockup_dir
         self.mask_dir = mask_dir
         self.output_dir = output_dir
+        self.render_cache = render_cache
+        self.asset_cache = asset_cache
+        self.engine = engine
+        self.executor = executor
+        self.swatch_pyramid = swatch_pyramid
+        self.quality = quality
+        self.preview_max_size = preview_max_size
+        self.encoder = encoder or ImageEncoder()
+        self.mode = mode
+        self.tile_scale = tile_scale or TileScale()
+        self.observer = observer
+        self.max_decode_bytes = max_decode_bytes
+        self.asset_store = asset_store
+        self.on_output_written = on_output_written
         
         # Ensure output directory exists
         os.makedirs(self.output_dir, exist_ok=True)
         
-    def find_file(self, directory, ref_code, extensions=['.png', '.jpg', '.jpeg']):
+    def record(self, kind, name, value):
+        """Reports a render event to the observer, if any."""
+        if self.observer is not None:
+            self.observer(kind, name, value)
+    
+    @contextmanager
+    def stage(self, name):
+        """Times a render stage and reports it to the observer, if any."""
+        if self.observer is None:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observer("stage", name, time.perf_counter() - started)
+    
+    def find_file(self, directory, ref_code, extensions=['.png', '.jpg', '.jpeg', '.webp']):
         """
-        Finds a file in a directory matching the ref_code (case-insensitive on Windows).
+        Finds a file in a directory matching the ref_code (case-insensitive).
+        Lookups are answered from the shared in-memory directory index.
         
         Args:
             directory: Directory to search in
             ref_code: Reference code/name of the file
-            extensions: List of acceptable file extensions
+            extensions: List of acceptable file extensions, in order of preference
             
         Returns:
             Full path to the file, or None if not found
@@ -55,38 +176,16 @@ class MockupGeneratorV2:
         ref_code = os.path.basename(str(ref_code))
         # Reject any remaining path traversal attempts
         if '..' in ref_code or '/' in ref_code or '\\' in ref_code:
-            print(f"  [!] Security: Rejected potential path traversal in ref_code: '{ref_code}'")
+            logger.warning(f"Security: Rejected potential path traversal in ref_code: '{ref_code}'")
             return None
 
-        # First try exact match
-        for ext in extensions:
-            file_path = os.path.join(directory, f"{ref_code}{ext}")
-            if os.path.exists(file_path):
-                # print(f"DEBUG: Found exact match: {file_path}")
-                return file_path
-            
-            # Handle case-insensitive extensions
-            file_path_upper = os.path.join(directory, f"{ref_code}{ext.upper()}")
-            if os.path.exists(file_path_upper):
-                # print(f"DEBUG: Found exact match with upper extension: {file_path_upper}")
-                return file_path_upper
+        filename = get_directory_index(directory).find(ref_code, extensions)
+        if filename:
+            if os.path.splitext(filename)[0] != ref_code:
+                logger.debug(f"Found via case-insensitive search: '{filename}' (matches '{ref_code}')")
+            return os.path.join(directory, filename)
         
-        # If not found, try case-insensitive filename search
-        try:
-            ref_code_lower = ref_code.lower()
-            files_in_dir = os.listdir(directory)
-            # print(f"DEBUG: Files in dir: {files_in_dir[:5]}... (total {len(files_in_dir)})")
-            
-            for filename in files_in_dir:
-                name_without_ext = os.path.splitext(filename)[0]
-                if name_without_ext.lower() == ref_code_lower:
-                    found_path = os.path.join(directory, filename)
-                    print(f"  [i] Found via case-insensitive search: '{filename}' (matches '{ref_code}')")
-                    return found_path
-        except Exception as e:
-            print(f"  Warning: Error during case-insensitive search: {e}")
-        
-        print(f"  [x] Not found: '{ref_code}' in '{directory}'")
+        logger.debug(f"Not found: '{ref_code}' in '{directory}'")
         return None
     
     def extract_mask_bounds(self, mask_image):
@@ -105,7 +204,7 @@ class MockupGeneratorV2:
         
         # Get bounding box of non-black pixels (white areas)
         # Threshold to ensure we only get bright areas
-        binary_mask = mask_image.point(lambda p: 255 if p > 200 else 0, '1')
+        binary_mask = mask_image.point(MASK_THRESHOLD_LUT, '1')
         bbox = binary_mask.getbbox()
         
         if bbox is None:
@@ -137,12 +236,253 @@ class MockupGeneratorV2:
         
         return mask_gray
     
+    def compile_assets(self, mockup_path, mask_path):
+        """
+        Decodes a template/mask pair into everything a render needs that does
+        not depend on the fabric.
+        
+        Args:
+            mockup_path: Path to base mockup template
+            mask_path: Path to mask file (WHITE = fabric area)
+            
+        Returns:
+            CompiledAsset with the RGBA template, alpha mask at template size and bbox
+        """
+        with self.stage("decode_template"):
+            logger.debug(f"Loading mockup base: {os.path.basename(mockup_path)}")
+            mockup_img = decode_image(mockup_path, 'RGBA')
+            
+            logger.debug(f"Loading mask: {os.path.basename(mask_path)}")
+            mask_img = decode_image(mask_path, 'RGB')
+        
+        with self.stage("bbox"):
+            # Mask boundaries (WHITE = fabric area)
+            bbox = self.extract_mask_bounds(mask_img)
+        
+        with self.stage("mask"):
+            alpha_mask = self.create_alpha_mask_from_white(mask_img)
+            # Only the grayscale mask is kept; free the RGB decode before resizing
+            del mask_img
+            
+            # Resize alpha mask to match mockup dimensions if needed
+            if alpha_mask.size != mockup_img.size:
+                alpha_mask = alpha_mask.resize(mockup_img.size, Image.Resampling.LANCZOS)
+            alpha_box = alpha_mask.getbbox()
+        
+        return CompiledAsset(mockup_img, alpha_mask, bbox, alpha_box=alpha_box)
+    
+    def compile_preview_assets(self, mockup_path, mask_path):
+        """
+        Builds a reduced-resolution CompiledAsset for preview renders from the
+        full-resolution one (which is compiled or taken from the cache first).
+        """
+        full = self.load_compiled_assets(mockup_path, mask_path, quality="full")
+        width, height = full.template.size
+        scale = min(1.0, self.preview_max_size / max(width, height))
+        if scale >= 1.0:
+            return CompiledAsset(full.template, full.alpha, full.bbox, alpha_box=full.alpha_box)
+        
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        template = full.template.resize(size, Image.Resampling.BILINEAR)
+        alpha = full.alpha.resize(size, Image.Resampling.BILINEAR)
+        x, y, w, h = full.bbox
+        bbox = (round(x * scale), round(y * scale), max(1, round(w * scale)), max(1, round(h * scale)))
+        return CompiledAsset(template, alpha, bbox, alpha_box=alpha.getbbox())
+    
+    def open_compiled_assets(self, mockup_path, mask_path):
+        """
+        Returns the full-resolution CompiledAsset for a template/mask pair,
+        memory-mapped from the asset store when it holds a current entry and
+        compiled from the source files otherwise.
+        """
+        if self.asset_store is not None:
+            asset = self.asset_store.load(mockup_path, mask_path)
+            self.record("cache", "asset_store", asset is not None)
+            if asset is not None:
+                return asset
+            logger.debug(f"Asset store: no current entry for {os.path.basename(mockup_path)}, decoding")
+        return self.compile_assets(mockup_path, mask_path)
+    
+    def load_compiled_assets(self, mockup_path, mask_path, quality=None):
+        """
+        Returns the CompiledAsset for a template/mask pair, from the asset cache if set.
+        Preview quality returns the reduced-resolution asset.
+        """
+        quality = quality or self.quality
+        if quality == "preview":
+            compile_fn = self.compile_preview_assets
+            variant = ("preview", self.preview_max_size)
+        else:
+            compile_fn = self.open_compiled_assets
+            variant = None
+        
+        if self.asset_cache is not None:
+            compiled = []
+            
+            def compile_and_note(*paths):
+                compiled.append(True)
+                return compile_fn(*paths)
+            
+            asset = self.asset_cache.get(mockup_path, mask_path, compile_and_note, variant=variant)
+            self.record("cache", "asset", not compiled)
+            return asset
+        return compile_fn(mockup_path, mask_path)
+    
+    def load_fabric(self, fabric_path, target_size=None):
+        """
+        Decodes a fabric design in the mode the compositing engine needs.
+        
+        Args:
+            fabric_path: Path to fabric design file
+            target_size: Optional (width, height) the fabric will be resized to.
+                         With a swatch pyramid, a smaller level covering this
+                         size is decoded instead of the original; either way the
+                         decode is reduced (JPEG draft mode, reduce()) to no more
+                         than the resample needs.
+        
+        Raises:
+            DecodeBudgetError: If decoding would exceed max_decode_bytes
+        """
+        # The mask replaces the fabric's own alpha, so the NumPy engine only needs RGB
+        fabric_mode = 'RGB' if self.engine == "numpy" else 'RGBA'
+        if self.swatch_pyramid is not None and target_size:
+            # The budget applies to the uploaded original, not to whichever
+            # (small) pyramid level ends up being decoded
+            check_decode_budget(fabric_path, fabric_mode, target_size, self.max_decode_bytes)
+            fabric_path = self.swatch_pyramid.select(fabric_path, target_size, max_bytes=self.max_decode_bytes)
+        logger.debug(f"Loading fabric: {os.path.basename(fabric_path)}")
+        return decode_image(fabric_path, fabric_mode, target_size, max_bytes=self.max_decode_bytes)
+    
+    def render_with_fabric(self, fabric_img, mockup_path, mask_path, output_path, fabric_path=None,
+                           asset=None):
+        """
+        Renders one garment view from an already decoded fabric.
+        Raises on failure; see apply_fabric_to_mockup for the error-handling wrapper.
+        
+        Args:
+            fabric_img: Fabric image returned by load_fabric()
+            mockup_path: Path to base mockup template
+            mask_path: Path to mask file (WHITE = fabric area)
+            output_path: Path where final mockup will be saved, or a binary
+                         file object (e.g. io.BytesIO) to encode into
+            fabric_path: Path the fabric was loaded from (tile mode looks up
+                         its repeat width by file name)
+            asset: CompiledAsset for the template/mask, if already loaded
+            
+        Returns:
+            EncodeStats for the written file or buffer
+        """
+        # Template and mask come pre-compiled
+        if asset is None:
+            with self.stage("load_assets"):
+                asset = self.load_compiled_assets(mockup_path, mask_path)
+        mockup_img = asset.template
+        alpha_mask = asset.alpha
+        
+        # 2. Mask boundaries (white areas)
+        mask_x, mask_y, mask_width, mask_height = asset.bbox
+        logger.debug(f"Mask area: {mask_width}x{mask_height} at position ({mask_x}, {mask_y})")
+        
+        # High-quality resampling, or a cheap filter for previews
+        resample = Image.Resampling.BILINEAR if self.quality == "preview" else Image.Resampling.LANCZOS
+        if self.mode == "tile":
+            # 3. Repeat the swatch at physical scale across the mask area
+            tile_size = self.tile_size(fabric_img.size, fabric_path, mockup_path, asset)
+            logger.debug(f"Tiling fabric at {tile_size[0]}x{tile_size[1]} px per repeat over {mask_width}x{mask_height}")
+            with self.stage("resize"):
+                fabric_stretched = self.tile_fabric(fabric_img, tile_size, (mask_width, mask_height), resample)
+        else:
+            # 3. Stretch fabric to EXACTLY fit mask dimensions
+            logger.debug(f"Stretching fabric from {fabric_img.size} to {mask_width}x{mask_height}")
+            with self.stage("resize"):
+                fabric_stretched = fabric_img.resize((mask_width, mask_height), resample)
+        
+        # 4. Alpha mask (WHITE = opaque, BLACK = transparent) is already
+        #    at template resolution
+        
+        # 5. The template may be shared through the asset cache, so it is
+        #    never modified in place (alpha_composite returns a new image)
+        
+        # 6. Paste stretched fabric at mask position and composite with the mask alpha
+        logger.debug(f"Compositing fabric onto mockup ({self.engine} engine)")
+        with self.stage("composite"):
+            final_canvas = composite(
+                self.engine,
+                mockup_img,
+                alpha_mask,
+                fabric_stretched,
+                (mask_x, mask_y),
+                asset.alpha_box
+            )
+        # Release the fabric layer before encoding allocates its own buffers
+        del fabric_stretched
+        
+        # 7. Save the result (format follows the output settings; previews encode fast).
+        #    Written under a temporary name so an interrupted render never
+        #    leaves a truncated file that looks newer than its inputs
+        needs_alpha = has_alpha_channel(mockup_path)
+        fast = self.quality == "preview"
+        with self.stage("encode"):
+            if not isinstance(output_path, (str, os.PathLike)):
+                stats = self.encoder.encode(final_canvas, output_path, needs_alpha, fast=fast)
+            else:
+                tmp_path = f"{output_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+                try:
+                    stats = self.encoder.encode(final_canvas, tmp_path, needs_alpha, fast=fast)
+                    os.replace(tmp_path, output_path)
+                except BaseException:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+        self.record("pixels", "output", final_canvas.size[0] * final_canvas.size[1])
+        logger.debug(f"Encoded {os.path.basename(mockup_path)}: {stats}")
+        return stats
+    
+    def tile_size(self, fabric_size, fabric_path, mockup_path, asset=None):
+        """
+        Returns the (width, height) of one swatch repeat on the rendered template.
+        
+        Args:
+            fabric_size: (width, height) of the swatch, for its aspect ratio
+            fabric_path: Path to the swatch
+            mockup_path: Path to base mockup template
+            asset: CompiledAsset being rendered; reduced-resolution (preview)
+                   assets scale the repeat down with the template
+        """
+        scale = 1.0
+        if asset is not None and self.quality == "preview":
+            with Image.open(mockup_path) as full:
+                scale = asset.template.size[0] / full.size[0]
+        return self.tile_scale.tile_size(fabric_size, fabric_path or "", mockup_path, scale)
+    
+    def tile_fabric(self, fabric_img, tile_size, layer_size, resample):
+        """
+        Builds the fabric layer for tile mode: the swatch is resized once to a
+        single repeat, then repeated with array tiling (no large resample).
+        
+        Args:
+            fabric_img: Decoded swatch
+            tile_size: (width, height) of one repeat in pixels
+            layer_size: (width, height) of the mask area to cover
+            resample: Resampling filter for the single repeat
+        """
+        tile = np.asarray(fabric_img.resize(tile_size, resample))
+        tile_w, tile_h = tile_size
+        layer_w, layer_h = layer_size
+        # One band of repeats across the layer, then copied down into a single
+        # preallocated layer (np.tile + crop would hold two full-size copies)
+        band = np.tile(tile, (1, -(-layer_w // tile_w)) + (1,) * (tile.ndim - 2))[:, :layer_w]
+        layer = np.empty((layer_h,) + band.shape[1:], dtype=band.dtype)
+        for y in range(0, layer_h, tile_h):
+            layer[y:y + tile_h] = band[:layer_h - y]
+        return Image.fromarray(layer)
+    
     def apply_fabric_to_mockup(self, fabric_path, mockup_path, mask_path, output_path):
         """
         Main function: Applies fabric to mockup using stretch-to-fit method.
         
         Process:
-        1. Load fabric, mockup base, and mask
+        1. Load fabric; mockup base and mask come from the compiled assets
         2. Extract mask boundaries (white areas)
         3. Stretch fabric to exactly fit mask dimensions
         4. Composite fabric onto mockup using mask alpha (white = visible)
@@ -157,94 +497,284 @@ class MockupGeneratorV2:
         Returns:
             True if successful, False otherwise
         """
+        return self.apply_fabric_to_mockups(fabric_path, [(mockup_path, mask_path, output_path)])[0]
+    
+    def fabric_target_size(self, fabric_path, views, assets):
+        """
+        Returns the (width, height) that covers every view's mask bbox (one
+        repeat in tile mode), or None if it cannot be determined (the fabric
+        is then decoded at full size and the views fail individually later).
+        
+        Args:
+            fabric_path: Path to fabric design file
+            views: List of (mockup_path, mask_path, output_path) tuples
+            assets: Matching list of CompiledAssets, None where loading failed
+        """
         try:
-            # 1. Load images
-            print(f"  - Loading fabric: {os.path.basename(fabric_path)}")
-            fabric_img = Image.open(fabric_path).convert('RGBA')
-            
-            print(f"  - Loading mockup base: {os.path.basename(mockup_path)}")
-            mockup_img = Image.open(mockup_path).convert('RGBA')
-            
-            print(f"  - Loading mask: {os.path.basename(mask_path)}")
-            mask_img = Image.open(mask_path).convert('RGB')
-            
-            # 2. Extract mask boundaries (white areas)
-            print(f"  - Extracting mask boundaries (WHITE = fabric area)...")
-            mask_x, mask_y, mask_width, mask_height = self.extract_mask_bounds(mask_img)
-            print(f"  - Mask area: {mask_width}x{mask_height} at position ({mask_x}, {mask_y})")
-            
-            # 3. Stretch fabric to EXACTLY fit mask dimensions
-            print(f"  - Stretching fabric from {fabric_img.size} to {mask_width}x{mask_height}...")
-            fabric_stretched = fabric_img.resize(
-                (mask_width, mask_height), 
-                Image.Resampling.LANCZOS  # High-quality resampling
-            )
-            
-            # 4. Create alpha mask from the mask (WHITE = opaque, BLACK = transparent)
-            print(f"  - Creating alpha channel from mask (WHITE areas will show fabric)...")
-            alpha_mask = self.create_alpha_mask_from_white(mask_img)
-            
-            # Resize alpha mask to match mockup dimensions if needed
-            if alpha_mask.size != mockup_img.size:
-                alpha_mask = alpha_mask.resize(mockup_img.size, Image.Resampling.LANCZOS)
-            
-            # 5. Create a blank canvas matching mockup size
-            final_canvas = mockup_img.copy()
-            
-            # 6. Paste stretched fabric onto the canvas at mask position
-            print(f"  - Compositing fabric onto mockup...")
-            # Create a temporary image the size of the mockup to hold the fabric
-            fabric_layer = Image.new('RGBA', mockup_img.size, (255, 255, 255, 0))
-            fabric_layer.paste(fabric_stretched, (mask_x, mask_y))
+            boxes = []
+            fabric_size = None
+            for (mockup_path, _, _), asset in zip(views, assets):
+                if asset is None:
+                    continue
+                if self.mode == "tile":
+                    # Only a single repeat is resampled, so one repeat is all the decode has to cover
+                    if fabric_size is None:
+                        with Image.open(fabric_path) as fabric:
+                            fabric_size = fabric.size
+                    boxes.append(self.tile_size(fabric_size, fabric_path, mockup_path, asset))
+                else:
+                    boxes.append(asset.bbox[2:])
+        except Exception:
+            return None
+        if not boxes:
+            return None
+        return (max(box[0] for box in boxes), max(box[1] for box in boxes))
+    
+    def apply_fabric_to_mockups(self, fabric_path, views):
+        """
+        Applies one fabric to several garment views, decoding the fabric once.
+        
+        Args:
+            fabric_path: Path to fabric design file
+            views: List of (mockup_path, mask_path, output_path) tuples. An
+                   output_path of None renders that view into memory.
             
-            # Apply the alpha mask to the fabric layer
-            fabric_layer.putalpha(alpha_mask)
+        Returns:
+            List with one entry per view: False where the render failed (a
+            RenderFailure when the fabric is over the decode budget), otherwise
+            True, or the encoded bytes for in-memory views
+        """
+        # Compiled templates/masks size the fabric decode; a view whose assets
+        # fail to load reports the error when it renders
+        assets = []
+        for mockup_path, mask_path, _ in views:
+            try:
+                with self.stage("load_assets"):
+                    assets.append(self.load_compiled_assets(mockup_path, mask_path))
+            except Exception:
+                assets.append(None)
+        
+        try:
+            # 1. Load fabric once for every view, no larger than the biggest mask needs
+            target_size = self.fabric_target_size(fabric_path, views, assets)
+            with self.stage("decode_fabric"):
+                fabric_img = self.load_fabric(fabric_path, target_size)
+            self.record("pixels", "input", fabric_img.size[0] * fabric_img.size[1])
+        except FileNotFoundError as e:
+            logger.error(f"File not found - {e}")
+            return [False] * len(views)
+        except DecodeBudgetError as e:
+            logger.warning(f"Fabric over the decode budget: {e}")
+            return [RenderFailure(e)] * len(views)
+        except Exception as e:
+            logger.error(f"Failed to load fabric {os.path.basename(fabric_path)}: {e}", exc_info=True)
+            return [False] * len(views)
+        
+        results = []
+        for (mockup_path, mask_path, output_path), asset in zip(views, assets):
+            name = os.path.basename(output_path or mockup_path)
+            try:
+                if output_path is None:
+                    buffer = io.BytesIO()
+                    self.render_with_fabric(fabric_img, mockup_path, mask_path, buffer, fabric_path, asset)
+                    results.append(buffer.getvalue())
+                else:
+                    self.render_with_fabric(fabric_img, mockup_path, mask_path, output_path, fabric_path, asset)
+                    results.append(True)
+                logger.debug(f"Mockup generated: {name}")
+            except FileNotFoundError as e:
+                logger.error(f"File not found - {e}")
+                results.append(False)
+            except Exception as e:
+                logger.error(f"Failed to render {name}: {e}", exc_info=True)
+                results.append(False)
+        return results
+    
+    def render_params(self):
+        """
+        Returns the parameters that affect the rendered output.
+        Used as part of the render cache key.
+        """
+        return {
+            "method": self.mode,
+            "encoder": self.encoder.params(),
+            "engine": self.engine,
+            "pyramid": self.swatch_pyramid is not None,
+            "quality": self.quality,
+            "preview_max_size": self.preview_max_size if self.quality == "preview" else None,
+        }
+    
+    def worker_config(self):
+        """
+        Returns picklable constructor arguments for rebuilding this generator
+        in a render worker process.
+        """
+        return {
+            "fabric_dir": self.fabric_dir,
+            "mockup_dir": self.mockup_dir,
+            "mask_dir": self.mask_dir,
+            "output_dir": self.output_dir,
+            "engine": self.engine,
+            "swatch_pyramid": self.swatch_pyramid,
+            "quality": self.quality,
+            "preview_max_size": self.preview_max_size,
+            "encoder": self.encoder,
+            "mode": self.mode,
+            "tile_scale": self.tile_scale,
+            "max_decode_bytes": self.max_decode_bytes,
+            "asset_store": self.asset_store,
+        }
+    
+    def cache_key(self, fabric_path, mockup_path, mask_path):
+        """
+        Returns the render cache key for one view, or None without a cache.
+        """
+        if self.render_cache is None:
+            return None
+        params = self.render_params()
+        if self.mode == "tile":
+            # Repeat width and calibration are per fabric / per template
+            params["tile"] = self.tile_scale.params(fabric_path, mockup_path)
+        try:
+            return self.render_cache.make_key(fabric_path, mockup_path, mask_path, params)
+        except OSError as e:
+            logger.warning(f"Render cache key failed: {e}")
+            return None
+    
+    def render_variant(self, fabric_path, mockup_path, mask_path, output_path):
+        """
+        Renders one garment view, reusing the existing output when the
+        render cache says its inputs are unchanged.
+        
+        Returns:
+            True if `output_path` holds an up-to-date mockup, False otherwise
+        """
+        return self.render_variants([(fabric_path, mockup_path, mask_path, output_path)])[0]
+    
+    def render_variants(self, jobs, group_by_fabric=False):
+        """
+        Renders several independent garment views and waits for all of them.
+        
+        Args:
+            jobs: List of (fabric_path, mockup_path, mask_path, output_path) tuples
+            group_by_fabric: See iter_render_variants
             
-            # Composite fabric layer over mockup base
-            final_canvas = Image.alpha_composite(final_canvas, fabric_layer)
+        Returns:
+            List of outcomes, one per job: True where the output is up to date,
+            otherwise False or a RenderFailure
             
-            # 7. Save the result
-            print(f"  - Saving mockup to: {output_path}")
-            final_canvas.save(output_path, 'PNG', quality=95)
+        Raises:
+            RenderTimeoutError: If the executor's per-task timeout is exceeded
+        """
+        results = [False] * len(jobs)
+        for indices, outcomes in self.iter_render_variants(jobs, group_by_fabric):
+            for index, success in zip(indices, outcomes):
+                results[index] = success
+        return results
+    
+    def iter_render_variants(self, jobs, group_by_fabric=False, deadline=None):
+        """
+        Renders several independent garment views, yielding as they complete.
+        
+        Views with an up-to-date cached output are reported first. With an
+        executor the rest render concurrently in worker processes; otherwise
+        they render one after the other in the calling thread.
+        
+        Args:
+            jobs: List of (fabric_path, mockup_path, mask_path, output_path) tuples
+            group_by_fabric: If True, all views sharing a fabric form one task so
+                             the fabric is decoded once. If False, every view is
+                             its own task so the views of one garment run in parallel.
+            deadline: Optional time.monotonic() value by which all rendering must
+                      finish, whatever the per-task timeouts allow
             
-            print(f"  [OK] Mockup generated successfully!")
-            return True
+        Yields:
+            (indices, outcomes) - job indices and a matching list of outcomes
+            (True, False or a RenderFailure)
             
-        except FileNotFoundError as e:
-            print(f"  [x] ERROR: File not found - {e}", file=sys.stderr)
-            return False
-        except Exception as e:
-            print(f"  [x] ERROR: {e}", file=sys.stderr)
-            import traceback
-            traceback.print_exc()
-            return False
+        Raises:
+            RenderTimeoutError: If the executor's per-task timeout or the
+                deadline is exceeded
+        """
+        hits = []
+        groups = {}  # group key -> [(index, job, cache_key)]
+        
+        for index, job in enumerate(jobs):
+            cache_key = self.cache_key(*job[:3])
+            hit = bool(cache_key) and self.render_cache.lookup(cache_key, job[3])
+            if cache_key:
+                self.record("cache", "render", hit)
+            if hit:
+                logger.debug(f"Render cache hit: {os.path.basename(job[3])}")
+                hits.append(index)
+                continue
+            group_key = job[0] if group_by_fabric else index
+            groups.setdefault(group_key, []).append((index, job, cache_key))
+        
+        if hits:
+            yield hits, [True] * len(hits)
+        if not groups:
+            return
+        
+        groups = list(groups.values())
+        
+        def finish(group, outcomes):
+            outcomes = [
+                outcome if isinstance(outcome, RenderFailure) else bool(outcome)
+                for outcome in (outcomes or [False] * len(group))
+            ]
+            for (index, job, cache_key), success in zip(group, outcomes):
+                if success and cache_key:
+                    self.render_cache.store(cache_key, job[3])
+                if success and self.on_output_written is not None:
+                    try:
+                        self.on_output_written(job[3])
+                    except Exception as e:
+                        logger.warning(f"Output hook failed for {os.path.basename(job[3])}: {e}")
+            return [index for index, _, _ in group], outcomes
+        
+        if self.executor is not None:
+            from render_executor import render_fabric_task
+            config = self.worker_config()
+            calls = [
+                (render_fabric_task, (config, group[0][1][0], [job[1:] for _, job, _ in group]))
+                for group in groups
+            ]
+            # Every process renders its share of the views back to back
+            views = sum(len(group) for group in groups)
+            rounds = -(-views // max(1, self.executor.max_workers))
+            timeout = self.executor.task_timeout * rounds
+            if deadline is not None:
+                timeout = max(0, min(timeout, deadline - time.monotonic()))
+            for group_index, result in self.executor.run_as_completed(calls, timeout=timeout):
+                outcomes, events = result if result else (None, [])
+                # Render events from the worker process are reported here
+                for event in events:
+                    self.record(*event)
+                yield finish(groups[group_index], outcomes)
+        else:
+            for group in groups:
+                if deadline is not None and time.monotonic() >= deadline:
+                    from render_executor import RenderTimeoutError
+                    raise RenderTimeoutError("Render deadline exceeded")
+                outcomes = self.apply_fabric_to_mockups(
+                    group[0][1][0], [job[1:] for _, job, _ in group]
+                )
+                yield finish(group, outcomes)
     
-    def generate_mockup(self, fabric_ref, base_mockup_name):
+    def plan_views(self, base_mockup_name):
         """
-        High-level function to generate a mockup from reference codes.
-        Auto-detects _face and _back variants.
+        Resolves the template/mask files for every view of a garment.
+        Auto-detects _face and _back variants and falls back to a single file.
         
         Args:
-            fabric_ref: Fabric reference code (e.g., 'FAB-101')
             base_mockup_name: Base garment name (e.g., 'men polo' or 'Ladies Hoodie')
             
         Returns:
-            A list of paths to generated mockups if successful, or None if all fail.
+            List of (mockup_name, mockup_path, mask_path) tuples, or None if the
+            garment has no usable template/mask pair
         """
-        print(f"\n{'='*60}")
-        print(f"Mockup Generator 2.1 - Stretch-to-Fit Mode")
-        print(f"Fabric: {fabric_ref}")
-        print(f"Base Garment: {base_mockup_name}")
-        print(f"{'='*60}\n")
-        
-        # Find fabric file
-        fabric_path = self.find_file(self.fabric_dir, fabric_ref)
-        if not fabric_path:
-            print(f"[x] ERROR: Fabric '{fabric_ref}' not found in {self.fabric_dir}")
-            return None
-        
-        generated_files = []
-        variants_found = False
+        views = []
         
         # --- 1. Check for variants (e.g., _face, _back) ---
         variants = ["face", "back"] # Add more here like "side" if needed
@@ -256,54 +786,300 @@ class MockupGeneratorV2:
             mask_path = self.find_file(self.mask_dir, mask_ref_variant)
             
             if mockup_path and mask_path:
-                variants_found = True
-                print(f"--- Processing Variant: {variant} ---")
-                output_filename = f"Mockup_{mockup_name_variant}_{fabric_ref}.png"
-                output_path = os.path.join(self.output_dir, output_filename)
-                
-                success = self.apply_fabric_to_mockup(
-                    fabric_path, 
-                    mockup_path, 
-                    mask_path, 
-                    output_path
-                )
-                if success:
-                    generated_files.append(output_path)
-                print(f"--- Finished Variant: {variant} ---")
+                logger.debug(f"Found variant '{variant}' for '{base_mockup_name}'")
+                views.append((mockup_name_variant, mockup_path, mask_path))
             elif mockup_path or mask_path:
-                print(f"  [i] Skipping variant '{variant}': Missing matching mockup or mask file.")
+                logger.info(f"Skipping variant '{variant}' of '{base_mockup_name}': Missing matching mockup or mask file.")
 
         # --- 2. If no variants found, check for a single (base) file ---
-        if not variants_found:
-            print(f"--- Processing Single Garment: {base_mockup_name} ---")
+        if not views:
+            logger.debug(f"Single garment: {base_mockup_name}")
             mask_ref = f"{base_mockup_name}_mask"
             mockup_path = self.find_file(self.mockup_dir, base_mockup_name)
             mask_path = self.find_file(self.mask_dir, mask_ref)
             
             if mockup_path and mask_path:
-                output_filename = f"Mockup_{base_mockup_name}_{fabric_ref}.png"
-                output_path = os.path.join(self.output_dir, output_filename)
-                
-                success = self.apply_fabric_to_mockup(
-                    fabric_path, 
-                    mockup_path, 
-                    mask_path, 
-                    output_path
-                )
-                if success:
-                    generated_files.append(output_path)
+                views.append((base_mockup_name, mockup_path, mask_path))
             else:
-                print(f"[x] ERROR: No files found for base garment '{base_mockup_name}'.")
-                print(f"  Checked for mockup: {mockup_path}")
-                print(f"  Checked for mask: {mask_path}")
+                logger.warning(
+                    f"No files found for base garment '{base_mockup_name}' "
+                    f"(mockup: {mockup_path}, mask: {mask_path})"
+                )
                 return None
         
-        # --- 3. Return results ---
+        return views
+    
+    def output_path_for(self, mockup_name, fabric_ref, mockup_path):
+        """
+        Returns the output path for a garment view rendered with a fabric.
+        The extension follows the encoder's format for the template: templates
+        with transparency keep an alpha-capable format.
+        """
+        suffix = "_tile" if self.mode == "tile" else ""
+        if self.quality == "preview":
+            suffix += "_preview"
+        ext = self.encoder.extension_for(has_alpha_channel(mockup_path))
+        return os.path.join(self.output_dir, f"Mockup_{mockup_name}_{fabric_ref}{suffix}{ext}")
+    
+    def find_cached_mockup(self, fabric_ref, base_mockup_name):
+        """
+        Returns the generated paths for a fabric/garment if every view is
+        already up to date in the render cache, without rendering anything.
+        
+        Returns:
+            List of paths, or None if anything would need rendering
+        """
+        if self.render_cache is None:
+            return None
+        fabric_path = self.find_file(self.fabric_dir, fabric_ref)
+        views = self.plan_views(base_mockup_name) if fabric_path else None
+        if not views:
+            return None
+        
+        paths = []
+        for mockup_name, mockup_path, mask_path in views:
+            output_path = self.output_path_for(mockup_name, fabric_ref, mockup_path)
+            cache_key = self.cache_key(fabric_path, mockup_path, mask_path)
+            if not cache_key or not self.render_cache.lookup(cache_key, output_path):
+                return None
+            paths.append(output_path)
+        return paths
+    
+    def invalidate_cached_mockup(self, fabric_ref, base_mockup_name):
+        """
+        Forgets the render cache stamps of every view of a fabric/garment, so
+        the next render redraws them even though their inputs are unchanged.
+        """
+        if self.render_cache is None:
+            return
+        for mockup_name, mockup_path, _ in self.plan_views(base_mockup_name) or ():
+            self.render_cache.invalidate(self.output_path_for(mockup_name, fabric_ref, mockup_path))
+    
+    def is_up_to_date(self, fabric_ref, base_mockup_name):
+        """
+        Returns True if every view of a fabric/garment has an output that is
+        newer than its fabric, template and mask. Unlike find_cached_mockup
+        this needs no render cache stamps, so outputs from earlier runs count.
+        """
+        fabric_path = self.find_file(self.fabric_dir, fabric_ref)
+        views = self.plan_views(base_mockup_name) if fabric_path else None
+        if not views:
+            return False
+        try:
+            for mockup_name, mockup_path, mask_path in views:
+                output_path = self.output_path_for(mockup_name, fabric_ref, mockup_path)
+                newest_input = max(os.stat(path).st_mtime_ns for path in (fabric_path, mockup_path, mask_path))
+                if os.stat(output_path).st_mtime_ns <= newest_input:
+                    return False
+        except OSError:
+            return False
+        return True
+    
+    def generate_mockup(self, fabric_ref, base_mockup_name):
+        """
+        High-level function to generate a mockup from reference codes.
+        Auto-detects _face and _back variants.
+        
+        Args:
+            fabric_ref: Fabric reference code (e.g., 'FAB-101')
+            base_mockup_name: Base garment name (e.g., 'men polo' or 'Ladies Hoodie')
+            
+        Returns:
+            A list of paths to generated mockups if successful, or None if all fail.
+            
+        Raises:
+            DecodeBudgetError: If the fabric is too large to decode within max_decode_bytes
+            RenderTimeoutError: If the executor's per-task timeout is exceeded
+        """
+        logger.info(
+            f"Mockup Generator 2.1 - {'Tile-to-Scale' if self.mode == 'tile' else 'Stretch-to-Fit'} Mode: "
+            f"fabric '{fabric_ref}', garment '{base_mockup_name}'"
+        )
+        
+        # Find fabric file
+        with self.stage("resolve"):
+            fabric_path = self.find_file(self.fabric_dir, fabric_ref)
+            views = self.plan_views(base_mockup_name) if fabric_path else None
+        if not fabric_path:
+            logger.warning(f"Fabric '{fabric_ref}' not found in {self.fabric_dir}")
+            return None
+        
+        if not views:
+            return None
+        
+        jobs = [
+            (fabric_path, mockup_path, mask_path, self.output_path_for(mockup_name, fabric_ref, mockup_path))
+            for mockup_name, mockup_path, mask_path in views
+        ]
+        
+        # Render (views run concurrently when an executor is configured)
+        results = self.render_variants(jobs)
+        generated_files = [job[3] for job, success in zip(jobs, results) if success]
+        
         if generated_files:
             return generated_files
         else:
-            print(f"[x] FAILED: No mockups were successfully generated for '{base_mockup_name}'.")
+            raise_render_failure(results)
+            logger.warning(f"No mockups were successfully generated for '{base_mockup_name}'.")
+            return None
+    
+    def generate_mockup_bytes(self, fabric_ref, base_mockup_name):
+        """
+        Renders every view of a garment into memory instead of the output
+        directory, for responses that carry the image itself. Views whose
+        output file is up to date in the render cache are read back instead
+        of rendered; nothing is written.
+        
+        Args:
+            fabric_ref: Fabric reference code (e.g., 'FAB-101')
+            base_mockup_name: Base garment name (e.g., 'men polo' or 'Ladies Hoodie')
+            
+        Returns:
+            A list of (mockup_name, filename, mimetype, data) tuples for the
+            views that rendered, or None if all fail.
+            
+        Raises:
+            DecodeBudgetError: If the fabric is too large to decode within max_decode_bytes
+            RenderTimeoutError: If the executor's per-task timeout is exceeded
+        """
+        with self.stage("resolve"):
+            fabric_path = self.find_file(self.fabric_dir, fabric_ref)
+            views = self.plan_views(base_mockup_name) if fabric_path else None
+        if not fabric_path:
+            logger.warning(f"Fabric '{fabric_ref}' not found in {self.fabric_dir}")
+            return None
+        
+        if not views:
+            return None
+        
+        parts = [None] * len(views)
+        pending = []
+        for index, (mockup_name, mockup_path, mask_path) in enumerate(views):
+            cache_key = self.cache_key(fabric_path, mockup_path, mask_path)
+            output_path = self.output_path_for(mockup_name, fabric_ref, mockup_path)
+            if cache_key and self.render_cache.lookup(cache_key, output_path):
+                try:
+                    with open(output_path, "rb") as f:
+                        parts[index] = f.read()
+                except OSError:
+                    pass
+            if cache_key:
+                self.record("cache", "render", parts[index] is not None)
+            if parts[index] is None:
+                pending.append(index)
+        
+        render_views = [(views[index][1], views[index][2], None) for index in pending]
+        if render_views and self.executor is not None:
+            from render_executor import render_fabric_task
+            config = self.worker_config()
+            # One task per view so face and back render in parallel
+            calls = [(render_fabric_task, (config, fabric_path, [view])) for view in render_views]
+            rounds = -(-len(calls) // max(1, self.executor.max_workers))
+            for index, result in zip(pending, self.executor.run(calls, timeout=self.executor.task_timeout * rounds)):
+                outcomes, events = result if result else ([False], [])
+                for event in events:
+                    self.record(*event)
+                parts[index] = outcomes[0]
+        elif render_views:
+            for index, data in zip(pending, self.apply_fabric_to_mockups(fabric_path, render_views)):
+                parts[index] = data
+        
+        rendered = []
+        for (mockup_name, mockup_path, _), data in zip(views, parts):
+            if not data:
+                continue
+            mimetype = MIMETYPES[self.encoder.format_for(has_alpha_channel(mockup_path))]
+            filename = os.path.basename(self.output_path_for(mockup_name, fabric_ref, mockup_path))
+            rendered.append((mockup_name, filename, mimetype, data))
+        
+        if rendered:
+            return rendered
+        else:
+            raise_render_failure(parts)
+            logger.warning(f"No mockups were successfully generated for '{base_mockup_name}'.")
             return None
+    
+    def generate_batch(self, fabric_refs, base_mockup_names, deadline=None):
+        """
+        Generates mockups for every fabric x garment combination.
+        
+        Each fabric is decoded once and each garment's files are resolved once
+        for the whole batch; with an executor, fabrics render in parallel.
+        
+        Args:
+            fabric_refs: List of fabric reference codes
+            base_mockup_names: List of base garment names
+            deadline: Optional time.monotonic() value by which rendering must finish
+            
+        Yields:
+            (fabric_ref, base_mockup_name, files) as each combination completes,
+            where files is a list of generated paths, or None (a RenderFailure
+            when the fabric is over the decode budget) on failure
+            
+        Raises:
+            RenderTimeoutError: If rendering exceeds a task timeout or the deadline;
+                combinations not yet yielded were not completed
+        """
+        logger.info(f"Mockup Generator 2.1 - Batch: {len(fabric_refs)} fabric(s) x {len(base_mockup_names)} garment(s)")
+        combinations = [(fabric_ref, name) for fabric_ref in fabric_refs for name in base_mockup_names]
+        yield from self.generate_combinations(combinations, deadline=deadline)
+    
+    def generate_combinations(self, combinations, deadline=None):
+        """
+        Generates mockups for an explicit list of fabric/garment combinations.
+        See generate_batch; views sharing a fabric are rendered as one task.
+        
+        Args:
+            combinations: List of (fabric_ref, base_mockup_name) tuples
+            deadline: See generate_batch
+            
+        Yields:
+            (fabric_ref, base_mockup_name, files) as each combination completes;
+            see generate_batch
+        """
+        garment_views = {}
+        fabric_paths = {}
+        
+        jobs = []
+        owners = []  # per job: (fabric_ref, base_mockup_name)
+        combo_jobs = {}  # (fabric_ref, base_mockup_name) -> job indices
+        outstanding = {}  # (fabric_ref, base_mockup_name) -> views not yet rendered
+        succeeded = set()
+        failures = {}  # (fabric_ref, base_mockup_name) -> RenderFailure
+        
+        for fabric_ref, name in combinations:
+            if fabric_ref not in fabric_paths:
+                fabric_paths[fabric_ref] = self.find_file(self.fabric_dir, fabric_ref)
+            if name not in garment_views:
+                garment_views[name] = self.plan_views(name)
+            fabric_path = fabric_paths[fabric_ref]
+            views = garment_views[name]
+            if not fabric_path or not views:
+                yield fabric_ref, name, None
+                continue
+            combo = (fabric_ref, name)
+            if combo in combo_jobs:
+                continue
+            combo_jobs[combo] = []
+            outstanding[combo] = len(views)
+            for mockup_name, mockup_path, mask_path in views:
+                output_path = self.output_path_for(mockup_name, fabric_ref, mockup_path)
+                combo_jobs[combo].append(len(jobs))
+                jobs.append((fabric_path, mockup_path, mask_path, output_path))
+                owners.append(combo)
+        
+        for indices, outcomes in self.iter_render_variants(jobs, group_by_fabric=True, deadline=deadline):
+            for index, success in zip(indices, outcomes):
+                combo = owners[index]
+                if success:
+                    succeeded.add(index)
+                elif isinstance(success, RenderFailure):
+                    failures[combo] = success
+                outstanding[combo] -= 1
+                if outstanding[combo] == 0:
+                    # Keep view order stable regardless of completion order
+                    files = [jobs[i][3] for i in combo_jobs[combo] if i in succeeded]
+                    yield combo[0], combo[1], files or failures.get(combo)
 
 
 # Convenience function for quick testing
@@ -324,6 +1100,7 @@ def quick_generate(fabric_ref, mockup_name):
 
 if __name__ == "__main__":
     # Test code
+    logging.basicConfig(level=logging.DEBUG, format='  %(message)s')
     print("Mockup Generator 2.1 Library - Auto-detects face/back")
     print("WHITE areas in mask = fabric visible")
     print("BLACK areas in mask = transparent")
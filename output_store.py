@@ -0,0 +1,297 @@
+"""
+Output Store - size-budgeted LRU eviction for generated files.
+
+Every fabric x garment mockup and every techpack used to be kept forever on
+the shared volume. An OutputStore keeps a directory within a byte and file
+budget by deleting the least recently accessed files first.
+
+The access clock is the later of the file's atime and mtime. Hits that go
+through the API (a generate request answered from the render cache, a served
+file) are recorded with touch(), which only updates an in-memory map. The map
+is written out in batches (one utime() per file per flush, never per hit),
+and mtime is preserved so render-cache and up-to-date checks are unaffected.
+
+Reads that Caddy serves directly are only seen through the kernel's atime,
+which is coarse: under the default relatime mount option a read updates atime
+only if it is older than mtime or more than a day old, and on noatime volumes
+never. For files clients fetch without asking the API, eviction order is
+therefore close to "least recently written or requested through the API",
+with reads refreshing a file at most once a day.
+
+Files are protected from eviction while a request in this process is serving
+them, and for a grace period after their last access or write, so a URL that
+was just handed to a client still resolves when the client fetches it. Open
+file handles survive eviction anyway (POSIX unlink semantics).
+
+Only regular files directly in the directory count towards the budget:
+subdirectories (render-cache stamps, thumbnails), dotfiles and in-progress
+`.tmp` writes are ignored.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+LOCK_NAME = ".evict.lock"
+
+
+def _try_lock(lock_file):
+    """Takes an exclusive, non-blocking lock on an open file. Returns False if it is held."""
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+    lock_file.seek(0)
+    try:
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class EvictionStats:
+    """
+    Outcome of one eviction pass.
+    """
+
+    __slots__ = ("files", "bytes", "evicted_files", "evicted_bytes", "skipped")
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+        self.skipped = False  # Another process held the eviction lock
+
+    def __repr__(self):
+        if self.skipped:
+            return "EvictionStats(skipped)"
+        return (f"EvictionStats({self.files} files, {self.bytes / 1e6:.1f} MB kept; "
+                f"evicted {self.evicted_files} files, {self.evicted_bytes / 1e6:.1f} MB)")
+
+
+class OutputStore:
+    """
+    A directory of generated files kept within a byte and file budget.
+    """
+
+    def __init__(self, directory, max_bytes=None, max_files=None, protect_seconds=600,
+                 flush_interval=30, on_evict=None):
+        """
+        Args:
+            directory: Directory holding the generated files
+            max_bytes: Byte budget (None = unlimited)
+            max_files: File count budget (None = unlimited)
+            protect_seconds: Files accessed or written this recently are never evicted
+            flush_interval: Seconds between writes of recorded accesses
+            on_evict: Callable(path) run after a file was evicted, to drop
+                      derived data (render-cache stamps, thumbnails)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.protect_seconds = protect_seconds
+        self.flush_interval = flush_interval
+        self.on_evict = on_evict
+        self._lock = threading.Lock()
+        self._accessed = {}  # path -> access time (ns), not yet written
+        self._serving = {}  # path -> number of requests serving it in this process
+        self._started_pid = None
+
+    @property
+    def bounded(self):
+        """True if the store has any budget to enforce."""
+        return bool(self.max_bytes or self.max_files)
+
+    def touch(self, paths):
+        """
+        Records an access to one or more files. Cheap: nothing is written
+        until the next flush().
+
+        Args:
+            paths: Path or iterable of paths inside the directory
+        """
+        if isinstance(paths, (str, os.PathLike)):
+            paths = [paths]
+        now = time.time_ns()
+        with self._lock:
+            for path in paths:
+                self._accessed[os.path.abspath(path)] = now
+
+    @contextmanager
+    def serving(self, path):
+        """Protects a file from eviction in this process while the block runs."""
+        path = os.path.abspath(path)
+        with self._lock:
+            self._serving[path] = self._serving.get(path, 0) + 1
+            self._accessed[path] = time.time_ns()
+        try:
+            yield path
+        finally:
+            with self._lock:
+                count = self._serving.pop(path) - 1
+                if count:
+                    self._serving[path] = count
+
+    def flush(self):
+        """
+        Writes recorded accesses as file atimes, keeping each mtime.
+
+        Returns:
+            Number of files updated
+        """
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+        updated = 0
+        for path, atime_ns in accessed.items():
+            try:
+                st = os.stat(path)
+                if atime_ns > st.st_atime_ns:
+                    os.utime(path, ns=(atime_ns, st.st_mtime_ns))
+                    updated += 1
+            except OSError:
+                # Deleted or replaced since the access; nothing to record
+                continue
+        return updated
+
+    def _candidates(self):
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    name = entry.name
+                    if name.startswith(".") or name.endswith(".tmp"):
+                        continue
+                    try:
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    last_access = max(st.st_atime_ns, st.st_mtime_ns)
+                    entries.append((last_access, st.st_size, os.path.abspath(entry.path)))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def evict(self, dry_run=False):
+        """
+        Deletes least recently accessed files until the directory is within
+        budget. Only one process evicts a directory at a time; others skip.
+
+        Args:
+            dry_run: Report what would be evicted without deleting anything
+
+        Returns:
+            EvictionStats
+        """
+        stats = EvictionStats()
+        self.flush()
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, LOCK_NAME), "a") as lock_file:
+            if not _try_lock(lock_file):
+                stats.skipped = True
+                return stats
+            try:
+                self._evict(stats, dry_run)
+            finally:
+                _unlock(lock_file)
+        return stats
+
+    def _evict(self, stats, dry_run):
+        entries = self._candidates()
+        stats.files = len(entries)
+        stats.bytes = sum(size for _, size, _ in entries)
+        if not self._over_budget(stats.files, stats.bytes):
+            return
+
+        protect_after = time.time_ns() - int(self.protect_seconds * 1e9)
+        with self._lock:
+            serving = set(self._serving)
+        entries.sort()  # Oldest access first
+        for last_access, size, path in entries:
+            if not self._over_budget(stats.files, stats.bytes):
+                break
+            if last_access >= protect_after:
+                # Everything after this was accessed even more recently
+                break
+            if path in serving:
+                continue
+            if not dry_run:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Output store: could not evict {path}: {e}")
+                    continue
+                if self.on_evict is not None:
+                    try:
+                        self.on_evict(path)
+                    except Exception as e:
+                        logger.warning(f"Output store: cleanup after evicting {path} failed: {e}")
+            stats.files -= 1
+            stats.bytes -= size
+            stats.evicted_files += 1
+            stats.evicted_bytes += size
+
+        if self._over_budget(stats.files, stats.bytes):
+            logger.warning(
+                f"Output store: {self.directory} still over budget after eviction "
+                f"({stats.files} files, {stats.bytes / 1e6:.1f} MB); remaining files are protected"
+            )
+
+    def _over_budget(self, files, nbytes):
+        return bool((self.max_files and files > self.max_files) or (self.max_bytes and nbytes > self.max_bytes))
+
+    def ensure_started(self, interval):
+        """
+        Starts the background thread once per process (cheap to call often).
+        It flushes accesses every flush_interval and evicts every `interval` seconds.
+        """
+        if self._started_pid == os.getpid():
+            return
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            thread = threading.Thread(
+                target=self._loop, args=(interval,),
+                name=f"output-store-{os.path.basename(self.directory)}", daemon=True
+            )
+            thread.start()
+            self._started_pid = os.getpid()
+
+    def _loop(self, interval):
+        last_evict = time.monotonic()
+        while True:
+            time.sleep(min(self.flush_interval, interval))
+            try:
+                if time.monotonic() - last_evict >= interval:
+                    last_evict = time.monotonic()
+                    stats = self.evict()
+                    if stats.evicted_files:
+                        logger.info(f"Output store {self.directory}: {stats}")
+                else:
+                    self.flush()
+            except Exception as e:
+                logger.error(f"Output store error for {self.directory}: {e}")
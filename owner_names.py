@@ -0,0 +1,82 @@
+"""
+Owner Names - per-worker cache of manufacturer company names.
+
+Fabric responses show the owning mill's company name. Looking the owner up
+row by row cost one database round trip per fabric; listings now project the
+name in their joined query, and everything else resolves names through this
+cache, which loads all missing ids in one batched query.
+
+Entries expire after a TTL so renamed companies show up without a restart.
+"""
+
+import threading
+import time
+
+UNKNOWN_OWNER = "Unknown"
+
+
+class OwnerNameCache:
+    """
+    Maps user ids to company names, loading misses in batches.
+    """
+
+    def __init__(self, loader, ttl=300, max_entries=10000):
+        """
+        Args:
+            loader: Callable(list of ids) -> {id: company_name} for the ids that exist
+            ttl: Seconds a name is served from memory
+            max_entries: Names kept before the cache is cleared
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._names = {}  # id -> (expires_at, company_name or None if no such user)
+        self._lock = threading.Lock()
+
+    def prime(self, names):
+        """Stores names already fetched elsewhere (e.g. a joined listing query)."""
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            if len(self._names) + len(names) > self.max_entries:
+                self._names.clear()
+            for user_id, name in names.items():
+                self._names[user_id] = (expires_at, name)
+
+    def get_many(self, user_ids):
+        """
+        Returns {id: display name} for the given ids (None ids are skipped).
+        Ids without a user map to 'Unknown'.
+        """
+        now = time.monotonic()
+        found = {}
+        missing = set()
+        with self._lock:
+            for user_id in user_ids:
+                if user_id is None:
+                    continue
+                cached = self._names.get(user_id)
+                if cached is not None and cached[0] > now:
+                    found[user_id] = cached[1]
+                else:
+                    missing.add(user_id)
+        if missing:
+            loaded = self.loader(sorted(missing))
+            # Remember absent users too, so they don't cost a query per request
+            fetched = {user_id: loaded.get(user_id) for user_id in missing}
+            self.prime(fetched)
+            found.update(fetched)
+        return {user_id: UNKNOWN_OWNER if name is None else name for user_id, name in found.items()}
+
+    def get(self, user_id):
+        """Returns the display name for one id ('Unknown' without an owner)."""
+        if user_id is None:
+            return UNKNOWN_OWNER
+        return self.get_many([user_id])[user_id]
+
+    def invalidate(self, user_id=None):
+        """Forgets one id, or everything."""
+        with self._lock:
+            if user_id is None:
+                self._names.clear()
+            else:
+                self._names.pop(user_id, None)
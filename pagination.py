@@ -0,0 +1,138 @@
+"""
+Pagination - keyset (cursor) pages for listing endpoints.
+
+`paginate()` issues `OFFSET n` plus a `COUNT(*)` for every page, so deep
+pages get slower the further a client scrolls. A keyset page instead
+continues after the last row the client saw: `WHERE (key) > (last key)
+ORDER BY key LIMIT n`, which an index answers in the same time on every
+page, with no count.
+
+The sort key is a list of (expression, descending) pairs ending in a unique
+column, e.g. [(Fabric.id, False)] or [(search rank, True), (Fabric.id, False)].
+The last row's key values travel to the client as an opaque cursor, bound to
+the query it came from so it cannot be replayed against different filters.
+"""
+
+import base64
+import hashlib
+import json
+
+from sqlalchemy import and_, func, or_, select
+
+CURSOR_VERSION = 1
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a cursor that is malformed or belongs to a different query."""
+
+
+def scope_digest(*parts):
+    """Fingerprint of the query a cursor belongs to (endpoint, filters, search)."""
+    return hashlib.sha1(json.dumps(parts, default=str).encode("utf-8")).hexdigest()[:12]
+
+
+def encode_cursor(scope, values):
+    """
+    Returns an opaque, URL-safe cursor for the key values of a row.
+
+    Args:
+        scope: scope_digest() of the query
+        values: Key values of the last row on the page
+    """
+    payload = json.dumps({"v": CURSOR_VERSION, "s": scope, "k": list(values)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, scope, key_count):
+    """
+    Returns the key values stored in a cursor.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or was issued for another query
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values = payload["k"]
+        valid = payload.get("v") == CURSOR_VERSION and isinstance(values, list)
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        raise InvalidCursorError("Malformed cursor")
+    if valid and payload.get("s") != scope:
+        raise InvalidCursorError("Cursor does not belong to this query")
+    if not valid or len(values) != key_count or not all(isinstance(v, (int, float, str)) for v in values):
+        raise InvalidCursorError("Malformed cursor")
+    return values
+
+
+def order_clauses(keys):
+    """ORDER BY clauses for a sort key."""
+    return [expr.desc() if descending else expr.asc() for expr, descending in keys]
+
+
+def after_key(keys, values):
+    """
+    WHERE clause selecting rows that sort after `values`: the row-value
+    comparison (k1, k2, ...) > (v1, v2, ...), expanded so mixed sort
+    directions work.
+    """
+    clauses = []
+    for index, (expr, descending) in enumerate(keys):
+        equal = [key == value for (key, _), value in zip(keys[:index], values[:index])]
+        clauses.append(and_(*equal, expr < values[index] if descending else expr > values[index]))
+    return or_(*clauses)
+
+
+def keyset_page(query, keys, limit, cursor=None, scope=""):
+    """
+    Fetches one page of a query in key order.
+
+    Args:
+        query: Query to page through (without ORDER BY / LIMIT)
+        keys: Sort key as (expression, descending) pairs; the last must be unique and non-null
+        limit: Rows per page
+        cursor: Cursor from a previous page, or None for the first page
+        scope: scope_digest() of the query's filters
+
+    Returns:
+        (items, next_cursor) - the rows as the query would return them, and the
+        cursor for the following page (None on the last page)
+
+    Raises:
+        InvalidCursorError: For a malformed or foreign cursor
+    """
+    if cursor:
+        query = query.filter(after_key(keys, decode_cursor(cursor, scope, len(keys))))
+    # The key values come back as extra trailing columns of each row
+    query = query.add_columns(*(expr.label(f"_key{index}") for index, (expr, _) in enumerate(keys)))
+    # One extra row tells whether another page exists
+    rows = query.order_by(*order_clauses(keys)).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(scope, rows[-1][-len(keys):]) if has_more else None
+    width = len(rows[0]) - len(keys) if rows else 0
+    items = [row[0] if width == 1 else tuple(row[:width]) for row in rows]
+    return items, next_cursor
+
+
+def count_rows(query, approximate=False):
+    """
+    Counts the rows of a query.
+
+    Args:
+        query: Query to count
+        approximate: On PostgreSQL, return the planner's row estimate instead
+                     of running COUNT(*) (cheap at any table size)
+
+    Returns:
+        (count, is_estimate)
+    """
+    session = query.session
+    if approximate and session.get_bind().dialect.name == "postgresql":
+        compiled = query.statement.compile(session.get_bind())
+        plan = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled.string}", compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"]), True
+    count = session.execute(select(func.count()).select_from(query.order_by(None).subquery())).scalar()
+    return count, False
@@ -0,0 +1,264 @@
+"""
+Query Cache - cached results for public catalog endpoints.
+
+The LIVE catalog changes only when an admin edits it, yet every search and
+group listing queried the database. Results are cached under a normalized
+key of the request (the endpoint plus its cleaned-up parameters), so the
+few dozen queries that make up most traffic are answered from memory.
+
+Freshness:
+
+- An entry younger than `ttl` is served as is.
+- Between `ttl` and `ttl + stale_ttl` it is served immediately while one
+  background refresh recomputes it (stale-while-revalidate).
+- If computing a result fails (database down or timing out), any cached
+  entry for the key is served instead of an error.
+
+Invalidation: every key includes the catalog version, a timestamp in a small
+file shared by all workers on the host. CatalogVersion.bump() after a fabric
+is created, updated or deleted makes every older entry unreachable; they age
+out of the backend on their own.
+
+Backends: MemoryCacheBackend (per-process LRU) and SQLiteCacheBackend (one
+store shared by all workers on the host, surviving restarts).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("memory", "sqlite")
+
+
+class CatalogVersion:
+    """
+    Host-wide version stamp of the catalog, stored in a file.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: File holding the version (created on the first bump)
+        """
+        self.path = path
+
+    def current(self):
+        """Returns the current version string ('0' before the first bump)."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return f.read().strip() or "0"
+        except OSError:
+            return "0"
+
+    def bump(self):
+        """Starts a new version, invalidating every cached result."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(str(time.time_ns()))
+        os.replace(tmp_path, self.path)
+
+
+class MemoryCacheBackend:
+    """
+    Per-process LRU of (stored_at, value) entries.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, stored_at):
+        with self._lock:
+            self._entries[key] = (stored_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_cache (
+    key TEXT PRIMARY KEY,
+    stored_at REAL NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_query_cache_stored_at ON query_cache (stored_at);
+"""
+
+
+class SQLiteCacheBackend:
+    """
+    (stored_at, value) entries in a SQLite file shared by all workers on the host.
+    """
+
+    def __init__(self, db_path, max_entries=10000, prune_every=200):
+        """
+        Args:
+            db_path: Path to the SQLite database file (created if missing)
+            max_entries: Entries kept; the oldest are pruned beyond this
+            prune_every: Writes between prune passes
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        with self._connection() as conn:
+            row = conn.execute("SELECT stored_at, value FROM query_cache WHERE key = ?", (key,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set(self, key, value, stored_at):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO query_cache (key, stored_at, value) VALUES (?, ?, ?)",
+                (key, stored_at, value),
+            )
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                conn.execute(
+                    "DELETE FROM query_cache WHERE key IN "
+                    "(SELECT key FROM query_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM query_cache")
+
+
+class QueryCache:
+    """
+    Stale-while-revalidate result cache over a pluggable backend.
+    """
+
+    def __init__(self, backend, version, ttl=60, stale_ttl=300, observer=None):
+        """
+        Args:
+            backend: MemoryCacheBackend or SQLiteCacheBackend
+            version: CatalogVersion whose bumps invalidate every entry
+            ttl: Seconds an entry is served without recomputing
+            stale_ttl: Further seconds an entry is served while it is refreshed
+                       in the background
+            observer: Optional callable(name, result) with result 'hit',
+                      'stale', 'miss' or 'fallback' (served after an error)
+        """
+        self.backend = backend
+        self.version = version
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.observer = observer
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def make_key(self, name, params):
+        """Cache key for an endpoint and its normalized parameters."""
+        encoded = json.dumps([self.version.current(), name, params], sort_keys=True, default=str)
+        return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+    def _record(self, name, result):
+        if self.observer is not None:
+            self.observer(name, result)
+
+    def get_or_compute(self, name, params, compute):
+        """
+        Returns the cached result for a query, computing it when needed.
+
+        Args:
+            name: Endpoint name (part of the key, used for metrics)
+            params: JSON-serializable normalized parameters
+            compute: Callable() -> str result. Must not depend on the current
+                     request: stale entries are refreshed from a background thread.
+
+        Raises:
+            Whatever compute() raises when no cached entry can stand in
+        """
+        key = self.make_key(name, params)
+        try:
+            entry = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Query cache read failed: {e}")
+            entry = None
+
+        now = time.time()
+        if entry is not None:
+            age = now - entry[0]
+            if age < self.ttl:
+                self._record(name, "hit")
+                return entry[1]
+            if age < self.ttl + self.stale_ttl:
+                self._record(name, "stale")
+                self._refresh_async(key, compute)
+                return entry[1]
+
+        try:
+            value = compute()
+        except Exception as e:
+            if entry is None:
+                raise
+            logger.warning(f"Query cache: serving a stale '{name}' result after an error: {e}")
+            self._record(name, "fallback")
+            return entry[1]
+        self._record(name, "miss")
+        self._store(key, value)
+        return value
+
+    def _store(self, key, value):
+        try:
+            self.backend.set(key, value, time.time())
+        except Exception as e:
+            logger.warning(f"Query cache write failed: {e}")
+
+    def _refresh_async(self, key, compute):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._store(key, compute())
+            except Exception as e:
+                # The stale entry keeps being served until it expires
+                logger.warning(f"Query cache refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="query-cache-refresh", daemon=True).start()
+
+    def invalidate(self):
+        """Invalidates every cached result on this host."""
+        self.version.bump()
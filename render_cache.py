@@ -0,0 +1,151 @@
+"""
+Render Cache - content-addressed lookup for generated mockups.
+
+A render is identified by the files that go into it (fabric, template, mask)
+and the parameters it was rendered with. Each input contributes its absolute
+path, size and mtime, so replacing a swatch or re-exporting a mask produces a
+new key without having to hash image data.
+
+Keys are remembered in memory for the life of the worker and persisted as
+small stamp files next to the outputs, so a key written by one gunicorn worker
+is honoured by the others and survives restarts.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Bump when the renderer changes in a way that invalidates existing outputs
+CACHE_VERSION = 1
+
+STAMP_DIR_NAME = ".render-cache"
+
+
+def file_identity(path):
+    """
+    Returns a cheap identity tuple for a file: (absolute path, size, mtime_ns).
+    Raises OSError if the file does not exist.
+    """
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+class RenderCache:
+    """
+    Maps render keys to output files in the mockup output directory.
+
+    A hit requires the output file to still exist and its stamp to carry the
+    same key; nothing is decoded to answer a lookup.
+    """
+
+    def __init__(self, output_dir, max_entries=4096):
+        """
+        Args:
+            output_dir: Directory where generated mockups are written
+            max_entries: Upper bound on keys remembered in memory
+        """
+        self.output_dir = output_dir
+        self.stamp_dir = os.path.join(output_dir, STAMP_DIR_NAME)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # output_path -> key
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, fabric_path, mockup_path, mask_path, params=None):
+        """
+        Builds the content-addressed key for one render.
+
+        Args:
+            fabric_path: Path to fabric design file
+            mockup_path: Path to base mockup template
+            mask_path: Path to mask file
+            params: Dict of render parameters that affect the output
+
+        Returns:
+            Hex digest string
+        """
+        payload = {
+            "v": CACHE_VERSION,
+            "fabric": file_identity(fabric_path),
+            "mockup": file_identity(mockup_path),
+            "mask": file_identity(mask_path),
+            "params": params or {},
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _stamp_path(self, output_path):
+        return os.path.join(self.stamp_dir, os.path.basename(output_path) + ".key")
+
+    def lookup(self, key, output_path):
+        """
+        Returns True if `output_path` exists and was rendered from `key`.
+        """
+        if not os.path.exists(output_path):
+            with self._lock:
+                self._entries.pop(output_path, None)
+                self.misses += 1
+            return False
+
+        with self._lock:
+            cached = self._entries.get(output_path)
+            if cached == key:
+                self._entries.move_to_end(output_path)
+                self.hits += 1
+                return True
+
+        # Another worker (or a previous process) may have rendered it
+        try:
+            with open(self._stamp_path(output_path), "r", encoding="utf-8") as f:
+                stamped = f.read().strip()
+        except OSError:
+            stamped = None
+
+        with self._lock:
+            if stamped == key:
+                self._remember(output_path, key)
+                self.hits += 1
+                return True
+            self.misses += 1
+        return False
+
+    def store(self, key, output_path):
+        """
+        Records that `output_path` now holds the render for `key`.
+        """
+        try:
+            os.makedirs(self.stamp_dir, exist_ok=True)
+            stamp_path = self._stamp_path(output_path)
+            tmp_path = f"{stamp_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(key)
+            os.replace(tmp_path, stamp_path)
+        except OSError as e:
+            # The in-memory entry still works for this worker
+            logger.warning(f"Render cache: could not write stamp for {output_path}: {e}")
+
+        with self._lock:
+            self._remember(output_path, key)
+
+    def invalidate(self, output_path):
+        """
+        Forgets any key recorded for `output_path`.
+        """
+        with self._lock:
+            self._entries.pop(output_path, None)
+        try:
+            os.remove(self._stamp_path(output_path))
+        except OSError:
+            pass
+
+    def _remember(self, output_path, key):
+        self._entries[output_path] = key
+        self._entries.move_to_end(output_path)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
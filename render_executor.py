@@ -0,0 +1,238 @@
+"""
+Render Executor - runs mockup renders in a process pool.
+
+Rendering is CPU-bound Pillow/NumPy work. Running it in the gunicorn request
+thread ties up one of the sync workers for the whole render, and the face and
+back views of a garment are rendered one after the other. The executor moves
+renders into a pool of worker processes so independent views render
+concurrently and the request thread only waits on futures.
+
+The pool is created lazily, once per server process (gunicorn worker), and
+recreated after a fork, so a host runs workers x RENDER_WORKERS render
+processes. One pool shared by all gunicorn workers would need a separate
+render service to submit to; per-worker pools keep renders in-process, and
+the compiled templates and masks are mmapped from the shared asset store, so
+the extra processes share those pages instead of each holding a copy. Each
+pool process keeps its own CompiledAssetCache.
+
+A running task cannot be cancelled. When a caller times out, the pool its
+tasks run in is retired: new work goes to a fresh pool, the other callers'
+tasks on the retired pool finish normally, and only then are its processes
+(still busy with the timed-out renders) terminated.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+# Set in each pool process by _init_worker()
+_worker_asset_cache = None
+
+
+class RenderTimeoutError(Exception):
+    """Raised when one or more render tasks exceed the per-task timeout."""
+
+
+def _init_worker(asset_cache_bytes, max_image_pixels):
+    """Pool process initializer: per-process asset cache and decoder limits."""
+    global _worker_asset_cache
+    from PIL import Image
+    from asset_cache import CompiledAssetCache
+
+    Image.MAX_IMAGE_PIXELS = max_image_pixels
+    _worker_asset_cache = CompiledAssetCache(asset_cache_bytes)
+
+
+def render_fabric_task(generator_config, fabric_path, views):
+    """
+    Renders one fabric onto one or more garment views inside a pool process.
+    The fabric is decoded once for all views.
+
+    Args:
+        generator_config: Keyword arguments for MockupGeneratorV2 (picklable)
+        fabric_path: Path to fabric design file
+        views: List of (mockup_path, mask_path, output_path) tuples
+
+    Returns:
+        (outcomes, events) - a result per view (see apply_fabric_to_mockups:
+        the encoded bytes where output_path is None), and the generator's render
+        events as (kind, name, value) tuples for the caller to record
+    """
+    from mockup_library import MockupGeneratorV2
+
+    events = []
+    generator = MockupGeneratorV2(
+        asset_cache=_worker_asset_cache,
+        observer=lambda *event: events.append(event),
+        **generator_config
+    )
+    return generator.apply_fabric_to_mockups(fabric_path, views), events
+
+
+class RenderExecutor:
+    """
+    Process pool for render tasks with per-task timeouts and cancellation.
+    """
+
+    def __init__(self, max_workers=2, task_timeout=90, asset_cache_bytes=256 * 1024 * 1024,
+                 max_image_pixels=100000000):
+        """
+        Args:
+            max_workers: Number of render processes
+            task_timeout: Seconds a task may take, measured from submission
+            asset_cache_bytes: Compiled asset budget for each render process
+            max_image_pixels: PIL decompression bomb limit for render processes
+        """
+        self.max_workers = max_workers
+        self.task_timeout = task_timeout
+        self.asset_cache_bytes = asset_cache_bytes
+        self.max_image_pixels = max_image_pixels
+        self._pool = None
+        self._pool_pid = None
+        self._inflight = {}  # pool -> futures submitted to it that are not done
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            # A pool inherited through fork belongs to the parent: start our own
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.asset_cache_bytes, self.max_image_pixels),
+                )
+                self._pool_pid = os.getpid()
+                logger.info(f"Render executor: started pool with {self.max_workers} processes")
+            return self._pool
+
+    def submit(self, fn, *args):
+        """
+        Submits a picklable callable to the pool and returns its Future.
+        """
+        try:
+            pool = self._get_pool()
+            future = pool.submit(fn, *args)
+        except BrokenProcessPool:
+            logger.warning("Render executor: pool was broken, restarting")
+            self._recycle()
+            pool = self._get_pool()
+            future = pool.submit(fn, *args)
+        with self._lock:
+            self._inflight.setdefault(pool, set()).add(future)
+        future.add_done_callback(lambda done: self._untrack(pool, done))
+        return future
+
+    def _untrack(self, pool, future):
+        with self._lock:
+            futures = self._inflight.get(pool)
+            if futures is not None:
+                futures.discard(future)
+
+    def run(self, calls, timeout=None):
+        """
+        Runs independent calls concurrently and waits for all of them.
+
+        Args:
+            calls: List of (fn, args) tuples
+            timeout: Seconds allowed from submission (defaults to task_timeout)
+
+        Returns:
+            List of results in the same order as `calls`. A task that raised
+            contributes None.
+
+        Raises:
+            RenderTimeoutError: If any task did not finish in time. Pending
+                tasks are cancelled and running ones are terminated once
+                other callers' tasks in the same pool have finished.
+        """
+        results = [None] * len(calls)
+        for index, result in self.run_as_completed(calls, timeout):
+            results[index] = result
+        return results
+
+    def run_as_completed(self, calls, timeout=None):
+        """
+        Runs independent calls concurrently, yielding results as they finish.
+
+        Args:
+            calls: List of (fn, args) tuples
+            timeout: Seconds allowed from submission (defaults to task_timeout)
+
+        Yields:
+            (index, result) pairs in completion order. A task that raised
+            yields None as its result.
+
+        Raises:
+            RenderTimeoutError: As for run(). If the consumer stops iterating
+                early, tasks that have not started are cancelled.
+        """
+        timeout = self.task_timeout if timeout is None else timeout
+        futures = [self.submit(fn, *args) for fn, args in calls]
+        positions = {future: index for index, future in enumerate(futures)}
+
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Render executor: task failed: {e}")
+                    result = None
+                yield positions[future], result
+        except FutureTimeoutError:
+            self._cancel(futures)
+            raise RenderTimeoutError(f"Render exceeded {timeout}s timeout")
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _cancel(self, futures):
+        running = {future for future in futures if not future.done() and not future.cancel()}
+        if not running:
+            return
+        with self._lock:
+            pools = [pool for pool, inflight in self._inflight.items() if inflight & running]
+            for pool in pools:
+                # New submissions go to a fresh pool from now on
+                if self._pool is pool:
+                    self._pool = None
+        for pool in pools:
+            threading.Thread(
+                target=self._retire, args=(pool, running), name="render-pool-retire", daemon=True
+            ).start()
+
+    def _retire(self, pool, abandoned):
+        """
+        Terminates a pool whose processes are stuck on timed-out renders,
+        after the other tasks submitted to it have finished.
+        """
+        with self._lock:
+            others = self._inflight.get(pool, set()) - abandoned
+        # Their callers stop waiting after task_timeout, so never wait longer
+        wait(others, timeout=self.task_timeout)
+        if not all(future.done() for future in abandoned):
+            logger.warning("Render executor: terminating retired pool to stop timed-out renders")
+            for process in list((getattr(pool, "_processes", None) or {}).values()):
+                process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._inflight.pop(pool, None)
+
+    def _recycle(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._inflight.pop(pool, None)
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """Stops the pool, cancelling queued tasks."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
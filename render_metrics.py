@@ -0,0 +1,327 @@
+"""
+Render Metrics - minimal in-process metrics registry with Prometheus output.
+
+Counters and histograms are kept in memory per process. Every gunicorn
+worker periodically writes a snapshot of its registry to a shared directory,
+and /metrics merges the snapshots of all live workers, so a scrape that lands
+on any one worker still reports the whole server. Render worker processes
+don't touch the registry directly; their render events are sent back with
+the task result and recorded in the server worker.
+
+Only what the API needs is implemented: counters and histograms with
+labels, text exposition format 0.0.4.
+"""
+
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PIXEL_BUCKETS = (250_000, 1_000_000, 2_000_000, 4_000_000, 8_000_000, 16_000_000, 32_000_000, 64_000_000)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._samples = {}  # label values tuple -> value
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            samples = {json.dumps(list(key)): self._copy(value) for key, value in self._samples.items()}
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "samples": samples,
+        }
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, per label combination."""
+
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._samples[key] = self._samples.get(key, 0) + amount
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values, per label combination."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=SECONDS_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            sample = self._samples.get(key)
+            if sample is None:
+                sample = self._samples[key] = {"buckets": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            # Non-cumulative counts; the last slot is +Inf
+            sample["buckets"][index] += 1
+            sample["sum"] += value
+            sample["count"] += 1
+
+    @staticmethod
+    def _copy(value):
+        return {"buckets": list(value["buckets"]), "sum": value["sum"], "count": value["count"]}
+
+    def snapshot(self):
+        data = super().snapshot()
+        data["buckets"] = list(self.buckets)
+        return data
+
+
+def merge_snapshots(snapshots):
+    """
+    Sums several registry snapshots into one.
+
+    Args:
+        snapshots: List of {metric name: metric snapshot} dicts
+    """
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.get(name)
+            if target is None:
+                merged[name] = json.loads(json.dumps(metric))
+                continue
+            if target["type"] != metric["type"] or target.get("buckets") != metric.get("buckets"):
+                continue
+            for key, value in metric["samples"].items():
+                current = target["samples"].get(key)
+                if current is None:
+                    target["samples"][key] = json.loads(json.dumps(value))
+                elif metric["type"] == "histogram":
+                    current["buckets"] = [a + b for a, b in zip(current["buckets"], value["buckets"])]
+                    current["sum"] += value["sum"]
+                    current["count"] += value["count"]
+                else:
+                    target["samples"][key] = current + value
+    return merged
+
+
+def render_snapshot(snapshot):
+    """Formats a registry snapshot in the Prometheus text exposition format."""
+    lines = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        labelnames = metric["labelnames"]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for key in sorted(metric["samples"]):
+            labelvalues = json.loads(key)
+            value = metric["samples"][key]
+            if metric["type"] == "histogram":
+                cumulative = 0
+                bounds = list(metric["buckets"]) + [math.inf]
+                for bound, count in zip(bounds, value["buckets"]):
+                    cumulative += count
+                    labels = _labels_text(labelnames, labelvalues, ("le", _format_value(bound)))
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                labels = _labels_text(labelnames, labelvalues)
+                lines.append(f"{name}_sum{labels} {_format_value(value['sum'])}")
+                lines.append(f"{name}_count{labels} {value['count']}")
+            else:
+                lines.append(f"{name}{_labels_text(labelnames, labelvalues)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """
+    Process-local metrics, optionally shared with sibling processes through
+    snapshot files in `directory`.
+    """
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        """
+        Args:
+            directory: Shared snapshot directory (None = this process only)
+            flush_interval: Minimum seconds between snapshot writes
+        """
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=SECONDS_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self):
+        """Returns {metric name: snapshot} for this process."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.directory, f"metrics-{pid}.json")
+
+    def flush(self, force=False):
+        """Writes this process's snapshot for sibling processes (throttled)."""
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        path = self._snapshot_path(os.getpid())
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Metrics: could not write snapshot: {e}")
+
+    def collect(self):
+        """
+        Returns the merged snapshot of this process and every live sibling.
+        Snapshots left behind by exited processes are removed.
+        """
+        snapshots = [self.snapshot()]
+        if not self.directory:
+            return snapshots[0]
+
+        own = os.path.basename(self._snapshot_path(os.getpid()))
+        try:
+            filenames = os.listdir(self.directory)
+        except OSError:
+            filenames = []
+        for filename in filenames:
+            if filename == own or not (filename.startswith("metrics-") and filename.endswith(".json")):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                pid = int(filename[len("metrics-"):-len(".json")])
+            except ValueError:
+                continue
+            if not _pid_alive(pid):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return merge_snapshots(snapshots)
+
+    def render(self):
+        """Returns the Prometheus text for all live processes."""
+        return render_snapshot(self.collect())
+
+
+class RenderMetrics:
+    """
+    Render metrics recorded from MockupGeneratorV2 observer events.
+
+    Usable directly as the generator's `observer` callable.
+    """
+
+    def __init__(self, registry):
+        self.stage_seconds = registry.histogram(
+            "mockup_render_stage_seconds",
+            "Time spent in each mockup render stage",
+            ("stage",),
+        )
+        self.pixels = registry.histogram(
+            "mockup_render_pixels",
+            "Pixel counts of decoded fabrics (input) and rendered mockups (output)",
+            ("kind",),
+            buckets=PIXEL_BUCKETS,
+        )
+        self.cache_requests = registry.counter(
+            "mockup_cache_requests_total",
+            "Render and compiled-asset cache lookups",
+            ("cache", "result"),
+        )
+
+    def __call__(self, kind, name, value):
+        """
+        Records one generator event.
+
+        Args:
+            kind: 'stage' (value in seconds), 'pixels' (value is a pixel count)
+                  or 'cache' (value is True for a hit)
+            name: Stage name, pixel kind ('input'/'output') or cache name
+        """
+        if kind == "stage":
+            self.stage_seconds.observe(value, stage=name)
+        elif kind == "pixels":
+            self.pixels.observe(value, kind=name)
+        elif kind == "cache":
+            self.cache_requests.inc(cache=name, result="hit" if value else "miss")
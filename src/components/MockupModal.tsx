@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Fabric } from '../types';
 import { X, Shirt, ZoomIn, Check, Plus, Loader2, ArrowLeft, FileText } from 'lucide-react';
 import { Dialog, DialogContent, DialogOverlay } from './ui/dialog';
@@ -23,8 +23,13 @@ interface MockupData {
     back?: string;
     single?: string;
   };
+  quality?: 'preview' | 'full';
+  full_job_id?: string;
 }
 
+const FULL_RENDER_POLL_MS = 1000;
+const FULL_RENDER_MAX_POLLS = 90;
+
 interface Garment {
   name: string;
   displayName: string;
@@ -51,9 +56,39 @@ export const MockupModal: React.FC<MockupModalProps> = ({ fabric, isSelected, on
   const [currentView, setCurrentView] = useState<'face' | 'back' | 'single'>('face');
   const [showTechpackModal, setShowTechpackModal] = useState(false);
   const [currentGarmentName, setCurrentGarmentName] = useState<string>('');
+  // Incremented per garment selection so stale full-quality polls are dropped
+  const requestSeq = useRef(0);
+
+  useEffect(() => {
+    return () => {
+      requestSeq.current += 1;
+    };
+  }, []);
+
+  const pollFullRender = async (jobId: string, seq: number) => {
+    for (let i = 0; i < FULL_RENDER_MAX_POLLS; i++) {
+      await new Promise((resolve) => setTimeout(resolve, FULL_RENDER_POLL_MS));
+      if (seq !== requestSeq.current) return;
+      try {
+        const response = await api.get(`/mockup-jobs/${jobId}`);
+        if (!response.ok) return;
+        const job = await response.json();
+        if (seq !== requestSeq.current) return;
+        if (job.status === 'done') {
+          setMockupData({ success: true, views: job.views, mockups: job.mockups, quality: 'full' });
+          return;
+        }
+        if (job.status === 'failed') return; // Keep showing the preview
+      } catch (err) {
+        console.error('Error polling full-quality mockup:', err);
+        return;
+      }
+    }
+  };
 
   useEffect(() => {
     if (!fabric) {
+      requestSeq.current += 1;
       setGarments({});
       setMockupData(null);
       setError(null);
@@ -90,6 +125,7 @@ export const MockupModal: React.FC<MockupModalProps> = ({ fabric, isSelected, on
 
   const handleGarmentSelect = async (garment: Garment) => {
     if (!fabric) return;
+    const seq = ++requestSeq.current;
 
     try {
       setIsGenerating(true);
@@ -103,7 +139,9 @@ export const MockupModal: React.FC<MockupModalProps> = ({ fabric, isSelected, on
       const response = await api.post('/generate-mockup', {
         fabric_ref: fabricRef,
         mockup_name: garment.name,
+        quality: 'preview',
       });
+      if (seq !== requestSeq.current) return;
 
       if (response.ok) {
         const data = await response.json();
@@ -112,6 +150,10 @@ export const MockupModal: React.FC<MockupModalProps> = ({ fabric, isSelected, on
           if (data.mockups.face) setCurrentView('face');
           else if (data.mockups.back) setCurrentView('back');
           else if (data.mockups.single) setCurrentView('single');
+          // Swap in the full-quality render once it is ready
+          if (data.quality === 'preview' && data.full_job_id) {
+            pollFullRender(data.full_job_id, seq);
+          }
         } else {
           setError(data.error || 'Failed to generate mockup');
         }
@@ -122,11 +164,12 @@ export const MockupModal: React.FC<MockupModalProps> = ({ fabric, isSelected, on
       console.error('Error generating mockup:', err);
       setError('Network error. Please check your connection.');
     } finally {
-      setIsGenerating(false);
+      if (seq === requestSeq.current) setIsGenerating(false);
     }
   };
 
   const handleBack = () => {
+    requestSeq.current += 1;
     setViewMode('select');
     setMockupData(null);
     setSelectedGarment(null);
@@ -27,6 +27,7 @@ fi
 # -b 0.0.0.0:5000: Binds to all network interfaces on port 5000
 # --timeout 120: Gives workers 120 seconds to finish (crucial for image generation/mockups)
 # --access-logfile -: Logs access to console (useful for debugging via systemd logs)
+# -c gunicorn.conf.py: Worker hooks (starts the mockup job runner in each worker)
 
 echo "Starting Fab-Ai Production Server..."
-exec gunicorn -w 4 -b 0.0.0.0:5000 --timeout 120 --access-logfile - api_server:app
+exec gunicorn -c gunicorn.conf.py -w 4 -b 0.0.0.0:5000 --timeout 120 --access-logfile - api_server:app
@@ -0,0 +1,165 @@
+"""
+Swatch Pyramid - power-of-two downscaled copies of fabric swatches.
+
+Renders usually stretch a swatch into a mask bbox that is a fraction of the
+swatch's size, yet decoding always started from the full original. The
+pyramid keeps half, quarter, ... size copies of each swatch so the renderer
+can decode the smallest level that is still at least the target size.
+
+Levels are built once per swatch and rebuilt when the source file's size or
+mtime changes. The first level is decoded directly at half size (JPEG draft
+mode, or reduce() right after decoding), so building never holds a full-size
+converted copy of the original; each further level halves the previous one. Each swatch gets its own directory under the pyramid root with
+a small manifest describing the source it was built from.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from PIL import Image
+
+from image_decoding import decode_image
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+
+class SwatchPyramid:
+    """
+    Builds and selects downscaled levels for fabric swatches.
+    """
+
+    def __init__(self, root_dir, min_size=256):
+        """
+        Args:
+            root_dir: Directory where pyramid levels are stored
+            min_size: Stop halving once the longer side would drop below this
+        """
+        self.root_dir = root_dir
+        self.min_size = min_size
+        self._manifests = {}  # source path -> manifest dict
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Picklable for render worker processes; they keep their own manifest cache
+        return {"root_dir": self.root_dir, "min_size": self.min_size}
+
+    def __setstate__(self, state):
+        self.__init__(state["root_dir"], state["min_size"])
+
+    def _level_dir(self, source_path):
+        digest = hashlib.sha1(os.path.abspath(source_path).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.root_dir, digest)
+
+    @staticmethod
+    def _identity(source_path):
+        st = os.stat(source_path)
+        return [os.path.abspath(source_path), st.st_size, st.st_mtime_ns]
+
+    def levels(self, source_path, max_bytes=None):
+        """
+        Returns the pyramid for a swatch, building it if missing or stale.
+
+        Args:
+            source_path: Path to the original swatch
+            max_bytes: Optional memory budget for decoding the original when
+                       the pyramid has to be built
+
+        Returns:
+            List of (path, (width, height)) from largest (the source) to smallest
+        """
+        identity = self._identity(source_path)
+
+        with self._lock:
+            manifest = self._manifests.get(source_path)
+        if manifest is None or manifest["source"] != identity:
+            manifest = self._read_manifest(source_path)
+            if manifest is None or manifest["source"] != identity:
+                manifest = self._build(source_path, identity, max_bytes)
+            with self._lock:
+                self._manifests[source_path] = manifest
+
+        level_dir = self._level_dir(source_path)
+        levels = [(source_path, tuple(manifest["size"]))]
+        levels.extend(
+            (os.path.join(level_dir, name), (width, height))
+            for name, width, height in manifest["levels"]
+        )
+        return levels
+
+    def select(self, source_path, target_size, max_bytes=None):
+        """
+        Returns the path of the smallest level at least `target_size` in both
+        dimensions. Falls back to the source if the pyramid cannot be used.
+
+        Args:
+            source_path: Path to the original swatch
+            target_size: (width, height) the swatch will be resized to
+            max_bytes: Optional decode memory budget for building the pyramid
+        """
+        try:
+            levels = self.levels(source_path, max_bytes)
+        except Exception as e:
+            logger.warning(f"Swatch pyramid unavailable for {source_path}: {e}")
+            return source_path
+
+        target_w, target_h = target_size
+        best = source_path
+        for path, (width, height) in levels:
+            if width >= target_w and height >= target_h and os.path.exists(path):
+                best = path
+            else:
+                break
+        return best
+
+    def _read_manifest(self, source_path):
+        try:
+            with open(os.path.join(self._level_dir(source_path), MANIFEST_NAME), "r",
+                      encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _build(self, source_path, identity, max_bytes=None):
+        level_dir = self._level_dir(source_path)
+        os.makedirs(level_dir, exist_ok=True)
+
+        with Image.open(source_path) as img:
+            size = img.size
+            # Lossy sources keep a lossy pyramid; everything else stays lossless
+            lossy = img.format == "JPEG"
+            mode = img.mode if img.mode in ("RGB", "RGBA", "L", "LA") else "RGBA"
+
+        levels = []
+        if max(size) // 2 >= self.min_size:
+            # The first level is decoded straight at half size (JPEG draft mode,
+            # reduce() right after decoding otherwise), never as a full-size copy
+            current = decode_image(source_path, mode, (size[0] // 2, size[1] // 2),
+                                   max_bytes=max_bytes, reducing_gap=1.0)
+            index = 1
+            while True:
+                ext = ".jpg" if lossy and current.mode in ("RGB", "L") else ".png"
+                name = f"level{index}{ext}"
+                tmp_path = os.path.join(level_dir, f"{name}.{os.getpid()}.tmp")
+                if ext == ".jpg":
+                    current.save(tmp_path, "JPEG", quality=95)
+                else:
+                    current.save(tmp_path, "PNG", compress_level=1)
+                os.replace(tmp_path, os.path.join(level_dir, name))
+                levels.append([name, current.size[0], current.size[1]])
+                if max(current.size) // 2 < self.min_size:
+                    break
+                current = current.reduce(2)
+                index += 1
+
+        manifest = {"source": identity, "size": list(size), "levels": levels}
+        tmp_manifest = os.path.join(level_dir, f"{MANIFEST_NAME}.{os.getpid()}.tmp")
+        with open(tmp_manifest, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_manifest, os.path.join(level_dir, MANIFEST_NAME))
+        logger.info(f"Swatch pyramid: built {len(levels)} level(s) for {os.path.basename(source_path)}")
+        return manifest
@@ -0,0 +1,67 @@
+"""
+Test configuration. The application modules live at the project root;
+`render_inputs` (and its `pair` of template/mask paths) is the fabric,
+template and mask setup shared by the render, cache and store tests.
+
+Run from the project root:
+    pip install -r requirements-dev.txt
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+from PIL import Image, ImageDraw
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+class RenderInputs:
+    """
+    A small render setup laid out like the app's directories: a fabric swatch
+    in fabrics/, a garment template in mockups/, its mask in masks/ and an
+    empty out/ for generated mockups. Attributes are string paths.
+    """
+
+    fabric_ref = "FAB-1"
+    garment = "polo"
+
+    def __init__(self, root):
+        self.fabric_dir = os.path.join(root, "fabrics")
+        self.mockup_dir = os.path.join(root, "mockups")
+        self.mask_dir = os.path.join(root, "masks")
+        self.output_dir = os.path.join(root, "out")
+        for directory in (self.fabric_dir, self.mockup_dir, self.mask_dir, self.output_dir):
+            os.makedirs(directory, exist_ok=True)
+
+        self.fabric = os.path.join(self.fabric_dir, f"{self.fabric_ref}.jpg")
+        Image.new("RGB", (64, 64), (30, 90, 150)).save(self.fabric)
+        self.mockup, self.mask = self.add_garment(self.garment)
+
+    @property
+    def pair(self):
+        """(template, mask) paths of the default garment."""
+        return self.mockup, self.mask
+
+    def add_garment(self, name, size=(80, 100)):
+        """Writes a template and mask for another garment; returns their paths."""
+        mockup = os.path.join(self.mockup_dir, f"{name}.png")
+        mask = os.path.join(self.mask_dir, f"{name}_mask.png")
+        Image.new("RGBA", size, (235, 235, 235, 255)).save(mockup)
+        mask_img = Image.new("L", size, 0)
+        ImageDraw.Draw(mask_img).rectangle([size[0] // 8, size[1] // 5, size[0] * 7 // 8, size[1] * 9 // 10], fill=255)
+        mask_img.save(mask)
+        return mockup, mask
+
+
+@pytest.fixture
+def render_inputs(tmp_path):
+    return RenderInputs(str(tmp_path))
+
+
+@pytest.fixture
+def pair(render_inputs):
+    return render_inputs.pair
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+from PIL import Image
+
+from asset_cache import CompiledAsset, CompiledAssetCache
+
+
+def make_asset(size=(10, 10)):
+    return CompiledAsset(Image.new("RGBA", size), Image.new("L", size), (0, 0) + size)
+
+
+class Compiler:
+    def __init__(self, size=(10, 10)):
+        self.calls = 0
+        self.size = size
+
+    def __call__(self, mockup_path, mask_path):
+        self.calls += 1
+        return make_asset(self.size)
+
+
+def test_compiles_once_per_pair(pair):
+    cache, compile_fn = CompiledAssetCache(), Compiler()
+    first = cache.get(*pair, compile_fn)
+    assert cache.get(*pair, compile_fn) is first
+    assert compile_fn.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_variants_are_cached_separately(pair):
+    cache, compile_fn = CompiledAssetCache(), Compiler()
+    cache.get(*pair, compile_fn)
+    cache.get(*pair, compile_fn, variant="preview")
+    assert compile_fn.calls == 2
+
+
+def test_changed_source_recompiles(pair):
+    cache, compile_fn = CompiledAssetCache(), Compiler()
+    cache.get(*pair, compile_fn)
+    with open(pair[1], "ab") as f:
+        f.write(b" re-exported")
+    cache.get(*pair, compile_fn)
+    assert compile_fn.calls == 2
+
+
+def test_memory_budget_evicts_least_recently_used(render_inputs):
+    # Each 10x10 asset is 500 bytes (RGBA template + L alpha)
+    cache, compile_fn = CompiledAssetCache(max_bytes=1000), Compiler()
+    pairs = [render_inputs.add_garment(name) for name in ("a", "b", "c")]
+    cache.get(*pairs[0], compile_fn)
+    cache.get(*pairs[1], compile_fn)
+    cache.get(*pairs[0], compile_fn)
+    cache.get(*pairs[2], compile_fn)
+    assert cache.current_bytes == 1000
+    calls = compile_fn.calls
+    cache.get(*pairs[0], compile_fn)
+    assert compile_fn.calls == calls
+    cache.get(*pairs[1], compile_fn)
+    assert compile_fn.calls == calls + 1
+
+
+def test_oversized_asset_is_returned_but_not_kept(pair):
+    cache, compile_fn = CompiledAssetCache(max_bytes=100), Compiler()
+    assert cache.get(*pair, compile_fn) is not None
+    assert cache.current_bytes == 0
+
+
+def test_missing_source_raises(pair):
+    os.remove(pair[0])
+    with pytest.raises(OSError):
+        CompiledAssetCache().get(*pair, Compiler())
@@ -0,0 +1,61 @@
+import os
+
+from PIL import Image
+
+from asset_cache import CompiledAsset
+from asset_store import CompiledAssetStore
+
+
+def make_asset():
+    template = Image.new("RGBA", (8, 6), (10, 20, 30, 255))
+    template.putpixel((1, 2), (200, 100, 50, 128))
+    alpha = Image.new("L", (8, 6), 0)
+    alpha.putpixel((3, 4), 255)
+    return CompiledAsset(template, alpha, (3, 4, 1, 1), alpha_box=(3, 4, 4, 5))
+
+
+def test_write_then_load_round_trips(tmp_path, pair):
+    store = CompiledAssetStore(str(tmp_path / "compiled"))
+    asset = make_asset()
+    store.write(*pair, asset)
+    assert store.is_current(*pair)
+
+    loaded = store.load(*pair)
+    assert loaded.shared and loaded.nbytes == 0
+    assert loaded.template.tobytes() == asset.template.tobytes()
+    assert loaded.alpha.tobytes() == asset.alpha.tobytes()
+    assert loaded.bbox == (3, 4, 1, 1)
+    assert loaded.alpha_box == (3, 4, 4, 5)
+
+
+def test_missing_entry_loads_none(tmp_path, pair):
+    store = CompiledAssetStore(str(tmp_path / "compiled"))
+    assert store.load(*pair) is None
+    assert not store.is_current(*pair)
+
+
+def test_changed_source_is_ignored_until_recompiled(tmp_path, pair):
+    store = CompiledAssetStore(str(tmp_path / "compiled"))
+    store.write(*pair, make_asset())
+    with open(pair[0], "ab") as f:
+        f.write(b" edited")
+    assert store.load(*pair) is None
+    assert not store.is_current(*pair)
+
+
+def test_truncated_pixels_are_rejected(tmp_path, pair):
+    store = CompiledAssetStore(str(tmp_path / "compiled"))
+    store.write(*pair, make_asset())
+    with open(os.path.join(store.entry_dir(*pair), "template.rgba"), "r+b") as f:
+        f.truncate(10)
+    assert store.load(*pair) is None
+
+
+def test_prune_keeps_listed_pairs(tmp_path, render_inputs, pair):
+    other = render_inputs.add_garment("other")
+    store = CompiledAssetStore(str(tmp_path / "compiled"))
+    store.write(*pair, make_asset())
+    store.write(*other, make_asset())
+    assert store.prune([pair]) == 1
+    assert store.is_current(*pair)
+    assert not store.is_current(*other)
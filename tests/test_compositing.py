@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from compositing import composite, composite_numpy, composite_pillow
+
+SIZE = (120, 90)
+
+
+def random_image(rng, mode, size):
+    channels = len(mode)
+    return Image.fromarray(rng.integers(0, 256, (size[1], size[0], channels), dtype=np.uint8), mode)
+
+
+def make_inputs(box, seed=0, fabric_mode="RGBA"):
+    """Template with mixed opacity, a soft mask filling `box` and a fabric stretched to it."""
+    rng = np.random.default_rng(seed)
+    template = np.array(random_image(rng, "RGBA", SIZE))
+    template[:10, :, 3] = 0  # fully transparent band
+    template[-10:, :, 3] = 255  # fully opaque band
+    template = Image.fromarray(template, "RGBA")
+
+    x1, y1, x2, y2 = box
+    mask = np.zeros((SIZE[1], SIZE[0]), dtype=np.uint8)
+    mask[y1:y2, x1:x2] = rng.integers(0, 256, (y2 - y1, x2 - x1), dtype=np.uint8)
+    mask[y1:y2, x1] = 255  # keep the bbox touching every side of `box`
+    mask[y1, x1:x2] = 255
+    mask[y2 - 1, x1:x2] = 255
+    mask[y1:y2, x2 - 1] = 255
+    alpha = Image.fromarray(mask, "L")
+
+    fabric = random_image(rng, fabric_mode, (x2 - x1, y2 - y1))
+    return template, alpha, fabric, (x1, y1)
+
+
+def max_difference(first, second):
+    assert first.mode == second.mode == "RGBA"
+    assert first.size == second.size
+    return int(np.abs(np.asarray(first, dtype=np.int16) - np.asarray(second, dtype=np.int16)).max())
+
+
+@pytest.mark.parametrize("box", [
+    (20, 15, 90, 70),  # inside the template
+    (0, 0, 120, 90),  # whole template
+    (0, 30, 50, 90),  # left and bottom edges
+    (70, 0, 120, 40),  # top and right edges
+])
+@pytest.mark.parametrize("fabric_mode", ["RGB", "RGBA"])
+def test_engines_match_within_one(box, fabric_mode):
+    template, alpha, fabric, position = make_inputs(box, fabric_mode=fabric_mode)
+    expected = composite_pillow(template, alpha, fabric, position)
+    result = composite_numpy(template, alpha, fabric, position, alpha.getbbox())
+    assert max_difference(expected, result) <= 1
+
+
+def test_fabric_smaller_than_mask_is_backed_with_white():
+    template, alpha, _, _ = make_inputs((10, 10, 110, 80), seed=1)
+    fabric = random_image(np.random.default_rng(2), "RGB", (40, 30))
+    expected = composite_pillow(template, alpha, fabric, (60, 60))
+    assert max_difference(expected, composite_numpy(template, alpha, fabric, (60, 60))) <= 1
+
+
+def test_empty_mask_leaves_template_unchanged():
+    template, _, fabric, position = make_inputs((20, 15, 90, 70))
+    alpha = Image.new("L", SIZE, 0)
+    result = composite("numpy", template, alpha, fabric, position)
+    assert result.tobytes() == template.tobytes()
+    assert result is not template
+
+
+def test_unknown_engine():
+    template, alpha, fabric, position = make_inputs((20, 15, 90, 70))
+    with pytest.raises(ValueError):
+        composite("opencv", template, alpha, fabric, position)
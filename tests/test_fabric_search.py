@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, declarative_base
+
+from fabric_search import (
+    MAX_WORDS, LikeFabricSearch, PostgresFabricSearch, create_fabric_search, search_words
+)
+
+Base = declarative_base()
+
+
+class Fabric(Base):
+    __tablename__ = "fabric"
+    id = Column(Integer, primary_key=True)
+    ref = Column(String)
+    fabrication = Column(String)
+    fabric_group = Column(String)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([
+            Fabric(id=1, ref="XCOT-9", fabrication="Single jersey", fabric_group="Knit"),
+            Fabric(id=2, ref="COT-101", fabrication="Twill", fabric_group="Woven"),
+            Fabric(id=3, ref="cot", fabrication="Poplin", fabric_group="Woven"),
+            Fabric(id=4, ref="POL-1", fabrication="Cotton fleece", fabric_group="Knit"),
+            Fabric(id=5, ref="VIS-2", fabrication="Satin", fabric_group="Woven"),
+        ])
+        session.commit()
+    return engine
+
+
+def test_search_words_strips_punctuation_and_caps_words():
+    assert search_words("cotton-jersey, 180_gsm!") == ["cotton", "jersey", "180", "gsm"]
+    assert len(search_words("a " * 20)) == MAX_WORDS
+
+
+def test_like_search_ranks_ref_matches_first(engine):
+    search = LikeFabricSearch(Fabric)
+    with Session(engine) as session:
+        query = search.filter(session.query(Fabric), " COT ")
+        rows = query.order_by(search.rank(" COT ").desc(), Fabric.id).all()
+    # Exact ref, ref prefix, ref substring, then other columns
+    assert [row.id for row in rows] == [3, 2, 1, 4]
+
+
+def test_sqlite_uses_like_search(engine):
+    assert isinstance(create_fabric_search(engine, Fabric), LikeFabricSearch)
+    assert create_fabric_search(engine, Fabric).name == "like"
+
+
+def test_postgres_filter_uses_indexed_operators(engine):
+    with Session(engine) as session:
+        query = PostgresFabricSearch(Fabric).filter(session.query(Fabric), "jers 101")
+        sql = str(query.statement.compile(dialect=postgresql.dialect()))
+    assert "fabric.search_vector @@ to_tsquery" in sql
+    assert "<%" in sql
+    assert "ILIKE" in sql
+
+
+def test_postgres_filter_without_words_skips_full_text(engine):
+    with Session(engine) as session:
+        query = PostgresFabricSearch(Fabric).filter(session.query(Fabric), "--")
+        sql = str(query.statement.compile(dialect=postgresql.dialect()))
+    assert "to_tsquery" not in sql
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+from PIL import Image
+
+from image_decoding import DecodeBudgetError, check_decode_budget, decode_image
+from mockup_library import MockupGeneratorV2
+from swatch_pyramid import SwatchPyramid
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def large_swatch(render_inputs):
+    path = os.path.join(render_inputs.fabric_dir, "BIG-1.png")
+    Image.new("RGB", (4000, 4000), (120, 30, 60)).save(path, compress_level=1)
+    return path
+
+
+def make_generator(inputs, swatch_pyramid=None, max_decode_bytes=20 * MB):
+    return MockupGeneratorV2(
+        inputs.fabric_dir, inputs.mockup_dir, inputs.mask_dir, inputs.output_dir,
+        swatch_pyramid=swatch_pyramid, max_decode_bytes=max_decode_bytes
+    )
+
+
+def test_decode_reduces_to_target(large_swatch):
+    image = decode_image(large_swatch, "RGB", (500, 500))
+    assert image.size == (1000, 1000)
+    assert image.mode == "RGB"
+
+
+def test_check_reads_header_only(large_swatch):
+    check_decode_budget(large_swatch, "RGBA", (500, 500), max_bytes=None)
+    with pytest.raises(DecodeBudgetError):
+        check_decode_budget(large_swatch, "RGBA", (500, 500), max_bytes=20 * MB)
+
+
+def test_over_budget_swatch_raises_without_pyramid(render_inputs, large_swatch):
+    with pytest.raises(DecodeBudgetError):
+        make_generator(render_inputs).load_fabric(large_swatch, (500, 500))
+
+
+def test_over_budget_swatch_raises_with_pyramid(tmp_path, render_inputs, large_swatch):
+    pyramid = SwatchPyramid(str(tmp_path / "pyramids"))
+    generator = make_generator(render_inputs, swatch_pyramid=pyramid)
+    with pytest.raises(DecodeBudgetError):
+        generator.load_fabric(large_swatch, (500, 500))
+    # Rejected before the original was decoded to build levels
+    assert not (tmp_path / "pyramids").exists()
+
+
+def test_pyramid_is_built_within_budget(tmp_path, render_inputs, large_swatch):
+    pyramid = SwatchPyramid(str(tmp_path / "pyramids"))
+    generator = make_generator(render_inputs, swatch_pyramid=pyramid, max_decode_bytes=200 * MB)
+    # Decoded from the 500x500 level instead of the original
+    assert generator.load_fabric(large_swatch, (500, 500)).size == (500, 500)
+    assert len(pyramid.levels(large_swatch)) > 1
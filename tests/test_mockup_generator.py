@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from mockup_library import MockupGeneratorV2
+from render_cache import RenderCache
+
+
+@pytest.fixture
+def generator(render_inputs):
+    return MockupGeneratorV2(
+        render_inputs.fabric_dir, render_inputs.mockup_dir, render_inputs.mask_dir, render_inputs.output_dir,
+        render_cache=RenderCache(render_inputs.output_dir)
+    )
+
+
+def render(generator, inputs):
+    (_, _, files), = generator.generate_combinations([(inputs.fabric_ref, inputs.garment)])
+    return files
+
+
+def age(path):
+    old = os.stat(path).st_mtime_ns - 3600 * 10**9
+    os.utime(path, ns=(old, old))
+    return old
+
+
+def test_stamped_output_is_served_from_cache(generator, render_inputs):
+    path, = render(generator, render_inputs)
+    old = age(path)
+    assert render(generator, render_inputs) == [path]
+    assert os.stat(path).st_mtime_ns == old
+
+
+def test_invalidated_output_is_rendered_again(generator, render_inputs):
+    # pregenerate-mockups --force relies on this: stamps would otherwise count as done
+    path, = render(generator, render_inputs)
+    old = age(path)
+    generator.invalidate_cached_mockup(render_inputs.fabric_ref, render_inputs.garment)
+    assert generator.find_cached_mockup(render_inputs.fabric_ref, render_inputs.garment) is None
+    assert render(generator, render_inputs) == [path]
+    assert os.stat(path).st_mtime_ns > old
+    assert generator.find_cached_mockup(render_inputs.fabric_ref, render_inputs.garment) == [path]
@@ -0,0 +1,109 @@
+import os
+import time
+
+import pytest
+
+from output_store import LOCK_NAME, OutputStore
+
+HOUR_NS = 3600 * 10**9
+
+
+def make_file(directory, name, size, age_hours):
+    """Writes a file whose atime and mtime lie `age_hours` in the past."""
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    stamp = time.time_ns() - int(age_hours * HOUR_NS)
+    os.utime(path, ns=(stamp, stamp))
+    return path
+
+
+def remaining(directory):
+    return sorted(
+        name for name in os.listdir(directory)
+        if name != LOCK_NAME and os.path.isfile(os.path.join(directory, name))
+    )
+
+
+@pytest.fixture
+def outputs(tmp_path):
+    directory = str(tmp_path)
+    for index, age in enumerate((5, 4, 3, 2, 1)):
+        make_file(directory, f"out{index}.png", 100, age)
+    return directory
+
+
+def test_within_budget_evicts_nothing(outputs):
+    stats = OutputStore(outputs, max_bytes=500, protect_seconds=0).evict()
+    assert stats.evicted_files == 0
+    assert stats.files == 5 and stats.bytes == 500
+    assert len(remaining(outputs)) == 5
+
+
+def test_byte_budget_evicts_least_recently_accessed(outputs):
+    stats = OutputStore(outputs, max_bytes=300, protect_seconds=0).evict()
+    assert stats.evicted_files == 2 and stats.evicted_bytes == 200
+    assert remaining(outputs) == ["out2.png", "out3.png", "out4.png"]
+
+
+def test_file_budget(outputs):
+    OutputStore(outputs, max_files=1, protect_seconds=0).evict()
+    assert remaining(outputs) == ["out4.png"]
+
+
+def test_touch_moves_file_to_the_back(outputs):
+    store = OutputStore(outputs, max_files=4, protect_seconds=0)
+    store.touch(os.path.join(outputs, "out0.png"))
+    store.evict()
+    assert "out0.png" in remaining(outputs)
+    assert "out1.png" not in remaining(outputs)
+
+
+def test_protection_window_keeps_recent_files(outputs):
+    # Files from the last 2.5 hours are protected, even over budget
+    stats = OutputStore(outputs, max_files=1, protect_seconds=2.5 * 3600).evict()
+    assert remaining(outputs) == ["out3.png", "out4.png"]
+    assert stats.evicted_files == 3
+    assert stats.files == 2
+
+
+def test_files_being_served_are_kept(outputs):
+    store = OutputStore(outputs, max_files=4, protect_seconds=0)
+    oldest = os.path.join(outputs, "out0.png")
+    with store.serving(oldest):
+        store.evict()
+        assert os.path.exists(oldest)
+    assert "out1.png" not in remaining(outputs)
+
+
+def test_dry_run_reports_without_deleting(outputs):
+    stats = OutputStore(outputs, max_files=2, protect_seconds=0).evict(dry_run=True)
+    assert stats.evicted_files == 3 and stats.files == 2
+    assert len(remaining(outputs)) == 5
+
+
+def test_ignores_subdirectories_dotfiles_and_partial_writes(outputs):
+    os.makedirs(os.path.join(outputs, "_thumbs"))
+    make_file(os.path.join(outputs, "_thumbs"), "old.webp", 100, 10)
+    make_file(outputs, ".hidden", 100, 10)
+    make_file(outputs, "partial.png.tmp", 100, 10)
+    stats = OutputStore(outputs, max_files=5, protect_seconds=0).evict()
+    assert stats.evicted_files == 0
+    assert os.path.exists(os.path.join(outputs, "_thumbs", "old.webp"))
+
+
+def test_on_evict_runs_for_each_evicted_file(outputs):
+    evicted = []
+    OutputStore(outputs, max_files=3, protect_seconds=0, on_evict=evicted.append).evict()
+    assert [os.path.basename(path) for path in evicted] == ["out0.png", "out1.png"]
+
+
+def test_flush_writes_atime_and_keeps_mtime(outputs):
+    path = os.path.join(outputs, "out0.png")
+    mtime = os.stat(path).st_mtime_ns
+    store = OutputStore(outputs)
+    store.touch(path)
+    assert store.flush() == 1
+    st = os.stat(path)
+    assert st.st_mtime_ns == mtime
+    assert st.st_atime_ns > mtime
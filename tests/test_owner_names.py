@@ -0,0 +1,65 @@
+from owner_names import UNKNOWN_OWNER, OwnerNameCache
+
+
+class Loader:
+    def __init__(self, names):
+        self.names = names
+        self.calls = []
+
+    def __call__(self, user_ids):
+        self.calls.append(list(user_ids))
+        return {user_id: self.names[user_id] for user_id in user_ids if user_id in self.names}
+
+
+def test_loads_misses_in_one_batch():
+    loader = Loader({1: "Acme Mills", 2: "Bolt Textiles"})
+    cache = OwnerNameCache(loader)
+    assert cache.get_many([2, 1, None, 2]) == {1: "Acme Mills", 2: "Bolt Textiles"}
+    assert loader.calls == [[1, 2]]
+    assert cache.get(1) == "Acme Mills"
+    assert loader.calls == [[1, 2]]
+
+
+def test_unknown_users_are_remembered():
+    loader = Loader({})
+    cache = OwnerNameCache(loader)
+    assert cache.get(9) == UNKNOWN_OWNER
+    assert cache.get(9) == UNKNOWN_OWNER
+    assert len(loader.calls) == 1
+    assert cache.get(None) == UNKNOWN_OWNER
+
+
+def test_primed_names_skip_the_loader():
+    loader = Loader({})
+    cache = OwnerNameCache(loader)
+    cache.prime({3: "Primed Co"})
+    assert cache.get(3) == "Primed Co"
+    assert loader.calls == []
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    import owner_names
+    now = [100.0]
+    monkeypatch.setattr(owner_names.time, "monotonic", lambda: now[0])
+    loader = Loader({1: "Old Name"})
+    cache = OwnerNameCache(loader, ttl=10)
+    cache.get(1)
+    loader.names[1] = "New Name"
+    now[0] += 11
+    assert cache.get(1) == "New Name"
+
+
+def test_invalidate():
+    loader = Loader({1: "Acme Mills"})
+    cache = OwnerNameCache(loader)
+    cache.get(1)
+    cache.invalidate(1)
+    cache.get(1)
+    assert len(loader.calls) == 2
+
+
+def test_clears_when_full():
+    cache = OwnerNameCache(Loader({}), max_entries=2)
+    cache.prime({1: "a", 2: "b"})
+    cache.prime({3: "c"})
+    assert cache._names.keys() == {3}
@@ -0,0 +1,109 @@
+import pytest
+from sqlalchemy import Column, Float, Integer, String, create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, declarative_base
+
+from fabric_search import LikeFabricSearch, PostgresFabricSearch
+from pagination import InvalidCursorError, count_rows, decode_cursor, encode_cursor, keyset_page, order_clauses
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "fabric"
+    id = Column(Integer, primary_key=True)
+    ref = Column(String)
+    fabrication = Column(String)
+    fabric_group = Column(String)
+    score = Column(Float)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        # Scores repeat (ties across page boundaries) and include values like
+        # 0.1 that have no exact binary representation
+        scores = [0.1, 0.3, 0.1, 0.2, 0.1, 0.3, None, 0.2, 0.1, 0.1, 0.7, 0.1 + 0.2]
+        refs = ["COT-1", "cot", "JER-2", "XCOT", "cotton", "POL-9", "COT", "c", "COTX", "ab", "COT-7", "zz"]
+        for index, (score, ref) in enumerate(zip(scores, refs), start=1):
+            session.add(Item(id=index, ref=ref, fabrication="knit", fabric_group="Knit", score=score if score is not None else 0.0))
+        session.commit()
+        yield session
+
+
+def walk(query, keys, limit, scope="scope"):
+    """Collects every page of a keyset walk, checking each page's size."""
+    seen = []
+    cursor = None
+    while True:
+        items, cursor = keyset_page(query, keys, limit, cursor, scope)
+        assert len(items) <= limit
+        seen.extend(items)
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 5, 12, 50])
+def test_walk_matches_full_ordered_query_with_tied_keys(session, limit):
+    keys = [(Item.score, True), (Item.id, False)]
+    expected = [item.id for item in session.query(Item).order_by(*order_clauses(keys)).all()]
+    assert [item.id for item in walk(session.query(Item), keys, limit)] == expected
+
+
+@pytest.mark.parametrize("limit", [1, 4, 7])
+def test_walk_with_mixed_directions_and_filter(session, limit):
+    query = session.query(Item).filter(Item.id != 3)
+    keys = [(Item.fabric_group, False), (Item.score, False), (Item.id, True)]
+    expected = [item.id for item in query.order_by(*order_clauses(keys)).all()]
+    assert [item.id for item in walk(query, keys, limit)] == expected
+
+
+@pytest.mark.parametrize("limit", [1, 2, 5])
+def test_walk_by_search_rank(session, limit):
+    search = LikeFabricSearch(Item)
+    query = search.filter(session.query(Item), "cot")
+    keys = [(search.rank("cot"), True), (Item.id, False)]
+    expected = [item.id for item in query.order_by(*order_clauses(keys)).all()]
+    assert len(expected) > limit
+    assert [item.id for item in walk(query, keys, limit)] == expected
+
+
+def test_items_keep_extra_columns(session):
+    query = session.query(Item, Item.ref)
+    items, _ = keyset_page(query, [(Item.id, False)], 2)
+    assert [(item.id, ref) for item, ref in items] == [(1, "COT-1"), (2, "cot")]
+
+
+def test_last_page_has_no_cursor(session):
+    items, cursor = keyset_page(session.query(Item), [(Item.id, False)], 12)
+    assert len(items) == 12 and cursor is None
+
+
+def test_cursor_is_bound_to_its_scope(session):
+    _, cursor = keyset_page(session.query(Item), [(Item.id, False)], 2, scope="a")
+    with pytest.raises(InvalidCursorError, match="another|different|belong"):
+        keyset_page(session.query(Item), [(Item.id, False)], 2, cursor, scope="b")
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor("s", ["x", 1, 2]), encode_cursor("s", [[1]])])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "s", 2)
+
+
+def test_float_key_round_trips_exactly():
+    value = 0.1 + 0.2
+    assert decode_cursor(encode_cursor("s", [value, 7]), "s", 2) == [value, 7]
+
+
+def test_count_rows(session):
+    assert count_rows(session.query(Item).filter(Item.score > 0.15)) == (6, False)
+
+
+def test_postgres_rank_is_double_precision():
+    # ts_rank_cd/word_similarity return float4, which would not survive the cursor round trip
+    rank = PostgresFabricSearch(Item).rank("cotton")
+    sql = str(rank.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("CAST(") and sql.endswith("AS DOUBLE PRECISION)")
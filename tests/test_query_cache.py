@@ -0,0 +1,188 @@
+import threading
+import time
+
+import pytest
+
+import query_cache
+from query_cache import CatalogVersion, MemoryCacheBackend, QueryCache, SQLiteCacheBackend
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(query_cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path, clock):
+    if request.param == "memory":
+        backend = MemoryCacheBackend(max_entries=100)
+    else:
+        backend = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), max_entries=100)
+    results = []
+    cache = QueryCache(
+        backend, CatalogVersion(str(tmp_path / "catalog.version")), ttl=60, stale_ttl=300,
+        observer=lambda name, result: results.append(result)
+    )
+    cache.results = results
+    return cache
+
+
+class Counter:
+    """compute() stand-in returning 'v1', 'v2', ... (or raising when failing)."""
+
+    def __init__(self):
+        self.calls = 0
+        self.failing = False
+
+    def __call__(self):
+        if self.failing:
+            raise RuntimeError("database down")
+        self.calls += 1
+        return f"v{self.calls}"
+
+
+def wait_for_refresh(cache):
+    deadline = time.monotonic() + 5
+    while cache._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not cache._refreshing
+
+
+def test_miss_then_hit(cache):
+    compute = Counter()
+    assert cache.get_or_compute("q", {"a": 1}, compute) == "v1"
+    assert cache.get_or_compute("q", {"a": 1}, compute) == "v1"
+    assert compute.calls == 1
+    assert cache.results == ["miss", "hit"]
+
+
+def test_keys_depend_on_name_and_params(cache):
+    compute = Counter()
+    cache.get_or_compute("q", {"a": 1}, compute)
+    cache.get_or_compute("q", {"a": 2}, compute)
+    cache.get_or_compute("other", {"a": 1}, compute)
+    # Parameter order does not matter
+    cache.get_or_compute("q", {"b": 1, "a": 3}, compute)
+    cache.get_or_compute("q", {"a": 3, "b": 1}, compute)
+    assert compute.calls == 4
+
+
+def test_stale_entry_is_served_and_refreshed_in_background(cache, clock):
+    compute = Counter()
+    cache.get_or_compute("q", {}, compute)
+    clock.now += 61
+    assert cache.get_or_compute("q", {}, compute) == "v1"
+    wait_for_refresh(cache)
+    assert compute.calls == 2
+    assert cache.get_or_compute("q", {}, compute) == "v2"
+    assert cache.results == ["miss", "stale", "hit"]
+
+
+def test_concurrent_stale_reads_refresh_once(cache, clock):
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "fresh"
+
+    cache.get_or_compute("q", {}, lambda: "old")
+    clock.now += 61
+    for _ in range(5):
+        assert cache.get_or_compute("q", {}, slow) == "old"
+    release.set()
+    wait_for_refresh(cache)
+    assert len(calls) == 1
+
+
+def test_expired_entry_is_recomputed(cache, clock):
+    compute = Counter()
+    cache.get_or_compute("q", {}, compute)
+    clock.now += 60 + 300 + 1
+    assert cache.get_or_compute("q", {}, compute) == "v2"
+    assert cache.results == ["miss", "miss"]
+
+
+def test_error_serves_previous_entry_as_fallback(cache, clock):
+    compute = Counter()
+    cache.get_or_compute("q", {}, compute)
+    clock.now += 60 + 300 + 1
+    compute.failing = True
+    assert cache.get_or_compute("q", {}, compute) == "v1"
+    assert cache.results == ["miss", "fallback"]
+
+
+def test_error_without_entry_is_raised(cache):
+    compute = Counter()
+    compute.failing = True
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("q", {}, compute)
+
+
+def test_failed_refresh_keeps_serving_stale_entry(cache, clock):
+    compute = Counter()
+    cache.get_or_compute("q", {}, compute)
+    clock.now += 61
+    compute.failing = True
+    assert cache.get_or_compute("q", {}, compute) == "v1"
+    wait_for_refresh(cache)
+    assert cache.get_or_compute("q", {}, compute) == "v1"
+
+
+def test_invalidate_makes_entries_unreachable(cache):
+    compute = Counter()
+    cache.get_or_compute("q", {}, compute)
+    cache.invalidate()
+    assert cache.get_or_compute("q", {}, compute) == "v2"
+    assert cache.get_or_compute("q", {}, compute) == "v2"
+
+
+def test_bump_is_seen_by_other_instances(tmp_path):
+    path = str(tmp_path / "nested" / "catalog.version")
+    writer, reader = CatalogVersion(path), CatalogVersion(path)
+    assert reader.current() == "0"
+    writer.bump()
+    first = reader.current()
+    assert first != "0"
+    writer.bump()
+    assert reader.current() not in ("0", first)
+
+
+def test_version_bump_invalidates_another_workers_cache(tmp_path):
+    # Two workers with their own memory backends share the version file
+    path = str(tmp_path / "catalog.version")
+    worker_a = QueryCache(MemoryCacheBackend(), CatalogVersion(path))
+    worker_b = QueryCache(MemoryCacheBackend(), CatalogVersion(path))
+    compute = Counter()
+    worker_b.get_or_compute("q", {}, compute)
+    worker_a.invalidate()
+    assert worker_b.get_or_compute("q", {}, compute) == "v2"
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set("a", "1", 0)
+    backend.set("b", "2", 0)
+    backend.get("a")
+    backend.set("c", "3", 0)
+    assert backend.get("b") is None
+    assert backend.get("a") == (0, "1")
+
+
+def test_sqlite_backend_prunes_oldest(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), max_entries=3, prune_every=5)
+    for index in range(5):
+        backend.set(f"k{index}", str(index), float(index))
+    assert backend.get("k0") is None and backend.get("k1") is None
+    assert backend.get("k4") == (4.0, "4")
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from render_cache import RenderCache
+
+
+@pytest.fixture
+def output_dir(render_inputs):
+    return render_inputs.output_dir
+
+
+def make_key(cache, inputs, params=None):
+    return cache.make_key(inputs.fabric, inputs.mockup, inputs.mask, params)
+
+
+def write_output(output_dir, name="Mockup_x.png"):
+    path = os.path.join(output_dir, name)
+    with open(path, "wb") as f:
+        f.write(b"png")
+    return path
+
+
+def test_store_then_lookup_hits(render_inputs, output_dir):
+    cache = RenderCache(output_dir)
+    key = make_key(cache, render_inputs)
+    output = write_output(output_dir)
+    assert not cache.lookup(key, output)
+    cache.store(key, output)
+    assert cache.lookup(key, output)
+
+
+def test_missing_output_is_a_miss(render_inputs, output_dir):
+    cache = RenderCache(output_dir)
+    key = make_key(cache, render_inputs)
+    output = write_output(output_dir)
+    cache.store(key, output)
+    os.remove(output)
+    assert not cache.lookup(key, output)
+
+
+def test_changed_input_changes_the_key(render_inputs, output_dir):
+    cache = RenderCache(output_dir)
+    key = make_key(cache, render_inputs)
+    with open(render_inputs.mask, "ab") as f:
+        f.write(b"re-exported")
+    assert make_key(cache, render_inputs) != key
+
+
+def test_params_are_part_of_the_key(render_inputs, output_dir):
+    cache = RenderCache(output_dir)
+    assert make_key(cache, render_inputs, {"quality": "full"}) != make_key(cache, render_inputs, {"quality": "preview"})
+
+
+def test_stamp_is_shared_with_other_workers(render_inputs, output_dir):
+    key = make_key(RenderCache(output_dir), render_inputs)
+    output = write_output(output_dir)
+    RenderCache(output_dir).store(key, output)
+    assert RenderCache(output_dir).lookup(key, output)
+
+
+def test_invalidate_forgets_memory_and_stamp(render_inputs, output_dir):
+    cache = RenderCache(output_dir)
+    key = make_key(cache, render_inputs)
+    output = write_output(output_dir)
+    cache.store(key, output)
+    cache.invalidate(output)
+    assert not cache.lookup(key, output)
+    assert not RenderCache(output_dir).lookup(key, output)
+
+
+def test_missing_input_raises(render_inputs, output_dir):
+    os.remove(render_inputs.fabric)
+    with pytest.raises(OSError):
+        make_key(RenderCache(output_dir), render_inputs)
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+from PIL import Image
+
+import swatch_pyramid
+from image_decoding import DecodeBudgetError
+from swatch_pyramid import SwatchPyramid
+
+
+def write_swatch(directory, name, size, color=(90, 140, 40)):
+    path = os.path.join(directory, name)
+    Image.new("RGB", size, color).save(path)
+    return path
+
+
+@pytest.fixture
+def pyramid(tmp_path):
+    return SwatchPyramid(str(tmp_path / "pyramids"), min_size=256)
+
+
+def test_levels_halve_down_to_min_size(tmp_path, pyramid):
+    source = write_swatch(str(tmp_path), "FAB-1.png", (2001, 1000))
+    levels = pyramid.levels(source)
+    assert [size for _, size in levels] == [(2001, 1000), (1001, 500), (501, 250)]
+    for path, size in levels[1:]:
+        with Image.open(path) as level:
+            assert level.size == size
+
+
+def test_small_swatch_has_no_levels(tmp_path, pyramid):
+    source = write_swatch(str(tmp_path), "FAB-1.png", (300, 200))
+    assert pyramid.levels(source) == [(source, (300, 200))]
+
+
+@pytest.mark.parametrize("target, expected", [
+    ((1000, 400), (1001, 500)),
+    ((1002, 400), (2001, 1000)),
+    ((100, 100), (501, 250)),
+    ((5000, 5000), (2001, 1000)),
+])
+def test_select_smallest_covering_level(tmp_path, pyramid, target, expected):
+    source = write_swatch(str(tmp_path), "FAB-1.png", (2001, 1000))
+    with Image.open(pyramid.select(source, target)) as selected:
+        assert selected.size == expected
+
+
+def test_jpeg_levels_are_decoded_at_half_size(tmp_path, pyramid, monkeypatch):
+    source = write_swatch(str(tmp_path), "FAB-1.jpg", (2048, 1024))
+    calls = []
+    decode = swatch_pyramid.decode_image
+
+    def spy(path, mode, target_size=None, **kwargs):
+        image = decode(path, mode, target_size, **kwargs)
+        calls.append((target_size, image.size))
+        return image
+
+    monkeypatch.setattr(swatch_pyramid, "decode_image", spy)
+    levels = pyramid.levels(source)
+    assert calls == [((1024, 512), (1024, 512))]
+    assert levels[1][0].endswith("level1.jpg")
+
+
+def test_rebuilds_when_source_changes(tmp_path, pyramid):
+    source = write_swatch(str(tmp_path), "FAB-1.png", (1024, 1024), color=(255, 0, 0))
+    pyramid.levels(source)
+    write_swatch(str(tmp_path), "FAB-1.png", (2048, 1024), color=(0, 0, 255))
+    os.utime(source, ns=(0, os.stat(source).st_mtime_ns + 10**9))
+
+    # A fresh instance (another worker) re-reads the manifest from disk
+    for current in (pyramid, SwatchPyramid(pyramid.root_dir, min_size=256)):
+        levels = current.levels(source)
+        assert levels[0][1] == (2048, 1024)
+        with Image.open(levels[1][0]) as level:
+            assert level.size == (1024, 512)
+            assert level.getpixel((0, 0)) == (0, 0, 255)
+
+
+def test_reuses_manifest_across_instances(tmp_path, pyramid, monkeypatch):
+    source = write_swatch(str(tmp_path), "FAB-1.png", (1024, 1024))
+    levels = pyramid.levels(source)
+    monkeypatch.setattr(SwatchPyramid, "_build", lambda *args: pytest.fail("rebuilt"))
+    assert SwatchPyramid(pyramid.root_dir, min_size=256).levels(source) == levels
+
+
+def test_build_respects_decode_budget(tmp_path, pyramid):
+    source = write_swatch(str(tmp_path), "FAB-1.png", (2048, 2048))
+    with pytest.raises(DecodeBudgetError):
+        pyramid.levels(source, max_bytes=1024 * 1024)
+    # select() falls back to the original, which the caller decodes under its budget
+    assert pyramid.select(source, (512, 512), max_bytes=1024 * 1024) == source
@@ -0,0 +1,73 @@
+import os
+import time
+
+import pytest
+from PIL import Image
+
+from thumbnails import THUMB_DIR_NAME, ThumbnailStore
+
+
+@pytest.fixture
+def originals(tmp_path):
+    Image.new("RGB", (2000, 1000), (200, 10, 10)).save(tmp_path / "FAB-101.jpg")
+    Image.new("RGBA", (600, 800), (0, 0, 0, 0)).save(tmp_path / "Mockup_polo.png")
+    return str(tmp_path)
+
+
+def test_srcset_lists_every_width():
+    store = ThumbnailStore(widths=(512, 256))
+    assert store.srcset("/static/swatches/", "FAB-101.jpg") == {
+        "256w": f"/static/swatches/{THUMB_DIR_NAME}/FAB-101.jpg.256.webp",
+        "512w": f"/static/swatches/{THUMB_DIR_NAME}/FAB-101.jpg.512.webp",
+    }
+    assert store.srcset("/static/swatches/", None) is None
+
+
+def test_parse_thumb_name():
+    store = ThumbnailStore(widths=(256,), output_format="JPEG")
+    assert store.parse_thumb_name("a.b.png.256.jpg") == ("a.b.png", 256)
+    assert store.parse_thumb_name("a.png.512.jpg") is None  # width not served
+    assert store.parse_thumb_name("a.png.256.webp") is None  # other format
+
+
+def test_ensure_builds_scaled_derivative(originals):
+    store = ThumbnailStore(widths=(256,))
+    path = store.ensure(originals, "FAB-101.jpg", 256)
+    assert path == os.path.join(originals, THUMB_DIR_NAME, "FAB-101.jpg.256.webp")
+    with Image.open(path) as thumb:
+        assert thumb.size == (256, 128)
+
+
+def test_never_upscales(originals):
+    path = ThumbnailStore(widths=(1024,)).ensure(originals, "Mockup_polo.png", 1024)
+    with Image.open(path) as thumb:
+        assert thumb.size == (600, 800)
+        assert thumb.mode == "RGBA"
+
+
+def test_rebuilds_when_original_is_newer(originals):
+    store = ThumbnailStore(widths=(256,))
+    path = store.ensure(originals, "FAB-101.jpg", 256)
+    old = time.time_ns() - 3600 * 10**9
+    os.utime(path, ns=(old, old))
+    store.ensure(originals, "FAB-101.jpg", 256)
+    assert os.stat(path).st_mtime_ns > old
+
+
+def test_remove_all_drops_every_width(originals):
+    store = ThumbnailStore(widths=(256, 512))
+    store.ensure_all(originals, "FAB-101.jpg")
+    store.remove_all(originals, "FAB-101.jpg")
+    assert os.listdir(os.path.join(originals, THUMB_DIR_NAME)) == []
+    store.remove_all(originals, "FAB-101.jpg")  # nothing left: no error
+
+
+@pytest.mark.parametrize("filename", ["../FAB-101.jpg", ".hidden.jpg"])
+def test_rejects_unsafe_names(originals, filename):
+    with pytest.raises(ValueError):
+        ThumbnailStore(widths=(256,)).ensure(originals, filename, 256)
+
+
+def test_rejects_unconfigured_width(originals):
+    with pytest.raises(ValueError):
+        ThumbnailStore(widths=(256,)).ensure(originals, "FAB-101.jpg", 300)
@@ -0,0 +1,177 @@
+"""
+Thumbnails - fixed-width derivatives of swatches and generated mockups.
+
+Listings used to link the original files: full-resolution swatches and
+mockup PNGs, so a page of 100 cards could pull hundreds of megabytes. Every
+image can instead be served at a few fixed widths (256/512/1024 by default)
+in WebP or JPEG, advertised to clients as a srcset-style map:
+
+    {"256w": ".../_thumbs/FAB-101.jpg.256.webp", "512w": ..., "1024w": ...}
+
+Derivatives live in a `_thumbs` directory next to the originals, so the same
+static file server delivers them. They are created lazily on first request
+(Caddy falls back to the API when the file does not exist yet) or eagerly with
+`flask generate-thumbnails`. Images are never upscaled: a 600px swatch's 1024w
+derivative is 600px wide.
+
+Once a derivative exists Caddy serves it without asking the API, so a stale
+one must be deleted rather than rebuilt on request: the API drops a mockup's
+derivatives with remove_all() whenever the mockup is re-rendered.
+`flask generate-thumbnails` rebuilds any derivative older than its original
+(e.g. a swatch replaced in place by an import).
+"""
+
+import logging
+import os
+import re
+import threading
+
+from PIL import Image
+
+from image_decoding import decode_image
+
+logger = logging.getLogger(__name__)
+
+THUMB_DIR_NAME = "_thumbs"
+FORMATS = {"WEBP": ".webp", "JPEG": ".jpg"}
+
+_THUMB_NAME_RE = re.compile(r"^(?P<original>.+)\.(?P<width>[0-9]+)\.(?:webp|jpg)$")
+
+
+class ThumbnailStore:
+    """
+    Names, advertises and generates fixed-width derivatives.
+    """
+
+    def __init__(self, widths=(256, 512, 1024), output_format="WEBP", quality=80):
+        """
+        Args:
+            widths: Allowed derivative widths in pixels
+            output_format: 'WEBP' (keeps transparency) or 'JPEG'
+            quality: Lossy encoder quality (1-100)
+        """
+        output_format = output_format.upper()
+        if output_format not in FORMATS:
+            raise ValueError(f"Unsupported thumbnail format '{output_format}'. Expected one of {tuple(FORMATS)}")
+        self.widths = tuple(sorted(set(widths)))
+        self.output_format = output_format
+        self.quality = quality
+        self.extension = FORMATS[output_format]
+        self._lock = threading.Lock()
+        self._building = {}  # derivative path -> Lock, so concurrent requests build once
+
+    def thumb_name(self, filename, width):
+        """Returns the derivative filename for an original at a width."""
+        return f"{filename}.{width}{self.extension}"
+
+    def parse_thumb_name(self, name):
+        """
+        Splits a derivative filename into (original filename, width).
+
+        Returns:
+            Tuple, or None if the name is not a derivative this store serves
+        """
+        match = _THUMB_NAME_RE.match(name)
+        if not match or not name.endswith(self.extension):
+            return None
+        width = int(match.group("width"))
+        if width not in self.widths:
+            return None
+        return match.group("original"), width
+
+    def srcset(self, url_prefix, filename):
+        """
+        Returns {"<width>w": url} for an original, or None without a filename.
+
+        Args:
+            url_prefix: URL of the originals' directory, e.g. '/static/swatches/'
+            filename: Original filename within that directory
+        """
+        if not filename:
+            return None
+        return {
+            f"{width}w": f"{url_prefix}{THUMB_DIR_NAME}/{self.thumb_name(filename, width)}"
+            for width in self.widths
+        }
+
+    def ensure(self, directory, filename, width):
+        """
+        Returns the path of a derivative, generating it if it is missing or
+        older than the original.
+
+        Args:
+            directory: Directory holding the original
+            filename: Original filename (no path components)
+            width: One of the configured widths
+
+        Raises:
+            ValueError: If the width or filename is not allowed
+            FileNotFoundError: If the original does not exist
+        """
+        if width not in self.widths:
+            raise ValueError(f"Thumbnail width {width} is not one of {self.widths}")
+        if os.path.basename(filename) != filename or filename.startswith("."):
+            raise ValueError(f"Invalid filename '{filename}'")
+
+        source_path = os.path.join(directory, filename)
+        source_mtime = os.stat(source_path).st_mtime_ns
+        thumb_dir = os.path.join(directory, THUMB_DIR_NAME)
+        thumb_path = os.path.join(thumb_dir, self.thumb_name(filename, width))
+        if self._is_current(thumb_path, source_mtime):
+            return thumb_path
+
+        with self._lock:
+            lock = self._building.setdefault(thumb_path, threading.Lock())
+        with lock:
+            if not self._is_current(thumb_path, source_mtime):
+                os.makedirs(thumb_dir, exist_ok=True)
+                self._build(source_path, thumb_path, width)
+        with self._lock:
+            self._building.pop(thumb_path, None)
+        return thumb_path
+
+    def ensure_all(self, directory, filename):
+        """Generates every width for an original. Returns the derivative paths."""
+        return [self.ensure(directory, filename, width) for width in self.widths]
+
+    def remove_all(self, directory, filename):
+        """Deletes every derivative of an original (e.g. after it was evicted)."""
+        thumb_dir = os.path.join(directory, THUMB_DIR_NAME)
+        for width in self.widths:
+            try:
+                os.remove(os.path.join(thumb_dir, self.thumb_name(filename, width)))
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _is_current(thumb_path, source_mtime):
+        try:
+            return os.stat(thumb_path).st_mtime_ns >= source_mtime
+        except OSError:
+            return False
+
+    def _build(self, source_path, thumb_path, width):
+        with Image.open(source_path) as probe:
+            size = probe.size
+            has_alpha = probe.mode in ("RGBA", "LA", "PA") or "transparency" in probe.info
+        height = max(1, round(size[1] * width / size[0]))
+        image = decode_image(source_path, "RGBA" if has_alpha else "RGB", (min(width, size[0]), min(height, size[1])))
+        image.thumbnail((width, height), Image.Resampling.LANCZOS)
+        if image.mode == "RGBA" and self.output_format == "JPEG":
+            # JPEG has no transparency: flatten onto white like the site background
+            flattened = Image.new("RGB", image.size, (255, 255, 255))
+            flattened.paste(image, mask=image.getchannel("A"))
+            image = flattened
+
+        tmp_path = f"{thumb_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        try:
+            if self.output_format == "WEBP":
+                image.save(tmp_path, "WEBP", quality=self.quality, method=4)
+            else:
+                image.save(tmp_path, "JPEG", quality=self.quality, optimize=True, progressive=True)
+            os.replace(tmp_path, thumb_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        logger.debug(f"Thumbnail: {os.path.basename(thumb_path)} ({image.size[0]}x{image.size[1]})")